@@ -1,10 +1,31 @@
 import json
 import os
+import gzip
 import hashlib
 import datetime
-from typing import Any, Dict
+import fcntl
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+import metrics
 
 WORKSPACE_ROOT = os.environ.get("ARCOS_WORKSPACE", "workspace")
+BLOB_DIR = os.path.join(WORKSPACE_ROOT, "blobs")
+INDEX_DIR = os.path.join(WORKSPACE_ROOT, "index")
+INDEX_LOG = os.path.join(INDEX_DIR, "artifacts.log")
+INDEX_LOCK = os.path.join(INDEX_DIR, ".lock")
+GLOBAL_KEY = "_global"  # index key for artifacts without a ticker
+ALL_KEY = "_all"        # index key for the newest artifact of any ticker
+
+# Per-write fields kept on the pointer, so payloads that differ only by them share a blob
+VOLATILE_KEYS = ("as_of", "generated_at")
+COMPRESS_LEVEL = 5
+
+_sequence = itertools.count()
+_sequence_lock = threading.Lock()
+_index_lock = threading.Lock()
 
 
 def _ensure_dir(path: str) -> None:
@@ -12,19 +33,233 @@ def _ensure_dir(path: str) -> None:
 
 
 def _timestamp() -> str:
-    return datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    # Microseconds plus a per-process sequence number: names never collide
+    with _sequence_lock:
+        seq = next(_sequence)
+    now = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+    return f"{now}_{os.getpid()}_{seq:06d}"
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def canonical_bytes(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def blob_path(sha256: str) -> str:
+    return os.path.join(BLOB_DIR, sha256[:2], f"{sha256}.json.gz")
+
+
+def put_blob(payload: Dict[str, Any]) -> str:
+    """
+    Stores `payload` once under its SHA256 (of the canonical JSON), gzip
+    compressed. Returns the hash; an existing blob is never rewritten.
+    """
+    return _store_blob(payload)[0]
+
+
+def _store_blob(payload: Dict[str, Any]) -> Tuple[str, str]:
+    """put_blob, also returning the SHA256 of the gzip file as stored on disk."""
+    data = canonical_bytes(payload)
+    content_sha256 = hashlib.sha256(data).hexdigest()
+    path = blob_path(content_sha256)
+    if os.path.exists(path):
+        return content_sha256, compute_sha256(path)
+    _ensure_dir(os.path.dirname(path))
+    # mtime=0 keeps the compressed bytes deterministic too
+    compressed = gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+    _atomic_write(path, compressed)
+    return content_sha256, hashlib.sha256(compressed).hexdigest()
+
+
+def read_blob(sha256: str) -> Dict[str, Any]:
+    with gzip.open(blob_path(sha256), "rb") as f:
+        return json.loads(f.read())
+
+
+# --- Columnar frames (OHLCV bars) ---
+
+def put_frame(df, columns=("Open", "High", "Low", "Close", "Volume")) -> Dict[str, Any]:
+    """
+    Stores an OHLCV frame as an uncompressed Arrow IPC file in the blob store
+    (named by the SHA256 of its bytes, so an unchanged tail dedupes) and
+    returns the reference a payload embeds. Uncompressed so readers can
+    memory-map it.
+    """
+    import pandas as pd
+    import pyarrow as pa
+
+    if isinstance(df.columns, pd.MultiIndex):  # yfinance ticker level
+        df = df.copy()
+        df.columns = df.columns.get_level_values(0)
+    index = pd.DatetimeIndex(df.index)
+    index = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+    columns = [c for c in columns if c in df.columns]
+    table = pa.table({
+        "ts": pa.array(index.asi8, type=pa.timestamp("ns", tz="UTC")),
+        **{c: pa.array(df[c].to_numpy(dtype="float64")) for c in columns},
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    data = sink.getvalue().to_pybytes()
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = os.path.join(BLOB_DIR, sha256[:2], f"{sha256}.arrow")
+    if not os.path.exists(path):
+        _ensure_dir(os.path.dirname(path))
+        _atomic_write(path, data)
+    return {
+        "format": "arrow-ipc",
+        "blob": os.path.relpath(path, WORKSPACE_ROOT),
+        "sha256": sha256,
+        "rows": table.num_rows,
+        "columns": columns,
+        "start": index[0].isoformat() if len(index) else None,
+        "end": index[-1].isoformat() if len(index) else None,
+    }
+
 
+def read_frame(ref: Dict[str, Any]):
+    """
+    Memory-maps a frame stored by put_frame and returns it as a pyarrow
+    Table. Columns are views on the mapped file (table.column(c).to_numpy()
+    is zero-copy); call .to_pandas() for a DataFrame.
+    """
+    import pyarrow as pa
 
+    source = pa.memory_map(os.path.join(WORKSPACE_ROOT, ref["blob"]), "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+def read_frame_pandas(ref: Dict[str, Any]):
+    """A stored frame as an OHLCV DataFrame on a UTC DatetimeIndex."""
+    frame = read_frame(ref).to_pandas()
+    return frame.set_index("ts").rename_axis("Datetime")
+
+
+@metrics.timed("artifact_write")
 def write_artifact(category: str, payload: Dict[str, Any], prefix: str) -> str:
+    """
+    Writes the payload to the blob store and a small pointer file to
+    <category>/<prefix>_<timestamp>.json recording the blob, its content
+    address (content_sha256, of the canonical JSON), the SHA256 of the blob
+    file itself (sha256, what `sha256sum` on the blob prints) and the
+    per-write fields. Returns the pointer's path.
+    """
     category_path = os.path.join(WORKSPACE_ROOT, category)
     _ensure_dir(category_path)
-    filename = f"{prefix}_{_timestamp()}.json"
-    path = os.path.join(category_path, filename)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2, sort_keys=True)
+
+    content = {k: v for k, v in payload.items() if k not in VOLATILE_KEYS}
+    content_sha256, file_sha256 = _store_blob(content)
+    pointer = {
+        "type": "ArtifactPointer",
+        "artifact_type": payload.get("type"),
+        "category": category,
+        "ticker": payload.get("ticker"),
+        "content_sha256": content_sha256,
+        "sha256": file_sha256,
+        "blob": os.path.relpath(blob_path(content_sha256), WORKSPACE_ROOT),
+        "written_at": datetime.datetime.utcnow().isoformat(),
+        **{k: payload[k] for k in VOLATILE_KEYS if k in payload},
+    }
+
+    path = os.path.join(category_path, f"{prefix}_{_timestamp()}.json")
+    _atomic_write(path, json.dumps(pointer, sort_keys=True).encode("utf-8"))
+    _index(pointer, path)
     return path
 
 
+# --- Index: append-only log plus a "latest" file per (category, ticker) ---
+
+def _latest_file(category: str, key: Optional[str]) -> str:
+    key = (key or GLOBAL_KEY).replace("/", "_")
+    return os.path.join(INDEX_DIR, "latest", category, f"{key}.json")
+
+
+@contextmanager
+def _index_locked():
+    """
+    Serializes index updates across threads (the lock) and across processes
+    sharing the workspace, e.g. the agent and a backtest (flock on INDEX_LOCK).
+    """
+    with _index_lock:
+        _ensure_dir(INDEX_DIR)
+        with open(INDEX_LOCK, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _index(pointer: Dict[str, Any], path: str) -> None:
+    """
+    Appends the write to the index log and updates the category/ticker
+    latest file, which holds the newest record overall and per artifact type.
+    """
+    record = {
+        "category": pointer["category"],
+        "ticker": pointer["ticker"],
+        "artifact_type": pointer["artifact_type"],
+        "timestamp": pointer["written_at"],
+        "path": os.path.relpath(path, WORKSPACE_ROOT),
+        "blob": pointer["blob"],
+        "sha256": pointer["sha256"],
+        "content_sha256": pointer["content_sha256"],
+    }
+    line = json.dumps(record, sort_keys=True) + "\n"
+
+    with _index_locked():
+        with open(INDEX_LOG, "a", encoding="utf-8") as f:
+            f.write(line)
+
+        for key in (pointer["ticker"], ALL_KEY):
+            latest_path = _latest_file(pointer["category"], key)
+            _ensure_dir(os.path.dirname(latest_path))
+            try:
+                with open(latest_path, "r", encoding="utf-8") as f:
+                    latest = json.load(f)
+            except (OSError, ValueError):
+                latest = {"by_type": {}}
+            latest["latest"] = record
+            latest["by_type"][record["artifact_type"] or "unknown"] = record
+            _atomic_write(latest_path, json.dumps(latest, sort_keys=True).encode("utf-8"))
+
+
+def latest_artifact(category: str, ticker: Optional[str] = None, artifact_type: Optional[str] = None) -> Optional[Dict]:
+    """
+    Index record of the newest artifact in `category` for `ticker` (None:
+    artifacts without a ticker; ALL_KEY: any ticker), optionally of one
+    artifact type. One file read, no directory scan.
+    """
+    try:
+        with open(_latest_file(category, ticker), "r", encoding="utf-8") as f:
+            latest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if artifact_type is None:
+        return latest.get("latest")
+    return latest.get("by_type", {}).get(artifact_type)
+
+
+def read_artifact(path: str) -> Dict[str, Any]:
+    """The full payload behind a pointer file (or a legacy plain artifact)."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("type") != "ArtifactPointer":
+        return data
+    # Pointers written before content_sha256 existed kept the content address in sha256
+    payload = read_blob(data.get("content_sha256", data["sha256"]))
+    payload.update({k: data[k] for k in VOLATILE_KEYS if k in data})
+    return payload
+
+
 def compute_sha256(path: str) -> str:
     hasher = hashlib.sha256()
     with open(path, "rb") as f:
@@ -33,7 +268,12 @@ def compute_sha256(path: str) -> str:
     return hasher.hexdigest()
 
 
-def latest_artifact_path(category: str) -> str | None:
+def latest_artifact_path(category: str) -> Optional[str]:
+    record = latest_artifact(category, ALL_KEY)
+    if record is not None:
+        return os.path.join(WORKSPACE_ROOT, record["path"])
+
+    # Workspaces written before the index existed
     category_path = os.path.join(WORKSPACE_ROOT, category)
     if not os.path.isdir(category_path):
         return None
@@ -1,25 +1,40 @@
 import time
 import datetime
-import random
 import os
 import html
-import json
 import threading
 import redis
+import torch
 from http.server import HTTPServer, BaseHTTPRequestHandler
 import data_fetcher
 import signal_engine
 import social_scraper 
+import http_pool
 import db_manager
 import discovery
 import feature_engine
 import news_reader
 import calibrator
-from artifacts import write_artifact
+import lstm_brain
+import metrics
+import signal_stream
+from artifacts import put_frame, write_artifact
+from scheduler import ScanScheduler, format_cycle_report
 
 # --- CONFIGURATION ---
 REPORT_INTERVAL = 3600  # Send summary every 60 minutes
 MIN_BATCH_SIZE = 1      
+IO_WORKERS = int(os.environ.get("ARCOS_IO_WORKERS", 8))
+CPU_WORKERS = int(os.environ.get("ARCOS_CPU_WORKERS", 1))
+TORCH_THREADS = int(os.environ.get("ARCOS_TORCH_THREADS", 0))  # 0: torch's default, one per core
+REVISIT_DEADLINE = float(os.environ.get("ARCOS_REVISIT_DEADLINE", 300))  # Max seconds between looks at any ticker
+CYCLE_PAUSE = 3
+ARCHIVE_INTERVAL = 86400  # Move old vault rows into monthly archive tables once a day
+# Train one shared LSTM over the whole watchlist per cycle instead of one model per ticker
+BATCHED_LSTM = os.environ.get("ARCOS_BATCHED_LSTM", "0").lower() in ("1", "true", "yes")
+
+# Probabilities from the batched LSTM for the cycle in flight (BATCHED_LSTM only)
+cycle_price_probs = {}
 
 # --- REDIS SETUP ---
 REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost:6379")
@@ -30,9 +45,26 @@ except Exception as e:
     print(f"   ❌ [System] Redis Connection Error: {e}")
     r = None
 
+# Coalesces per ticker and publishes in pipelined batches (size or time triggered)
+signal_buffer = signal_stream.SignalBuffer(r) if r else None
+
+def _collect_signal_metrics():
+    if signal_buffer:
+        for name, count in signal_buffer.counts.items():
+            yield "signal_buffer_events_total", {"event": name}, count
+
+metrics.register(_collect_signal_metrics)
+
 # --- HEALTH CHECK SERVER ---
 class HealthCheckHandler(BaseHTTPRequestHandler):
     def do_GET(self):
+        if self.path == "/metrics":
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.end_headers()
+            self.wfile.write(body)
+            return
         self.send_response(200)
         self.end_headers()
         self.wfile.write(b"OK")
@@ -47,13 +79,15 @@ def start_health_check():
     server.serve_forever()
 
 def send_signal_to_redis(message_type, ticker, signal, prob, rationale, sample_size=0, win_rate=0.0, tags=None):
-    if not r:
+    """Queues the signal on the outbound buffer; it is published with the next batch."""
+    if not signal_buffer:
         print("   ⚠️ [System] Redis unavailable, skipping signal send.")
         return
 
     payload = {
         "header": {
-            "message_id": f"{message_type}-{random.randint(10000, 99999)}",
+            # ULIDs are unique and time-ordered, so the Maestro's audit files never collide
+            "message_id": f"{message_type}-{signal_stream.ulid()}",
             "sender": "ARCOS_AGENT",
             "timestamp": datetime.datetime.now().isoformat()
         },
@@ -69,12 +103,7 @@ def send_signal_to_redis(message_type, ticker, signal, prob, rationale, sample_s
             "tags": tags or []
         }
     }
-    
-    try:
-        r.rpush("arcos_signals", json.dumps(payload))
-        print(f"   🚀 [Redis] Pushed {signal} for {ticker}")
-    except Exception as e:
-        print(f"   ❌ [Redis] Push Failed: {e}")
+    signal_buffer.add(payload)
 
 def format_batch_report(reports):
     lines = ["🏛️ ARCOS NEURAL BRIEFING", "--------------------------------"]
@@ -86,6 +115,142 @@ def format_batch_report(reports):
     lines.append(f"Active Targets: {len(reports)}")
     return "\n".join(lines)
 
+@metrics.timed("io_stage")
+def gather_inputs(ticker):
+    """
+    I/O stage: market data, social sentiment, fundamentals, news and macro,
+    plus their raw snapshots. Returns None when there is not enough data.
+    """
+    # Bars were pulled for the whole watchlist at the top of the cycle
+    df = data_fetcher.fetch_history(ticker, offline=True)
+
+    if df.empty or len(df) < 20:
+        return None
+
+    current_price = float(df['Close'].iloc[-1].item())
+    try:
+        prev_price = float(df['Close'].iloc[-2].item())
+        percent_change = ((current_price - prev_price) / prev_price) * 100
+    except:
+        percent_change = 0.0
+
+    # Social (Reddit + RTX 3090), fundamentals, news and macro are independent
+    # network calls: issue them together and wait for the slowest one
+    fetched = http_pool.fan_out({
+        "social": lambda: social_scraper.get_reddit_sentiment(ticker),
+        "fundamentals": lambda: data_fetcher.fetch_fundamentals(ticker),
+        "news": lambda: data_fetcher.fetch_news(ticker),
+        "macro": data_fetcher.fetch_macro_calendar,
+    }, defaults={"social": (0.0, 0), "fundamentals": {}, "news": [], "macro": {}})
+    sentiment_score, social_vol = fetched["social"]
+    fundamentals = fetched["fundamentals"]
+    news_items = fetched["news"]
+    macro_snapshot = fetched["macro"]
+
+    market_snapshot = {
+        "type": "MarketSnapshot",
+        "ticker": ticker,
+        "as_of": datetime.datetime.utcnow().isoformat(),
+        # Columnar Arrow blob, shared by every snapshot with the same tail
+        "bars": put_frame(df.tail(200)),
+        "source": "yfinance",
+    }
+    write_artifact("raw", market_snapshot, f"market_{ticker}")
+
+    fundamental_snapshot = {
+        "type": "FundamentalSnapshot",
+        "ticker": ticker,
+        "as_of": datetime.datetime.utcnow().isoformat(),
+        "fundamentals": fundamentals,
+        "source": "yfinance",
+    }
+    write_artifact("raw", fundamental_snapshot, f"fundamentals_{ticker}")
+
+    news_snapshot = {
+        "type": "NewsSnapshot",
+        "ticker": ticker,
+        "as_of": datetime.datetime.utcnow().isoformat(),
+        "articles": news_items,
+        "source": "yfinance",
+    }
+    write_artifact("raw", news_snapshot, f"news_{ticker}")
+
+    write_artifact("raw", {
+        "type": "MacroSnapshot",
+        "as_of": datetime.datetime.utcnow().isoformat(),
+        "macro": macro_snapshot,
+    }, "macro")
+
+    flow_snapshot = {
+        "type": "FlowSnapshot",
+        "ticker": ticker,
+        "as_of": datetime.datetime.utcnow().isoformat(),
+        "flows": [],
+        "source": "placeholder",
+    }
+    write_artifact("raw", flow_snapshot, f"flows_{ticker}")
+
+    return {
+        "df": df,
+        "current_price": current_price,
+        "percent_change": percent_change,
+        "sentiment_score": sentiment_score,
+        "news_items": news_items,
+    }
+
+@metrics.timed("cpu_stage")
+def analyze_ticker(ticker, inputs):
+    """
+    CPU stage: features, LSTM + sentiment fusion, and the vault entry.
+    """
+    df = inputs["df"]
+    sentiment_score = inputs["sentiment_score"]
+    percent_change = inputs["percent_change"]
+    news_items = inputs["news_items"]
+
+    feature_engine.compute_features(ticker, df)
+    news_reader.score_headlines(
+        ticker, [item.get("title", "") for item in news_items if item.get("title")]
+    )
+
+    # Brain Analysis (LSTM + Logic)
+    result = signal_engine.run_simulation(
+        ticker, df, sentiment_score, price_prob=cycle_price_probs.get(ticker)
+    )
+    signal_candidates = {
+        "type": "SignalCandidates",
+        "ticker": ticker,
+        "generated_at": datetime.datetime.utcnow().isoformat(),
+        "candidates": [result],
+    }
+    write_artifact("signals", signal_candidates, f"signals_{ticker}")
+
+    # Log to Vault
+    social_note = f"Sent:{sentiment_score:.2f}"
+    raw_rationale = result['rationale'] + " | " + social_note
+    if abs(percent_change) > 2.0: raw_rationale += f" [VOLATILITY: {percent_change:+.2f}%]"
+
+    safe_rationale = html.escape(raw_rationale)
+
+    db_manager.log_decision(
+        ticker=ticker,
+        signal=result['signal'],
+        price=inputs["current_price"],
+        sentiment=sentiment_score,
+        raw_prob=0.0,
+        final_prob=result['prob'],
+        rationale=raw_rationale
+    )
+
+    print(f"   💾 [Hunter] {ticker}: {result['signal']} ({result['prob']:.2f}) | {percent_change:+.2f}%")
+
+    return {
+        "result": result,
+        "percent_change": percent_change,
+        "social_note": social_note,
+        "raw_rationale": raw_rationale,
+    }
+
 def run_bot_loop():
     print("---------------------------------------")
     print("   ARCOS GRANDMASTER: v3.5 (Cloud Native)")
@@ -95,14 +260,80 @@ def run_bot_loop():
     t = threading.Thread(target=start_health_check, daemon=True)
     t.start()
 
+    # Process-wide, so set once here rather than around each model call
+    if TORCH_THREADS > 0:
+        torch.set_num_threads(TORCH_THREADS)
+
     db_manager.init_db()
-    
+
+    if r:
+        try:
+            signal_stream.ensure_group(r)
+        except Exception as e:
+            # The Maestro creates the group too; entries published meanwhile are kept
+            print(f"   ⚠️ [Redis] Could not create consumer group: {e}")
+
+    scheduler = ScanScheduler(
+        io_stage=gather_inputs,
+        cpu_stage=analyze_ticker,
+        io_workers=IO_WORKERS,
+        cpu_workers=CPU_WORKERS,
+        revisit_deadline=REVISIT_DEADLINE,
+    )
+
     active_watchlist = []
     last_scan_time = 0
     pending_reports = []
     last_report_time = time.time()
+    last_archive_time = 0
     panic_cooldowns = {}
 
+    def handle_outcome(ticker, outcome):
+        # HYBRID ALERTING (Anti-Spam)
+        result = outcome["result"]
+        percent_change = outcome["percent_change"]
+
+        # A. Panic (Immediate - The Circuit Breaker)
+        # Only email instantly if price crashes/pumps > 3% AND we haven't emailed in 10 mins
+        is_crash = percent_change < -3.0
+        is_pump = percent_change > 3.0
+
+        if (is_crash or is_pump) and (time.time() - panic_cooldowns.get(ticker, 0) > 600):
+            tag = "CRASH" if is_crash else "MOON"
+            print(f"   🚨 [URGENT] Sending Immediate Alert for {ticker} ({tag})")
+
+            send_signal_to_redis(
+                message_type="SIG",
+                ticker=ticker,
+                signal=f"URGENT_{tag}",
+                prob=result['prob'],
+                rationale=f"IMMEDIATE VOLATILITY: {percent_change:+.2f}%",
+                sample_size=result['sample_size'],
+                win_rate=result['win_rate'],
+            )
+            panic_cooldowns[ticker] = time.time()
+
+        # B. Standard Buy (Buffered - The Digest)
+        elif result['signal'] == "BUY_CANDIDATE":
+            report_entry = {
+                "ticker": ticker,
+                "signal": "BUY",
+                "prob": result['prob'],
+                "note": f"{percent_change:+.1f}% | {outcome['social_note']}"
+            }
+            pending_reports.append(report_entry)
+            print(f"   📝 [Batch] Added {ticker} to hourly report ({len(pending_reports)} pending)")
+
+            send_signal_to_redis(
+                message_type="SIG",
+                ticker=ticker,
+                signal="BUY_CANDIDATE",
+                prob=result['prob'],
+                rationale=outcome['raw_rationale'],
+                sample_size=result['sample_size'],
+                win_rate=result['win_rate'],
+            )
+
     while True:
         try:
             # 1. Refresh Watchlist (Every 30 mins)
@@ -120,158 +351,31 @@ def run_bot_loop():
                 time.sleep(5)
                 continue
 
-            ticker = random.choice(active_watchlist)
-            
-            # 2. Fetch Data
-            try:
-                df = data_fetcher.fetch_history(ticker)
-            except:
-                continue
+            # 2. Fetch Data (one batched, incremental download for the whole watchlist)
+            with metrics.span("history_batch"):
+                histories = data_fetcher.fetch_history_batch(active_watchlist)
 
-            if df.empty or len(df) < 20: 
-                continue
-            
-            current_price = float(df['Close'].iloc[-1].item())
-            try:
-                prev_price = float(df['Close'].iloc[-2].item())
-                percent_change = ((current_price - prev_price) / prev_price) * 100
-            except:
-                percent_change = 0.0
-            
-            # 3. Neural Social (RTX 3090)
-            try:
-                sentiment_score, social_vol = social_scraper.get_reddit_sentiment(ticker)
-            except:
-                sentiment_score, social_vol = 0.0, 0
-
-            fundamentals = data_fetcher.fetch_fundamentals(ticker)
-            news_items = data_fetcher.fetch_news(ticker)
-            macro_snapshot = data_fetcher.fetch_macro_calendar()
-
-            market_snapshot = {
-                "type": "MarketSnapshot",
-                "ticker": ticker,
-                "as_of": datetime.datetime.utcnow().isoformat(),
-                "ohlcv": df.tail(200).to_dict(orient="records"),
-                "source": "yfinance",
-            }
-            market_path = write_artifact("raw", market_snapshot, f"market_{ticker}")
-
-            fundamental_snapshot = {
-                "type": "FundamentalSnapshot",
-                "ticker": ticker,
-                "as_of": datetime.datetime.utcnow().isoformat(),
-                "fundamentals": fundamentals,
-                "source": "yfinance",
-            }
-            fundamental_path = write_artifact("raw", fundamental_snapshot, f"fundamentals_{ticker}")
-
-            news_snapshot = {
-                "type": "NewsSnapshot",
-                "ticker": ticker,
-                "as_of": datetime.datetime.utcnow().isoformat(),
-                "articles": news_items,
-                "source": "yfinance",
-            }
-            news_path = write_artifact("raw", news_snapshot, f"news_{ticker}")
-
-            macro_path = write_artifact("raw", {
-                "type": "MacroSnapshot",
-                "as_of": datetime.datetime.utcnow().isoformat(),
-                "macro": macro_snapshot,
-            }, "macro")
-
-            flow_snapshot = {
-                "type": "FlowSnapshot",
-                "ticker": ticker,
-                "as_of": datetime.datetime.utcnow().isoformat(),
-                "flows": [],
-                "source": "placeholder",
-            }
-            flow_path = write_artifact("raw", flow_snapshot, f"flows_{ticker}")
-
-            feature_output = feature_engine.compute_features(ticker, df)
-            news_output = news_reader.score_headlines(
-                ticker, [item.get("title", "") for item in news_items if item.get("title")]
-            )
-            
-            # 4. Brain Analysis (LSTM + Logic)
-            result = signal_engine.run_simulation(ticker, df, sentiment_score)
-            signal_candidates = {
-                "type": "SignalCandidates",
-                "ticker": ticker,
-                "generated_at": datetime.datetime.utcnow().isoformat(),
-                "candidates": [result],
-            }
-            signal_path = write_artifact("signals", signal_candidates, f"signals_{ticker}")
-            
-            # 5. Log to Vault
-            social_note = f"Sent:{sentiment_score:.2f}"
-            raw_rationale = result['rationale'] + " | " + social_note
-            if abs(percent_change) > 2.0: raw_rationale += f" [VOLATILITY: {percent_change:+.2f}%]"
-            
-            safe_rationale = html.escape(raw_rationale)
-            
-            db_manager.log_decision(
-                ticker=ticker,
-                signal=result['signal'],
-                price=current_price,
-                sentiment=sentiment_score,
-                raw_prob=0.0,
-                final_prob=result['prob'],
-                rationale=raw_rationale
-            )
-
-            print(f"   💾 [Hunter] {ticker}: {result['signal']} ({result['prob']:.2f}) | {percent_change:+.2f}%")
-
-            # 6. HYBRID ALERTING (Anti-Spam)
-            
-            # A. Panic (Immediate - The Circuit Breaker)
-            # Only email instantly if price crashes/pumps > 3% AND we haven't emailed in 10 mins
-            is_crash = percent_change < -3.0
-            is_pump = percent_change > 3.0
-            
-            if (is_crash or is_pump) and (time.time() - panic_cooldowns.get(ticker, 0) > 600):
-                tag = "CRASH" if is_crash else "MOON"
-                print(f"   🚨 [URGENT] Sending Immediate Alert for {ticker} ({tag})")
-                
-                send_signal_to_redis(
-                    message_type="SIG",
-                    ticker=ticker,
-                    signal=f"URGENT_{tag}",
-                    prob=result['prob'],
-                    rationale=f"IMMEDIATE VOLATILITY: {percent_change:+.2f}%",
-                    sample_size=result['sample_size'],
-                    win_rate=result['win_rate'],
-                )
-                panic_cooldowns[ticker] = time.time()
-
-            # B. Standard Buy (Buffered - The Digest)
-            elif result['signal'] == "BUY_CANDIDATE":
-                report_entry = {
-                    "ticker": ticker,
-                    "signal": "BUY",
-                    "prob": result['prob'],
-                    "note": f"{percent_change:+.1f}% | {social_note}"
-                }
-                pending_reports.append(report_entry)
-                print(f"   📝 [Batch] Added {ticker} to hourly report ({len(pending_reports)} pending)")
+            # Multi-ticker scan: one forward/backward pass per epoch serves every symbol
+            cycle_price_probs.clear()
+            if BATCHED_LSTM:
+                try:
+                    with metrics.span("lstm_batch"):
+                        cycle_price_probs.update(lstm_brain.train_and_predict_batch(histories))
+                except Exception as e:
+                    print(f"   ⚠️ [Brain] Batched LSTM Error: {e}")
 
-                send_signal_to_redis(
-                    message_type="SIG",
-                    ticker=ticker,
-                    signal="BUY_CANDIDATE",
-                    prob=result['prob'],
-                    rationale=raw_rationale,
-                    sample_size=result['sample_size'],
-                    win_rate=result['win_rate'],
-                )
+            # 3-6. Fan the whole watchlist out: enrich -> analyze -> log -> alert
+            with metrics.span("cycle"):
+                report = scheduler.run_cycle(active_watchlist, on_result=handle_outcome)
+            print(format_cycle_report(report))
+            if signal_buffer:
+                signal_buffer.flush()
 
             # 7. Check Batch Timer (Hourly Email)
             if (time.time() - last_report_time > REPORT_INTERVAL) and (len(pending_reports) >= MIN_BATCH_SIZE):
                 print("   📧 [System] Compiling Hourly Briefing...")
                 summary_text = format_batch_report(pending_reports)
-                
+
                 send_signal_to_redis(
                     message_type="RPT",
                     ticker="MARKET_BRIEF",
@@ -282,17 +386,21 @@ def run_bot_loop():
                     win_rate=1.0,
                     tags=["BATCH"]
                 )
-                
+
                 pending_reports = []
                 last_report_time = time.time()
                 print("   ✅ [System] Briefing Sent!")
 
-            # 8. Speed Control
-            # Wait 3 seconds to let the 3090 cool down slightly between LSTM training runs
-            time.sleep(3) 
-
             calibrator.compute_calibration()
 
+            if time.time() - last_archive_time > ARCHIVE_INTERVAL:
+                db_manager.archive_old()
+                last_archive_time = time.time()
+
+            # 8. Speed Control
+            # Short breather between cycles so the 3090 can cool down between LSTM batches
+            time.sleep(CYCLE_PAUSE)
+
         except Exception as e:
             print(f"❌ [Error] Loop failed: {e}")
             time.sleep(1)
@@ -0,0 +1,31 @@
+"""
+ARCOS backtesting: one engine, pluggable strategies, and a results object
+that reports, plots and parameter sweeps all read from.
+"""
+from backtesting.data import load_prices, load_snapshot, start_index_for
+from backtesting.engine import run_backtest, simulate_trades
+from backtesting.report import plot_performance, print_hunter_report, print_risk_report
+from backtesting.results import BacktestResult, calculate_max_drawdown
+from backtesting.strategy import LogisticTrendStrategy, Strategy, prepare_data
+from backtesting.sweep import expand_grid, rank_configs, rank_results, run_sweep, sample_grid
+
+__all__ = [
+    "BacktestResult",
+    "LogisticTrendStrategy",
+    "Strategy",
+    "calculate_max_drawdown",
+    "expand_grid",
+    "load_prices",
+    "load_snapshot",
+    "plot_performance",
+    "prepare_data",
+    "print_hunter_report",
+    "print_risk_report",
+    "rank_configs",
+    "rank_results",
+    "run_backtest",
+    "run_sweep",
+    "sample_grid",
+    "simulate_trades",
+    "start_index_for",
+]
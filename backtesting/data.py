@@ -0,0 +1,44 @@
+import os
+from typing import Optional
+
+import pandas as pd
+import yfinance as yf
+
+import artifacts
+
+
+def load_prices(
+    ticker: str,
+    start: Optional[str] = None,
+    period: Optional[str] = None,
+    interval: str = "1d",
+) -> pd.DataFrame:
+    """Downloads one ticker's OHLCV history with flat columns."""
+    kwargs = {"start": start} if start else {"period": period or "max"}
+    df = yf.download(ticker, interval=interval, progress=False, **kwargs)
+    if isinstance(df.columns, pd.MultiIndex):
+        level = 0 if ticker in df.columns.get_level_values(0) else 1
+        df = df.xs(ticker, axis=1, level=level)
+    return df
+
+
+def start_index_for(df: pd.DataFrame, start_date: str) -> int:
+    """Row of `start_date`, or of the first bar after it."""
+    try:
+        return df.index.get_loc(start_date)
+    except KeyError:
+        return int(df.index.searchsorted(start_date))
+
+
+def load_snapshot(ticker: str) -> Optional[pd.DataFrame]:
+    """
+    Bars of the ticker's latest MarketSnapshot, memory-mapped from its Arrow
+    blob instead of downloaded. None if the agent has not written one.
+    """
+    record = artifacts.latest_artifact("raw", ticker, "MarketSnapshot")
+    if record is None:
+        return None
+    payload = artifacts.read_artifact(os.path.join(artifacts.WORKSPACE_ROOT, record["path"]))
+    if "bars" not in payload:  # record-oriented snapshots written before the Arrow blobs
+        return None
+    return artifacts.read_frame_pandas(payload["bars"])
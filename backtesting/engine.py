@@ -0,0 +1,108 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backtesting.results import BacktestResult
+from backtesting.strategy import Strategy
+
+
+def close_prices(df: pd.DataFrame) -> np.ndarray:
+    close = df['Close']
+    if isinstance(close, pd.DataFrame):  # yfinance MultiIndex columns
+        close = close.iloc[:, 0]
+    return close.to_numpy(dtype=np.float64)
+
+
+def simulate_trades(
+    prices: np.ndarray,
+    probabilities: np.ndarray,
+    buy_threshold: float,
+    sell_threshold: float,
+    initial_capital: float,
+):
+    """
+    All-in / all-out accounting. Cash and shares only change on BUY/SELL bars,
+    so only those are walked; the equity curve is filled in with array ops.
+    Returns (equity, trades).
+    """
+    buys = probabilities > buy_threshold
+    sells = probabilities < sell_threshold
+    events = np.flatnonzero(buys | sells)
+
+    cash, shares = initial_capital, 0
+    cash_after = np.empty(len(events))
+    shares_after = np.empty(len(events))
+    trades: List[Dict] = []
+    for k, j in enumerate(events):
+        price = prices[j]
+        if buys[j] and cash > price:
+            shares_to_buy = int(cash // price)
+            cash -= shares_to_buy * price
+            shares += shares_to_buy
+            trades.append({"bar": int(j), "side": "BUY", "shares": shares_to_buy, "price": float(price)})
+        elif sells[j] and shares > 0:
+            trades.append({"bar": int(j), "side": "SELL", "shares": shares, "price": float(price)})
+            cash += shares * price
+            shares = 0
+        cash_after[k] = cash
+        shares_after[k] = shares
+
+    # Carry each bar's latest post-event state forward
+    cash_series = np.full(len(prices), initial_capital)
+    share_series = np.zeros(len(prices))
+    if len(events):
+        last_event = np.searchsorted(events, np.arange(len(prices)), side="right") - 1
+        has_event = last_event >= 0
+        cash_series[has_event] = cash_after[last_event[has_event]]
+        share_series[has_event] = shares_after[last_event[has_event]]
+
+    equity = cash_series + (share_series * prices)
+    return equity, trades
+
+
+def run_backtest(
+    data: pd.DataFrame,
+    strategy: Strategy,
+    start_index: int = 0,
+    initial_capital: float = 10000.0,
+    benchmark_index: Optional[int] = None,
+    ticker: str = "",
+    benchmark_end_index: Optional[int] = None,
+) -> BacktestResult:
+    """
+    Runs `strategy` over `data` from `start_index` and books the trades.
+    The buy & hold benchmark buys at `benchmark_index` (default: start_index)
+    and its final value is taken at `benchmark_end_index` (default: the last
+    evaluated bar; -1 holds it to the last bar of `data`).
+    """
+    probabilities = strategy.probabilities(data, start_index)
+    close = close_prices(data)
+    evaluated = np.flatnonzero(~np.isnan(probabilities))
+    prices = close[evaluated]
+    dates = data.index[evaluated]
+
+    equity, trades = simulate_trades(
+        prices, probabilities[evaluated],
+        strategy.buy_threshold, strategy.sell_threshold, initial_capital,
+    )
+    trade_frame = pd.DataFrame(
+        [{"date": dates[t["bar"]], "side": t["side"], "shares": t["shares"], "price": t["price"]} for t in trades],
+        columns=["date", "side", "shares", "price"],
+    )
+
+    benchmark_index = start_index if benchmark_index is None else benchmark_index
+    bh_shares = initial_capital / close[benchmark_index]
+    bh_end_value = None if benchmark_end_index is None else float(bh_shares * close[benchmark_end_index])
+
+    return BacktestResult(
+        ticker=ticker,
+        strategy=strategy.name,
+        params=strategy.params(),
+        initial_capital=initial_capital,
+        equity=pd.Series(equity, index=dates, name="equity"),
+        benchmark=pd.Series(bh_shares * prices, index=dates, name="benchmark"),
+        probabilities=pd.Series(probabilities[evaluated], index=dates, name="probability"),
+        trades=trade_frame,
+        benchmark_end_value=bh_end_value,
+    )
@@ -0,0 +1,62 @@
+from backtesting.results import BacktestResult
+
+
+def print_risk_report(result: BacktestResult, benchmark_label: str = "S&P 500 (Buy/Hold)") -> None:
+    """Long-horizon report: final balance, return and max drawdown vs buy & hold."""
+    arcos_dd = result.max_drawdown
+    bh_dd = result.benchmark_max_drawdown
+
+    print("\n================ RISK REPORT ================")
+    print(f"Metric            ARCOS           {benchmark_label}")
+    print(f"---------------------------------------------")
+    print(f"Final Balance:    ${result.final_value:,.0f}         ${result.benchmark_final_value:,.0f}")
+    print(f"Total Return:     {result.total_return:+.1f}%        {result.benchmark_return:+.1f}%")
+    print(f"MAX DRAWDOWN:     {arcos_dd:.1f}%          {bh_dd:.1f}%")
+    print("=============================================")
+
+    if abs(arcos_dd) < abs(bh_dd):
+        print(f"🛡️ SAFETY VICTORY: ARCOS reduced crash risk by {abs(bh_dd) - abs(arcos_dd):.1f}%")
+        print("   This makes the strategy 'Institutional Grade'.")
+    else:
+        print("⚠️ ARCOS was riskier than the market.")
+
+
+def print_hunter_report(result: BacktestResult, title: str = "60-DAY HUNTER REPORT") -> None:
+    """Short-range intraday report: final value and return vs buy & hold."""
+    print(f"\n================ {title} ================")
+    print(f"Strategy:        15-Minute Candles (No Sentiment)")
+    print(f"ARCOS Final:     ${result.final_value:,.2f} ({result.total_return:+.2f}%)")
+    print(f"Buy & Hold:      ${result.benchmark_final_value:,.2f} ({result.benchmark_return:+.2f}%)")
+    print("======================================================")
+
+    if result.final_value > result.benchmark_final_value:
+        print("🚀 Hunter Logic beats the market on short timeframes!")
+    else:
+        print("📉 Volatility ate the profits. Needs Sentiment to filter noise.")
+
+
+def plot_performance(
+    result: BacktestResult,
+    output_path: str,
+    title: str = "",
+    benchmark_label: str = "S&P 500 (Buy & Hold)",
+) -> str:
+    """Draws the normalized equity curves from an existing result; no re-simulation."""
+    import matplotlib.pyplot as plt
+
+    curves = result.normalized()
+
+    plt.figure(figsize=(12, 6))
+    plt.style.use('dark_background') # The "Terminal" Look
+
+    plt.plot(curves.index, curves["strategy"], label='ARCOS AI', color='#00ff00', linewidth=1.5)
+    plt.plot(curves.index, curves["benchmark"], label=benchmark_label, color='#888888', linewidth=1, alpha=0.7)
+
+    plt.title(title or f"ARCOS vs {result.ticker}", fontsize=14, color='white')
+    plt.ylabel("Portfolio Growth (%)", color='white')
+    plt.legend()
+    plt.grid(color='#333333', linestyle='--', linewidth=0.5)
+
+    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    plt.close()
+    return output_path
@@ -0,0 +1,82 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import pandas as pd
+
+
+def calculate_max_drawdown(value_history) -> float:
+    """Calculates the worst peak-to-valley drop in %."""
+    series = pd.Series(value_history)
+    running_max = series.cummax()
+    drawdown = (series - running_max) / running_max
+    return drawdown.min() * 100
+
+
+@dataclass
+class BacktestResult:
+    """
+    Everything one backtest produced. Reports, plots and sweeps read from
+    this instead of re-running the simulation.
+    """
+
+    ticker: str
+    strategy: str
+    params: Dict
+    initial_capital: float
+    equity: pd.Series          # strategy value per evaluated bar
+    benchmark: pd.Series       # buy & hold value on the same bars
+    probabilities: pd.Series   # model output behind each bar's decision
+    trades: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=["date", "side", "shares", "price"]))
+    benchmark_end_value: Optional[float] = None  # buy & hold valued past the last evaluated bar
+
+    @property
+    def final_value(self) -> float:
+        return float(self.equity.iloc[-1]) if len(self.equity) else self.initial_capital
+
+    @property
+    def benchmark_final_value(self) -> float:
+        if self.benchmark_end_value is not None:
+            return self.benchmark_end_value
+        return float(self.benchmark.iloc[-1]) if len(self.benchmark) else self.initial_capital
+
+    @property
+    def total_return(self) -> float:
+        return ((self.final_value - self.initial_capital) / self.initial_capital) * 100
+
+    @property
+    def benchmark_return(self) -> float:
+        return ((self.benchmark_final_value - self.initial_capital) / self.initial_capital) * 100
+
+    @property
+    def drawdown(self) -> pd.Series:
+        """Percent below the running peak, per bar."""
+        return (self.equity / self.equity.cummax() - 1) * 100
+
+    @property
+    def max_drawdown(self) -> float:
+        return calculate_max_drawdown(self.equity.to_numpy())
+
+    @property
+    def benchmark_max_drawdown(self) -> float:
+        return calculate_max_drawdown(self.benchmark.to_numpy())
+
+    def normalized(self) -> pd.DataFrame:
+        """Both curves rebased to 100 at the start, for charts."""
+        return pd.DataFrame({
+            "strategy": self.equity / self.initial_capital * 100,
+            "benchmark": self.benchmark / self.initial_capital * 100,
+        })
+
+    def summary(self) -> Dict:
+        return {
+            "ticker": self.ticker,
+            "strategy": self.strategy,
+            **self.params,
+            "bars": len(self.equity),
+            "trades": len(self.trades),
+            "final_value": self.final_value,
+            "total_return": self.total_return,
+            "max_drawdown": self.max_drawdown,
+            "benchmark_return": self.benchmark_return,
+            "benchmark_max_drawdown": self.benchmark_max_drawdown,
+        }
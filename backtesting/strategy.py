@@ -0,0 +1,111 @@
+import warnings
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.linear_model import LogisticRegression
+
+import feature_graph
+
+# feature_graph names: Trend (SMA_5 > SMA_20) and 5-bar volatility
+FEATURE_COLUMNS = ['trend', 'volatility_5']
+REQUIRED_COLUMNS = ['Close', 'return', 'sma_5', 'sma_20', 'trend', 'volatility_5']
+
+
+def prepare_data(df: pd.DataFrame) -> pd.DataFrame:
+    """Trend/volatility features, computed once over the whole series."""
+    return feature_graph.features_for(df).frame(REQUIRED_COLUMNS)
+
+
+class Strategy:
+    """
+    Turns a price series into P(next bar up) for each bar; NaN means the
+    strategy makes no decision on that bar. The engine applies the thresholds.
+    """
+
+    name = "strategy"
+
+    def __init__(self, buy_threshold: float = 0.60, sell_threshold: float = 0.40):
+        self.buy_threshold = buy_threshold
+        self.sell_threshold = sell_threshold
+
+    def probabilities(self, data: pd.DataFrame, start_index: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def params(self) -> Dict:
+        return {"buy_threshold": self.buy_threshold, "sell_threshold": self.sell_threshold}
+
+
+class LogisticTrendStrategy(Strategy):
+    """
+    The ARCOS backtest model: LogisticRegression on Trend (SMA_5 > SMA_20)
+    and 5-bar volatility, walked forward over a rolling training window.
+
+    Bar i is scored with a model trained on the same rows a freshly sliced
+    `training_window` would have: the bars before it, minus the leading bars
+    that cannot compute features. The model is refit every `refit_every`
+    bars and scores the bars in between in one call; refit_every=1 is a
+    fresh fit on every bar. With warm_start the solver starts from the
+    previous coefficients.
+    """
+
+    name = "logistic_trend"
+
+    def __init__(
+        self,
+        training_window: int = 500,
+        buy_threshold: float = 0.60,
+        sell_threshold: float = 0.40,
+        refit_every: int = 1,
+        min_rows: int = 50,
+        warm_start: bool = False,
+    ):
+        super().__init__(buy_threshold, sell_threshold)
+        self.training_window = training_window
+        self.refit_every = refit_every
+        self.min_rows = min_rows
+        self.warm_start = warm_start
+
+    def params(self) -> Dict:
+        params = super().params()
+        params.update({
+            "training_window": self.training_window,
+            "refit_every": self.refit_every,
+            "min_rows": self.min_rows,
+            "warm_start": self.warm_start,
+        })
+        return params
+
+    def probabilities(self, data: pd.DataFrame, start_index: int) -> np.ndarray:
+        graph = feature_graph.features_for(data)
+        X_all = graph.matrix(FEATURE_COLUMNS)
+        returns = graph.column('return')
+        y_all = np.zeros(len(graph), dtype=int)
+        y_all[:-1] = np.where(returns[1:] > 0, 1, 0)
+
+        # Leading rows a fresh window loses to NaNs (19 for SMA_20 + pct_change)
+        valid = graph.valid(REQUIRED_COLUMNS)
+        warmup = int(np.argmax(valid)) if valid.any() else len(graph)
+
+        n = len(data)
+        probabilities = np.full(n, np.nan)
+        model = LogisticRegression(warm_start=self.warm_start)
+        first = max(start_index, self.training_window)
+
+        for i in range(first, n - 1, self.refit_every):
+            lo = i - self.training_window + warmup
+            if i - lo + 1 < self.min_rows:
+                continue
+            block = slice(i, min(i + self.refit_every, n - 1))
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", ConvergenceWarning)
+                    model.fit(X_all[lo:i], y_all[lo:i])
+                    probabilities[block] = model.predict_proba(X_all[block])[:, 1]
+            except Exception:
+                # Single-class window or any other failed fit: no decision on
+                # these bars, as the original per-bar loops skipped them
+                continue
+
+        return probabilities
@@ -0,0 +1,263 @@
+import hashlib
+import itertools
+import json
+import os
+import random
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from backtesting.engine import run_backtest
+from backtesting.strategy import LogisticTrendStrategy
+
+WORKSPACE_ROOT = os.environ.get("ARCOS_WORKSPACE", "workspace")
+SWEEP_DIR = os.path.join(WORKSPACE_ROOT, "sweeps")
+
+# Summary columns that describe an outcome rather than a configuration
+RESULT_COLUMNS = [
+    "ticker", "strategy", "bars", "trades", "final_value", "total_return",
+    "max_drawdown", "benchmark_return", "benchmark_max_drawdown",
+    "return_rank", "drawdown_rank", "score",
+]
+
+_attached: Dict[str, pd.DataFrame] = {}
+
+
+def expand_grid(grid: Dict[str, Iterable]) -> List[Dict]:
+    """{"a": [1, 2], "b": [3]} -> [{"a": 1, "b": 3}, {"a": 2, "b": 3}]"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def sample_grid(space: Dict[str, Union[list, tuple]], n: int, seed: Optional[int] = None) -> List[Dict]:
+    """
+    Random search: `n` distinct draws from `space`. A list is sampled as a set
+    of choices, a (low, high) tuple uniformly (ints stay ints).
+    """
+    rng = random.Random(seed)
+    configs, seen = [], set()
+    for _ in range(n * 20):
+        if len(configs) == n:
+            break
+        params = {}
+        for key, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[key] = rng.randint(low, high)
+                else:
+                    params[key] = round(rng.uniform(low, high), 4)
+            else:
+                params[key] = rng.choice(list(values))
+        key = json.dumps(params, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            configs.append(params)
+    return configs
+
+
+# --- Shared price data ---
+
+def dataset_hash(data: pd.DataFrame) -> str:
+    """Content hash of a price frame: index, columns and values."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(c) for c in data.columns]).encode())
+    digest.update(np.ascontiguousarray(data.index.asi8).tobytes())
+    digest.update(np.ascontiguousarray(data.to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def share_dataset(data: pd.DataFrame, directory: str = SWEEP_DIR) -> Dict:
+    """
+    Writes a price frame once as .npy files that workers memory-map, so the
+    frame is not pickled into every task. Returns the handle workers attach to.
+    """
+    if isinstance(data.columns, pd.MultiIndex):
+        data = data.copy()
+        data.columns = data.columns.get_level_values(0)
+    digest = dataset_hash(data)
+    base = os.path.join(directory, "data", digest)
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+
+    for suffix, array in (
+        (".values.npy", data.to_numpy(dtype=np.float64)),
+        (".index.npy", data.index.asi8),
+    ):
+        path = base + suffix
+        if not os.path.exists(path):
+            tmp = path + f".{os.getpid()}.tmp"
+            with open(tmp, "wb") as fh:
+                np.save(fh, np.ascontiguousarray(array))
+            os.replace(tmp, path)
+
+    return {
+        "hash": digest,
+        "path": base,
+        "columns": [str(c) for c in data.columns],
+        "tz": str(data.index.tz) if getattr(data.index, "tz", None) else None,
+        "index_name": data.index.name,
+    }
+
+
+def attach_dataset(handle: Dict) -> pd.DataFrame:
+    """Memory-maps a shared dataset; each worker process opens it once."""
+    cached = _attached.get(handle["hash"])
+    if cached is not None:
+        return cached
+    values = np.load(handle["path"] + ".values.npy", mmap_mode="r")
+    stamps = np.load(handle["path"] + ".index.npy", mmap_mode="r")
+    index = pd.DatetimeIndex(np.asarray(stamps).view("datetime64[ns]"), name=handle["index_name"])
+    if handle["tz"]:
+        index = index.tz_localize("UTC").tz_convert(handle["tz"])
+    data = pd.DataFrame(values, index=index, columns=handle["columns"], copy=False)
+    _attached[handle["hash"]] = data
+    return data
+
+
+# --- Result cache ---
+
+def _cache_connection(directory: str) -> sqlite3.Connection:
+    os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(directory, "sweep_cache.db"), timeout=30)
+    conn.execute('''CREATE TABLE IF NOT EXISTS results (
+        key TEXT PRIMARY KEY,
+        dataset TEXT NOT NULL,
+        summary TEXT NOT NULL
+    )''')
+    return conn
+
+
+def _cache_key(dataset: str, strategy: LogisticTrendStrategy, start_index: int, initial_capital: float) -> str:
+    payload = {
+        "dataset": dataset,
+        "strategy": strategy.name,
+        "params": strategy.params(),
+        "start_index": start_index,
+        "initial_capital": initial_capital,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _run_one(ticker: str, handle: Dict, start_index: int, params: Dict, initial_capital: float) -> Dict:
+    data = attach_dataset(handle)
+    strategy = LogisticTrendStrategy(**params)
+    return run_backtest(
+        data, strategy, start_index=start_index, initial_capital=initial_capital, ticker=ticker
+    ).summary()
+
+
+# --- Ranking ---
+
+def rank_results(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Orders runs by return and by max drawdown (shallowest first); `score` is
+    the mean of the two ranks, lower is better.
+    """
+    if results.empty:
+        return results
+    ranked = results.copy()
+    ranked["return_rank"] = ranked["total_return"].rank(ascending=False, method="min")
+    ranked["drawdown_rank"] = ranked["max_drawdown"].rank(ascending=False, method="min")
+    ranked["score"] = (ranked["return_rank"] + ranked["drawdown_rank"]) / 2
+    return ranked.sort_values(["score", "total_return"], ascending=[True, False]).reset_index(drop=True)
+
+
+def rank_configs(results: pd.DataFrame) -> pd.DataFrame:
+    """One row per parameter set across tickers: mean return, worst drawdown."""
+    if results.empty:
+        return results
+    params = [c for c in results.columns if c not in RESULT_COLUMNS]
+    grouped = results.groupby(params, dropna=False).agg(
+        tickers=("ticker", "nunique"),
+        total_return=("total_return", "mean"),
+        max_drawdown=("max_drawdown", "min"),
+        trades=("trades", "sum"),
+    ).reset_index()
+    return rank_results(grouped)
+
+
+def run_sweep(
+    datasets: Dict[str, pd.DataFrame],
+    grid: Optional[Dict[str, Iterable]] = None,
+    configs: Optional[List[Dict]] = None,
+    start_index: Union[int, Dict[str, int]] = 0,
+    initial_capital: float = 10000.0,
+    max_workers: Optional[int] = None,
+    cache_dir: Optional[str] = SWEEP_DIR,
+) -> pd.DataFrame:
+    """
+    Backtests every (ticker, parameter set) combination across a process pool.
+    `datasets` maps ticker -> price history; parameter sets come from `grid`
+    (expanded) and/or `configs` (e.g. sample_grid()), as LogisticTrendStrategy
+    keyword arguments. `start_index` may be one row for all tickers or a
+    ticker -> row map; keep it at or past the largest training_window so
+    every run is scored on the same bars.
+
+    Price data is shared with workers through memory-mapped files. Finished
+    runs are cached under `cache_dir` by data hash and parameters, so a rerun
+    only evaluates new points (cache_dir=None disables the cache). Returns one
+    summary row per run, ranked by rank_results().
+    """
+    combos = (expand_grid(grid) if grid else []) + list(configs or [])
+    directory = cache_dir or SWEEP_DIR
+    handles = {ticker: share_dataset(data, directory) for ticker, data in datasets.items()}
+
+    conn = _cache_connection(directory) if cache_dir else None
+    rows: List[Dict] = []
+    pending = []
+    for ticker, handle in handles.items():
+        first = start_index.get(ticker, 0) if isinstance(start_index, dict) else start_index
+        for params in combos:
+            key = _cache_key(handle["hash"], LogisticTrendStrategy(**params), first, initial_capital)
+            hit = conn.execute("SELECT summary FROM results WHERE key = ?", (key,)).fetchone() if conn else None
+            if hit:
+                rows.append({**json.loads(hit[0]), "ticker": ticker})
+            else:
+                pending.append((key, ticker, handle, first, params))
+
+    if pending:
+        print(f"   🔬 [Sweep] {len(pending)} new runs ({len(rows)} cached)")
+        max_workers = max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                (key, handle["hash"], pool.submit(_run_one, ticker, handle, first, params, initial_capital))
+                for key, ticker, handle, first, params in pending
+            ]
+            for key, digest, future in futures:
+                summary = future.result()
+                rows.append(summary)
+                if conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO results (key, dataset, summary) VALUES (?, ?, ?)",
+                        (key, digest, json.dumps(summary, default=float)),
+                    )
+                    conn.commit()
+    if conn:
+        conn.close()
+
+    return rank_results(pd.DataFrame(rows))
+
+
+if __name__ == "__main__":
+    from backtesting.data import load_prices, start_index_for
+
+    TICKERS = ["SPY", "QQQ"]
+    START_DATE = "2007-01-01"
+    GRID = {
+        # 0.60/0.40 backtester, 0.65/0.40 hunter
+        "buy_threshold": [0.55, 0.60, 0.65, 0.70],
+        "sell_threshold": [0.30, 0.35, 0.40, 0.45],
+        "training_window": [250, 500],
+        "refit_every": [5],
+        "warm_start": [True],
+    }
+
+    datasets = {ticker: load_prices(ticker, start="2005-01-01") for ticker in TICKERS}
+    starts = {ticker: start_index_for(df, START_DATE) for ticker, df in datasets.items()}
+    results = run_sweep(datasets, GRID, start_index=starts)
+
+    pd.set_option("display.width", 160)
+    print(rank_configs(results).head(10).to_string(index=False))
@@ -0,0 +1,105 @@
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+import pandas as pd
+
+WORKSPACE_ROOT = os.environ.get("ARCOS_WORKSPACE", "workspace")
+CACHE_FILE = os.path.join(WORKSPACE_ROOT, "bar_cache.db")
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+_conn = None
+_lock = threading.Lock()
+
+
+def _connection() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        cache_dir = os.path.dirname(CACHE_FILE)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        _conn = sqlite3.connect(CACHE_FILE, timeout=30, check_same_thread=False)
+        _conn.execute('''CREATE TABLE IF NOT EXISTS bars (
+            ticker TEXT NOT NULL,
+            interval TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume REAL,
+            PRIMARY KEY (ticker, interval, ts)
+        ) WITHOUT ROWID''')
+        _conn.commit()
+    return _conn
+
+
+def _is_daily(interval: str) -> bool:
+    return interval.endswith("d") or interval.endswith("wk") or interval.endswith("mo")
+
+
+def _to_epoch(index: pd.Index) -> pd.Series:
+    idx = pd.DatetimeIndex(index)
+    if idx.tz is None:
+        idx = idx.tz_localize("UTC")
+    return pd.Series(idx.tz_convert("UTC").asi8 // 10**9, index=index)
+
+
+def last_bar_time(ticker: str, interval: str) -> Optional[int]:
+    """Epoch seconds of the newest stored bar, or None if nothing is cached."""
+    with _lock:
+        row = _connection().execute(
+            "SELECT MAX(ts) FROM bars WHERE ticker=? AND interval=?", (ticker, interval)
+        ).fetchone()
+    return row[0] if row and row[0] is not None else None
+
+
+def store_bars(ticker: str, interval: str, df: pd.DataFrame) -> int:
+    """Upserts bars; the newest bar is usually still forming, so replace wins."""
+    if df is None or df.empty:
+        return 0
+    df = df.dropna(subset=["Close"])
+    if df.empty:
+        return 0
+    epochs = _to_epoch(df.index)
+    rows = [
+        (ticker, interval, int(ts), *(None if pd.isna(v) else float(v) for v in values))
+        for ts, values in zip(epochs, df[COLUMNS].itertuples(index=False, name=None))
+    ]
+    with _lock:
+        conn = _connection()
+        conn.executemany(
+            "INSERT OR REPLACE INTO bars (ticker, interval, ts, open, high, low, close, volume) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+    return len(rows)
+
+
+def load_bars(ticker: str, interval: str, since: Optional[int] = None) -> pd.DataFrame:
+    """
+    Returns cached bars as an OHLCV frame. Intraday bars come back on a UTC
+    index, daily bars on a naive date index, the same shapes yfinance returns.
+    """
+    query = "SELECT ts, open, high, low, close, volume FROM bars WHERE ticker=? AND interval=?"
+    params = [ticker, interval]
+    if since is not None:
+        query += " AND ts >= ?"
+        params.append(int(since))
+    query += " ORDER BY ts"
+    with _lock:
+        rows = _connection().execute(query, params).fetchall()
+
+    if not rows:
+        return pd.DataFrame(columns=COLUMNS)
+
+    df = pd.DataFrame(rows, columns=["ts"] + COLUMNS)
+    if _is_daily(interval):
+        index = pd.to_datetime(df["ts"], unit="s")
+    else:
+        index = pd.to_datetime(df["ts"], unit="s", utc=True)
+    df.index = pd.DatetimeIndex(index, name="Datetime" if not _is_daily(interval) else "Date")
+    return df[COLUMNS]
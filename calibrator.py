@@ -1,14 +1,323 @@
 import datetime
 import os
-import sqlite3
-from typing import Dict
+import time
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+import pandas as pd
+
+import bar_cache
+import db_manager
+import metrics
 from artifacts import write_artifact
 
-DB_FILE = os.environ.get("ARCOS_DB_PATH", "/app/workspace/arcos_vault.db")
+DB_FILE = db_manager.DB_FILE
+
+# Forward-return horizons each decision is labeled at
+HORIZONS = {"1h": 3600, "4h": 4 * 3600, "1d": 86400}
+# Horizon whose hit rate is reported to the Maestro as win_rate
+TRACK_HORIZON = os.environ.get("ARCOS_CALIBRATION_HORIZON", "1d")
+LABEL_INTERVAL = 300      # Seconds between labeling passes
+LABEL_GRACE = 86400       # Matured decisions still without bars after this are skipped
+MIN_TICKER_CALLS = 30     # Below this a ticker's track record falls back to its signal's
+RELIABILITY_BINS = 10
+# Direction each signal bets on; other signals are scored for calibration only
+DIRECTIONS = {"BUY_CANDIDATE": 1, "SELL_AVOID": -1}
+# Close time of a bar relative to its stamp: 15m bars by their length, daily bars
+# at the 21:00 UTC US close (stamped at midnight)
+BAR_SOURCES = (("15m", 15 * 60), ("1d", 21 * 3600))
+
+# Artifacts are re-emitted when their summary fields change, and otherwise at
+# most this often (so the raw counts in them stay roughly current)
+EMIT_INTERVAL = LABEL_INTERVAL
+CONFIDENCE_DIGITS = 3     # avg_confidence changes smaller than this are not news
+
+_last_emitted = {"summary": None, "at": 0.0, "payload": None}
+_outcomes = {"stats": None, "last_label": 0.0}
+
+
+def _fold_new_rows(conn, max_id):
+    """
+    Adds signals rows in (last_id, max_id] to the running aggregates. The
+    first statement is a write, so the writer's IMMEDIATE transaction holds
+    the lock before last_id is read: no row is ever counted twice.
+    """
+    conn.execute('''INSERT INTO calibration_summary (signal, count, prob_sum)
+        SELECT signal, COUNT(*), COALESCE(SUM(final_prob), 0.0) FROM signals
+        WHERE id > (SELECT value FROM calibration_meta WHERE key = 'last_id') AND id <= ?
+        GROUP BY signal
+        ON CONFLICT(signal) DO UPDATE SET
+            count = count + excluded.count,
+            prob_sum = prob_sum + excluded.prob_sum''', (max_id,))
+    conn.execute(
+        "UPDATE calibration_meta SET value = ? WHERE key = 'last_id' AND value < ?",
+        (max_id, max_id),
+    )
+
+
+def update_summary(wait: bool = False) -> Dict:
+    """
+    Queues a fold of the decisions logged since the last call into
+    calibration_summary and returns {signal: {"count", "avg_confidence"}}.
+    Cost tracks the number of new rows, not the size of the vault. The fold
+    commits in the background, so the summary lags one call unless `wait`.
+    """
+    reader = db_manager.reader()
+    max_id = reader.execute("SELECT MAX(id) FROM signals").fetchone()[0] or 0
+    last_id = reader.execute("SELECT value FROM calibration_meta WHERE key = 'last_id'").fetchone()[0]
+    if max_id > last_id:
+        # A fold still queued from the last call makes this one a no-op
+        db_manager.writer().submit(lambda conn: _fold_new_rows(conn, max_id))
+        if wait:
+            db_manager.flush(30)
+
+    rows = reader.execute("SELECT signal, count, prob_sum FROM calibration_summary").fetchall()
+    return {
+        row["signal"]: {
+            "count": row["count"],
+            "avg_confidence": float(row["prob_sum"] / row["count"]) if row["count"] else 0.0,
+        }
+        for row in rows
+    }
+
+
+# --- Outcome labeling ---
+
+def _bar_closes(ticker: str, since: int, interval: str, close_offset: int) -> pd.DataFrame:
+    bars = bar_cache.load_bars(ticker, interval, since=since - close_offset)
+    if bars.empty:
+        return pd.DataFrame({"close_ts": np.empty(0, dtype=np.int64), "exit_price": np.empty(0)})
+    index = pd.DatetimeIndex(bars.index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return pd.DataFrame({
+        "close_ts": index.asi8 // 10**9 + close_offset,
+        "exit_price": bars["Close"].to_numpy(dtype=np.float64),
+    })
+
+
+def _label(candidates: pd.DataFrame, seconds: int) -> pd.DataFrame:
+    """
+    Joins decisions to the last bar that had closed by decision time + horizon
+    (merge_asof per ticker). A label needs that bar to close after the
+    decision and a later bar to exist, so the horizon is fully observed.
+    """
+    labeled = []
+    for ticker, group in candidates.groupby("ticker", sort=False):
+        group = group.assign(target=group["timestamp"] + seconds).sort_values("target")
+        pending = group
+        for interval, offset in BAR_SOURCES:
+            if pending.empty:
+                break
+            bars = _bar_closes(ticker, int(pending["timestamp"].min()), interval, offset)
+            if bars.empty:
+                continue
+            joined = pd.merge_asof(
+                pending, bars, left_on="target", right_on="close_ts", direction="backward"
+            )
+            ok = (
+                joined["close_ts"].notna()
+                & (joined["close_ts"] > joined["timestamp"])
+                & (bars["close_ts"].iloc[-1] >= joined["target"])
+            ).to_numpy()
+            labeled.append(joined[ok])
+            pending = pending[~ok]
+    if not labeled:
+        return candidates.iloc[0:0].assign(forward_return=[], up=[])
+
+    out = pd.concat(labeled, ignore_index=True)
+    out["forward_return"] = out["exit_price"] / out["price_close"] - 1
+    out["up"] = (out["forward_return"] > 0).astype(int)
+    return out
+
+
+def _stats_deltas(rows: pd.DataFrame) -> List[Tuple]:
+    """Per (horizon, scope, key, bin) sums for newly labeled outcomes."""
+    prob = rows["prob"].astype(float).clip(0.0, 1.0)
+    direction = rows["signal"].map(DIRECTIONS).fillna(0)
+    frame = pd.DataFrame({
+        "horizon": rows["horizon"],
+        "signal": rows["signal"],
+        "ticker": rows["ticker"],
+        "bin": np.minimum((prob * RELIABILITY_BINS).astype(int), RELIABILITY_BINS - 1),
+        "n": 1,
+        "prob_sum": prob,
+        "up_sum": rows["up"],
+        "brier_sum": (prob - rows["up"]) ** 2,
+        "calls": (direction != 0).astype(int),
+        "hits": (np.sign(rows["forward_return"]) * direction > 0).astype(int),
+    })
+    sums = ["n", "prob_sum", "up_sum", "brier_sum", "calls", "hits"]
+    deltas = []
+    for scope in ("signal", "ticker"):
+        grouped = frame.groupby(["horizon", scope, "bin"], as_index=False)[sums].sum()
+        deltas.extend(
+            (h, scope, key, int(b), int(n), float(p), float(u), float(br), int(c), int(hi))
+            for h, key, b, n, p, u, br, c, hi in grouped.itertuples(index=False, name=None)
+        )
+    return deltas
+
+
+def _store_outcomes(conn, rows: pd.DataFrame, floors: Dict[str, int]) -> None:
+    db_manager.begin_immediate(conn)
+    if not rows.empty:
+        lo, hi = int(rows["signal_id"].min()), int(rows["signal_id"].max())
+        seen = set(conn.execute(
+            "SELECT signal_id, horizon FROM signal_outcomes WHERE signal_id BETWEEN ? AND ?", (lo, hi)
+        ).fetchall())
+        keys = list(zip(rows["signal_id"].astype(int), rows["horizon"]))
+        rows = rows[[key not in seen for key in keys]]
+    if not rows.empty:
+        conn.executemany(
+            '''INSERT INTO signal_outcomes (signal_id, horizon, ticker, signal, prob, forward_return, up)
+               VALUES (?, ?, ?, ?, ?, ?, ?)''',
+            [
+                (int(r.signal_id), r.horizon, r.ticker, r.signal, float(r.prob), float(r.forward_return), int(r.up))
+                for r in rows.itertuples(index=False)
+            ],
+        )
+        conn.executemany(
+            '''INSERT INTO outcome_stats (horizon, scope, key, bin, n, prob_sum, up_sum, brier_sum, calls, hits)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(horizon, scope, key, bin) DO UPDATE SET
+                   n = n + excluded.n,
+                   prob_sum = prob_sum + excluded.prob_sum,
+                   up_sum = up_sum + excluded.up_sum,
+                   brier_sum = brier_sum + excluded.brier_sum,
+                   calls = calls + excluded.calls,
+                   hits = hits + excluded.hits''',
+            _stats_deltas(rows),
+        )
+    for horizon, floor in floors.items():
+        conn.execute("INSERT OR IGNORE INTO calibration_meta (key, value) VALUES (?, 0)", (f"outcome_floor_{horizon}",))
+        conn.execute(
+            "UPDATE calibration_meta SET value = ? WHERE key = ? AND value < ?",
+            (floor, f"outcome_floor_{horizon}", floor),
+        )
+
+
+def label_outcomes(now: Optional[float] = None) -> int:
+    """
+    Labels decisions whose horizons have matured since the last pass. Per
+    horizon, a floor id marks where every older decision is labeled or past
+    LABEL_GRACE, so each pass only reads the decisions still in flight.
+    Returns the number of labels queued.
+    """
+    now = int(now or time.time())
+    reader = db_manager.reader()
+    floors_now = dict(reader.execute(
+        "SELECT key, value FROM calibration_meta WHERE key LIKE 'outcome_floor_%'"
+    ).fetchall())
 
+    labeled, floors = [], {}
+    for horizon, seconds in HORIZONS.items():
+        floor = floors_now.get(f"outcome_floor_{horizon}", 0)
+        candidates = pd.read_sql_query(
+            '''SELECT s.id AS signal_id, s.timestamp, s.ticker, s.signal, s.price_close, s.final_prob AS prob
+               FROM signals s
+               WHERE s.id > ? AND s.timestamp <= ? AND s.price_close > 0
+                 AND NOT EXISTS (SELECT 1 FROM signal_outcomes o WHERE o.signal_id = s.id AND o.horizon = ?)
+               ORDER BY s.id''',
+            reader, params=(floor, now - seconds, horizon),
+        )
+        if candidates.empty:
+            continue
+        rows = _label(candidates, seconds)
+        labeled.append(rows.assign(horizon=horizon))
 
-def compute_calibration() -> Dict:
+        # Advance the floor up to the first decision still waiting for bars
+        done = set(rows["signal_id"].tolist())
+        waiting = candidates[
+            ~candidates["signal_id"].isin(done) & (candidates["timestamp"] > now - seconds - LABEL_GRACE)
+        ]
+        floors[horizon] = int(waiting["signal_id"].min() - 1 if not waiting.empty else candidates["signal_id"].max())
+
+    if not floors:
+        return 0
+    rows = pd.concat(labeled, ignore_index=True) if labeled else pd.DataFrame()
+    rows = rows[["signal_id", "horizon", "ticker", "signal", "prob", "forward_return", "up"]] if not rows.empty else rows
+    db_manager.writer().submit(lambda conn: _store_outcomes(conn, rows, floors))
+    db_manager.flush(30)
+    return len(rows)
+
+
+def _metrics(bins: pd.DataFrame) -> Dict:
+    n = int(bins["n"].sum())
+    calls = int(bins["calls"].sum())
+    reliability = [
+        {
+            "bin": f"{b / RELIABILITY_BINS:.1f}-{(b + 1) / RELIABILITY_BINS:.1f}",
+            "n": int(row.n),
+            "avg_prob": float(row.prob_sum / row.n),
+            "observed": float(row.up_sum / row.n),
+        }
+        for b, row in bins.set_index("bin").sort_index().iterrows()
+        if row.n
+    ]
+    return {
+        "n": n,
+        "brier": float(bins["brier_sum"].sum() / n) if n else None,
+        "base_rate": float(bins["up_sum"].sum() / n) if n else None,
+        "calls": calls,
+        "hit_rate": float(bins["hits"].sum() / calls) if calls else None,
+        "reliability": reliability,
+    }
+
+
+def outcome_report() -> Dict:
+    """{horizon: {"by_signal": {...}, "by_ticker": {...}}} from outcome_stats."""
+    stats = pd.read_sql_query("SELECT * FROM outcome_stats", db_manager.reader())
+    report = {}
+    for (horizon, scope, key), bins in stats.groupby(["horizon", "scope", "key"]):
+        report.setdefault(horizon, {"by_signal": {}, "by_ticker": {}})[f"by_{scope}"][key] = _metrics(bins)
+    return report
+
+
+def track_record(ticker: str, signal: str) -> Tuple[float, int]:
+    """
+    (win_rate, sample_size) for a fresh decision: the realized hit rate of
+    past directional calls at TRACK_HORIZON, for this ticker once it has
+    MIN_TICKER_CALLS, otherwise for this signal (all directional signals for
+    WAIT/alerts). (0.0, 0) until decisions have matured.
+    """
+    report = (_outcomes["stats"] or {}).get(TRACK_HORIZON)
+    if not report:
+        return 0.0, 0
+    ticker_stats = report["by_ticker"].get(ticker)
+    if ticker_stats and ticker_stats["calls"] >= MIN_TICKER_CALLS:
+        return ticker_stats["hit_rate"], ticker_stats["calls"]
+    if signal in DIRECTIONS:
+        pool = [report["by_signal"].get(signal)]
+    else:
+        pool = [report["by_signal"].get(s) for s in DIRECTIONS]
+    calls = sum(p["calls"] for p in pool if p)
+    hits = sum(p["hit_rate"] * p["calls"] for p in pool if p and p["calls"])
+    return (hits / calls, calls) if calls else (0.0, 0)
+
+
+def update_outcomes(force: bool = False) -> Dict:
+    """Labels newly matured decisions (every LABEL_INTERVAL) and refreshes the report."""
+    if force or _outcomes["stats"] is None or time.time() - _outcomes["last_label"] > LABEL_INTERVAL:
+        _outcomes["last_label"] = time.time()
+        try:
+            label_outcomes()
+        except Exception as e:
+            print(f"   ⚠️ [Calibrator] Outcome labeling failed: {e}")
+        _outcomes["stats"] = outcome_report()
+    return _outcomes["stats"]
+
+
+def _summary_fields(signal_stats: Dict, outcomes: Dict, drift_alerts: List[Dict]) -> Tuple:
+    """What a reader of the artifacts acts on: not the raw decision counts."""
+    return (
+        {signal: round(meta["avg_confidence"], CONFIDENCE_DIGITS) for signal, meta in signal_stats.items()},
+        sorted((alert["signal"], alert["issue"]) for alert in drift_alerts),
+        outcomes,
+    )
+
+
+@metrics.timed("calibration")
+def compute_calibration(wait: bool = False) -> Dict:
     if not os.path.exists(DB_FILE):
         return {
             "type": "CalibrationState",
@@ -17,22 +326,8 @@ def compute_calibration() -> Dict:
             "drift_alerts": [],
         }
 
-    conn = sqlite3.connect(DB_FILE, timeout=30)
-    conn.row_factory = sqlite3.Row
-    rows = conn.execute("SELECT signal, final_prob FROM signals").fetchall()
-    conn.close()
-
-    stats = {}
-    for row in rows:
-        stats.setdefault(row["signal"], []).append(row["final_prob"])
-
-    signal_stats = {
-        signal: {
-            "count": len(values),
-            "avg_confidence": float(sum(values) / len(values)) if values else 0.0,
-        }
-        for signal, values in stats.items()
-    }
+    signal_stats = update_summary(wait)
+    outcomes = update_outcomes()
 
     drift_alerts = [
         {
@@ -43,11 +338,25 @@ def compute_calibration() -> Dict:
         for signal, meta in signal_stats.items()
         if meta["avg_confidence"] < 0.5
     ]
+    for signal, meta in outcomes.get(TRACK_HORIZON, {}).get("by_signal", {}).items():
+        if meta["calls"] >= MIN_TICKER_CALLS and meta["hit_rate"] < 0.5:
+            drift_alerts.append({
+                "signal": signal,
+                "issue": "low_hit_rate",
+                "horizon": TRACK_HORIZON,
+                "hit_rate": meta["hit_rate"],
+                "calls": meta["calls"],
+            })
+
+    summary = _summary_fields(signal_stats, outcomes, drift_alerts)
+    if summary == _last_emitted["summary"] and time.time() - _last_emitted["at"] < EMIT_INTERVAL:
+        return _last_emitted["payload"]
 
     payload = {
         "type": "CalibrationState",
         "generated_at": datetime.datetime.utcnow().isoformat(),
         "signal_stats": signal_stats,
+        "outcomes": outcomes,
         "drift_alerts": drift_alerts,
     }
     write_artifact("calibration", payload, "calibration_state")
@@ -58,8 +367,13 @@ def compute_calibration() -> Dict:
         "alerts": drift_alerts,
     }
     write_artifact("calibration", drift_payload, "drift_alerts")
+
+    _last_emitted["summary"] = summary
+    _last_emitted["at"] = time.time()
+    _last_emitted["payload"] = payload
     return payload
 
 
 if __name__ == "__main__":
-    compute_calibration()
+    db_manager.init_db()
+    compute_calibration(wait=True)
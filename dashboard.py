@@ -1,6 +1,5 @@
 import json
 import os
-import sqlite3
 import time
 
 from dotenv import load_dotenv, set_key
@@ -8,6 +7,8 @@ import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 
+import db_manager
+
 load_dotenv()
 
 st.set_page_config(page_title="ARCOS War Room", layout="wide", page_icon="⚔️")
@@ -39,7 +40,7 @@ h1, h2, h3, h4, h5 {
     unsafe_allow_html=True,
 )
 
-DB_FILE = os.environ.get("ARCOS_DB_PATH", "/app/workspace/arcos_vault.db")
+DB_FILE = db_manager.DB_FILE
 WORKSPACE_ROOT = os.environ.get("ARCOS_WORKSPACE", "/app/workspace")
 
 SETTINGS_KEYS = [
@@ -65,9 +66,10 @@ def clean_rationale(text):
 def get_data():
     if not os.path.exists(DB_FILE):
         return pd.DataFrame()
-    conn = sqlite3.connect(DB_FILE, timeout=10)
-    df = pd.read_sql_query("SELECT * FROM signals ORDER BY id DESC LIMIT 200", conn)
-    conn.close()
+    # Long-lived WAL reader: never waits on the agent's writer
+    df = pd.read_sql_query("SELECT * FROM signals ORDER BY id DESC LIMIT 200", db_manager.reader())
+    # Vault timestamps are epoch seconds (UTC)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s", utc=True)
     return df
 
 
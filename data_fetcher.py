@@ -1,84 +1,242 @@
 import yfinance as yf
 import pandas as pd
 import datetime
+import os
+import threading
 import time
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-def fetch_history(ticker):
+import bar_cache
+import http_pool
+import metrics
+from ttl_cache import TTLCache
+
+# yf.download keeps its results in module-level dicts, so concurrent calls from
+# the scheduler's I/O pool can see each other's frames. Serialize just that call.
+_DOWNLOAD_LOCK = threading.Lock()
+
+# Serve history straight from the local bar cache, no network.
+OFFLINE = os.environ.get("ARCOS_OFFLINE", "0").lower() in ("1", "true", "yes")
+
+# (interval, cold-start period)
+INTRADAY = ("15m", "5d")
+DAILY = ("1d", "1mo")
+INTRADAY_MAX_AGE = 59 * 86400  # Yahoo only serves 15m bars for the last 60 days
+YAHOO_HOST = "query2.finance.yahoo.com"  # per-host limit shared by the quote-summary and news calls
+
+
+def _split_download(data: pd.DataFrame, tickers: List[str]) -> Dict[str, pd.DataFrame]:
+    """Splits a (possibly MultiIndex) yf.download frame into one OHLCV frame per ticker."""
+    if data is None or data.empty:
+        return {}
+    if not isinstance(data.columns, pd.MultiIndex):
+        return {tickers[0]: data} if len(tickers) == 1 else {}
+
+    level = 0 if set(tickers) & set(data.columns.get_level_values(0)) else 1
+    frames = {}
+    for ticker in tickers:
+        if ticker not in data.columns.get_level_values(level):
+            continue
+        frame = data.xs(ticker, axis=1, level=level).dropna(how="all")
+        if not frame.empty:
+            frames[ticker] = frame
+    return frames
+
+
+def _download(tickers: List[str], interval: str, **kwargs) -> Dict[str, pd.DataFrame]:
+    with _DOWNLOAD_LOCK, metrics.span("yf_download", interval=interval):
+        data = yf.download(
+            tickers if len(tickers) > 1 else tickers[0],
+            interval=interval,
+            group_by="ticker",
+            progress=False,
+            **kwargs,
+        )
+    return _split_download(data, tickers)
+
+
+def _refresh(tickers: List[str], interval: str, period: str) -> None:
     """
-    Fetches market data with intelligent fallback.
+    Pulls only the missing tail for each ticker into the bar cache.
+    Tickers with nothing cached get the full cold-start period; the rest are
+    grouped by their last stored bar so each group is a single request.
+    The last stored bar is re-requested because it may still have been forming.
+    """
+    now = time.time()
+    cold, warm = [], {}
+    for ticker in tickers:
+        last = bar_cache.last_bar_time(ticker, interval)
+        if last is None or (interval == INTRADAY[0] and now - last > INTRADAY_MAX_AGE):
+            cold.append(ticker)
+        else:
+            warm.setdefault(last, []).append(ticker)
+
+    batches = []
+    if cold:
+        batches.append((cold, {"period": period}))
+    for last, group in warm.items():
+        start = datetime.datetime.fromtimestamp(last, tz=datetime.timezone.utc)
+        if interval == DAILY[0]:
+            start = start.date()
+        batches.append((group, {"start": start}))
+
+    for group, kwargs in batches:
+        try:
+            frames = _download(group, interval, **kwargs)
+        except Exception as e:
+            print(f"   ⚠️ [Data] {interval} fetch failed for {len(group)} tickers: {e}")
+            continue
+        for ticker, frame in frames.items():
+            bar_cache.store_bars(ticker, interval, frame)
+
+
+def _serve(ticker: str, interval: str) -> pd.DataFrame:
+    """Reads the same window the old per-ticker download returned, anchored on the newest bar."""
+    last = bar_cache.last_bar_time(ticker, interval)
+    if last is None:
+        return pd.DataFrame(columns=bar_cache.COLUMNS)
+
+    if interval == INTRADAY[0]:
+        # "5d" on Yahoo means the last 5 trading sessions, not calendar days
+        df = bar_cache.load_bars(ticker, interval, since=last - 14 * 86400)
+        sessions = df.index.normalize()
+        keep = sessions.unique()[-5:]
+        return df[sessions.isin(keep)]
+
+    return bar_cache.load_bars(ticker, interval, since=last - 31 * 86400)
+
+
+def fetch_history_batch(tickers: List[str], offline: Optional[bool] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Fetches market data for many tickers through the local bar cache.
     Mode 1: High-Frequency (15m) for active trading.
     Mode 2: Daily (1d) fallback for crypto/long-term trends.
+    Only the bars newer than the cache are downloaded; with offline=True
+    nothing is downloaded at all.
     """
+    offline = OFFLINE if offline is None else offline
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return {}
+
     # 1. Try High-Frequency (The Hunter Strategy)
-    try:
-        # We grab 5 days of 15-minute candles. 
-        # This is the "sweet spot" for short-term momentum.
-        df = yf.download(ticker, period="5d", interval="15m", progress=False)
-        
-        # Validation: Do we have enough data to calculate a trend?
-        if not df.empty and len(df) > 20:
-            return df
-            
-    except Exception as e:
-        print(f"   ⚠️ [Data] 15m fetch failed for {ticker}: {e}")
+    if not offline:
+        _refresh(tickers, *INTRADAY)
+    frames = {ticker: _serve(ticker, INTRADAY[0]) for ticker in tickers}
 
     # 2. Fallback to Daily (The Sniper Strategy)
     # If 15m fails (common with some crypto or indices), grab standard daily data
+    thin = [ticker for ticker, df in frames.items() if df.empty or len(df) <= 20]
+    if thin:
+        if not offline:
+            _refresh(thin, *DAILY)
+        for ticker in thin:
+            frames[ticker] = _serve(ticker, DAILY[0])
+
+    return frames
+
+
+def fetch_history(ticker, offline=None):
+    """
+    Fetches market data with intelligent fallback.
+    Mode 1: High-Frequency (15m) for active trading.
+    Mode 2: Daily (1d) fallback for crypto/long-term trends.
+    """
     try:
-        # print(f"   🔄 [Data] Falling back to daily data for {ticker}...")
-        df = yf.download(ticker, period="1mo", interval="1d", progress=False)
-        return df
+        return fetch_history_batch([ticker], offline=offline)[ticker]
     except Exception as e:
         print(f"   ❌ [Data] Critical Failure for {ticker}: {e}")
         return pd.DataFrame()
 
 
+# Per-source freshness: (ttl, extra seconds a stale value may be served while it refreshes)
+INFO_TTL = (6 * 3600, 18 * 3600)      # market cap / P/E barely move intraday
+NAME_TTL = (7 * 86400, 30 * 86400)
+NEWS_TTL = (600, 1800)
+MACRO_TTL = (3600, 6 * 3600)
+
+_INFO_CACHE = TTLCache("ticker_info", *INFO_TTL)
+_NAME_CACHE = TTLCache("asset_name", *NAME_TTL)
+_NEWS_CACHE = TTLCache("news", *NEWS_TTL)
+_MACRO_CACHE = TTLCache("macro", *MACRO_TTL)
+
+
+def _download_info(ticker: str) -> Dict:
+    """The fields ARCOS uses from yfinance's (slow) quote summary."""
+    with http_pool.host_slot(YAHOO_HOST), metrics.span("yf_info"):
+        info = yf.Ticker(ticker, session=http_pool.session()).info
+    if not info:
+        raise ValueError(f"no quote summary for {ticker}")
+    return {
+        "long_name": info.get("longName"),
+        "market_cap": info.get("marketCap"),
+        "pe_ratio": info.get("trailingPE"),
+        "forward_pe": info.get("forwardPE"),
+        "profit_margins": info.get("profitMargins"),
+        "revenue_growth": info.get("revenueGrowth"),
+    }
+
+
+def _ticker_info(ticker: str) -> Dict:
+    return _INFO_CACHE.get(ticker, lambda: _download_info(ticker))
+
+
 def fetch_fundamentals(ticker: str) -> Dict:
     """
-    Fetches basic fundamentals where available.
+    Fetches basic fundamentals where available (cached for INFO_TTL).
     """
     try:
-        info = yf.Ticker(ticker).info
-        return {
-            "market_cap": info.get("marketCap"),
-            "pe_ratio": info.get("trailingPE"),
-            "forward_pe": info.get("forwardPE"),
-            "profit_margins": info.get("profitMargins"),
-            "revenue_growth": info.get("revenueGrowth"),
-        }
+        info = _ticker_info(ticker)
     except Exception:
         return {}
+    return {k: v for k, v in info.items() if k != "long_name"}
+
+
+def get_asset_name(ticker: str) -> str:
+    """Long name of the asset, falling back to the ticker itself."""
+    try:
+        return _NAME_CACHE.get(ticker, lambda: _ticker_info(ticker).get("long_name") or ticker)
+    except Exception:
+        return ticker
+
+
+def _download_news(ticker: str) -> List[Dict]:
+    with http_pool.host_slot(YAHOO_HOST), metrics.span("yf_news"):
+        news_items = yf.Ticker(ticker, session=http_pool.session()).news or []
+    return [
+        {
+            "title": item.get("title"),
+            "publisher": item.get("publisher"),
+            "link": item.get("link"),
+            "provider_publish_time": item.get("providerPublishTime"),
+        }
+        for item in news_items
+    ]
 
 
 def fetch_news(ticker: str) -> List[Dict]:
     """
-    Fetches recent news metadata from yfinance.
+    Fetches recent news metadata from yfinance (cached for NEWS_TTL).
     """
     try:
-        news_items = yf.Ticker(ticker).news or []
-        return [
-            {
-                "title": item.get("title"),
-                "publisher": item.get("publisher"),
-                "link": item.get("link"),
-                "provider_publish_time": item.get("providerPublishTime"),
-            }
-            for item in news_items
-        ]
+        return _NEWS_CACHE.get(ticker, lambda: _download_news(ticker))
     except Exception:
         return []
 
 
-def fetch_macro_calendar() -> Dict:
-    """
-    Placeholder for macro calendar.
-    """
+def _macro_calendar() -> Dict:
     return {
         "events": [],
         "source": "placeholder",
     }
 
+
+def fetch_macro_calendar() -> Dict:
+    """
+    Placeholder for macro calendar (cached for MACRO_TTL).
+    """
+    return _MACRO_CACHE.get("calendar", _macro_calendar)
+
 if __name__ == "__main__":
     # Quick test to prove it works
     print("Testing Data Fetcher...")
@@ -1,23 +1,202 @@
 import sqlite3
 import os
 import datetime
+import atexit
+import queue
+import threading
 import time
 
+import metrics
+
 # CRITICAL FIX: Use Absolute Docker Path
 # The Dockerfile sets WORKDIR to /app, and we mount to /app/workspace
 DB_FILE = os.environ.get("ARCOS_DB_PATH", "/app/workspace/arcos_vault.db")
 
-def init_db():
-    """Creates the vault in Standard Mode."""
-    # Ensure the directory exists inside the container
+ARCHIVE_FILE = os.environ.get(
+    "ARCOS_ARCHIVE_DB_PATH", os.path.join(os.path.dirname(DB_FILE), "arcos_archive.db")
+)
+# Decisions older than this move out of the live table into monthly archive tables
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCOS_ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_CHUNK = 1000
+
+# Writer batching: commit when this many statements are queued or the window closes
+WRITE_BATCH_MAX = int(os.environ.get("ARCOS_VAULT_BATCH_MAX", "200"))
+WRITE_BATCH_WINDOW = float(os.environ.get("ARCOS_VAULT_BATCH_WINDOW", "0.05"))
+# Seconds between attempts to open the writer's connection: doubles from the first to the last
+WRITER_RETRY_FIRST = 1.0
+WRITER_RETRY_MAX = 60.0
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",      # readers never block the writer (and vice versa)
+    "PRAGMA synchronous=NORMAL",    # durable at checkpoints; safe with WAL
+    "PRAGMA cache_size=-16000",     # 16 MB page cache
+    "PRAGMA mmap_size=268435456",   # 256 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=30000",    # wait on a lock inside SQLite instead of sleeping
+)
+
+_local = threading.local()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _open(query_only=False):
+    """A connection with the vault pragmas applied."""
     db_dir = os.path.dirname(DB_FILE)
-    if not os.path.exists(db_dir):
-        os.makedirs(db_dir)
-        
-    conn = sqlite3.connect(DB_FILE, timeout=30)
-    c = conn.cursor()
-    
-    # Create the Master Ledger table
+    if db_dir and not os.path.exists(db_dir):
+        os.makedirs(db_dir, exist_ok=True)
+    conn = sqlite3.connect(DB_FILE, timeout=30, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    if query_only:
+        conn.execute("PRAGMA query_only=ON")
+    return conn
+
+
+def reader():
+    """
+    The calling thread's long-lived read connection. Under WAL it sees the
+    last committed state and never waits on the writer. Callers should check
+    that DB_FILE exists first, as opening one creates the file.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _open(query_only=True)
+        conn.row_factory = sqlite3.Row
+        _local.conn = conn
+    return conn
+
+
+class VaultWriter:
+    """
+    The only thread that writes to the vault. Statements are queued and
+    committed in grouped transactions: one commit per batch instead of one
+    connection + commit per decision.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="arcos-vault-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, sql, params=(), note=None):
+        """`sql` is a statement, or a callable that gets the writer's connection."""
+        self.queue.put((sql, params, note))
+
+    def flush(self, timeout=None):
+        """Blocks until everything queued so far is committed (or `timeout` passes)."""
+        done = threading.Event()
+        self.queue.put((None, None, done))
+        return done.wait(timeout)
+
+    def _drain(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + WRITE_BATCH_WINDOW
+        while len(batch) < WRITE_BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _commit(self, conn, statements):
+        with conn:
+            for sql, params, _ in statements:
+                if callable(sql):
+                    sql(conn)
+                else:
+                    conn.execute(sql, params)
+        metrics.incr("vault_writes_total", len(statements))
+        for _, _, note in statements:
+            if note:
+                print(note)
+
+    def _connect(self):
+        """
+        The writer's connection. Retries with backoff until the vault opens
+        (e.g. the volume is not mounted yet); writes queue up meanwhile and
+        flush() times out instead of the thread dying silently.
+        """
+        delay = WRITER_RETRY_FIRST
+        while True:
+            conn = None
+            try:
+                conn = _open()
+                # Take the write lock when a batch starts, so reads inside it are current
+                conn.isolation_level = "IMMEDIATE"
+                conn.execute("ATTACH DATABASE ? AS archive", (ARCHIVE_FILE,))
+                conn.execute("PRAGMA archive.journal_mode=WAL")
+                return conn
+            except Exception as e:
+                if conn is not None:
+                    conn.close()
+                print(f"   ❌ [Vault] Writer cannot open the vault ({e}); retrying in {delay:.0f}s")
+                metrics.incr("vault_writer_open_failures_total")
+                time.sleep(delay)
+                delay = min(delay * 2, WRITER_RETRY_MAX)
+
+    def _run(self):
+        conn = self._connect()
+        while True:
+            batch = self._drain()
+            statements = [item for item in batch if item[0] is not None]
+            if statements:
+                try:
+                    with metrics.span("vault_batch"):
+                        self._commit(conn, statements)  # one transaction per batch
+                except Exception as e:
+                    # Something in the batch failed and rolled all of it back:
+                    # replay it one write per transaction so only the culprit is lost
+                    print(f"   ⚠️ [Vault] Batch of {len(statements)} failed ({e}); retrying writes one by one")
+                    for statement in statements:
+                        try:
+                            self._commit(conn, [statement])
+                        except Exception as e:
+                            print(f"   ❌ [Vault] Write Error (1 queued write dropped): {e}")
+                            metrics.incr("vault_dropped_writes_total")
+            for sql, _, done in batch:
+                if sql is None:
+                    done.set()
+
+
+def begin_immediate(conn):
+    """For writer callables that read before they write: take the lock first."""
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+
+def writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = VaultWriter()
+            atexit.register(_writer.flush, 10)
+    return _writer
+
+
+SIGNAL_COLUMNS = "id, timestamp, ticker, signal, price_close, sentiment_score, raw_ml_prob, final_prob, rationale"
+
+
+def _signals_ddl(table, autoincrement=True):
+    # `timestamp` is integer epoch seconds (UTC)
+    return f'''CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY{" AUTOINCREMENT" if autoincrement else ""},
+        timestamp INTEGER NOT NULL,
+        ticker TEXT,
+        signal TEXT,
+        price_close REAL,
+        sentiment_score REAL,
+        raw_ml_prob REAL,
+        final_prob REAL,
+        rationale TEXT
+    )'''
+
+
+def _create_legacy_signals(c):
+    # Master Ledger as first shipped (ISO text timestamps)
     c.execute('''CREATE TABLE IF NOT EXISTS signals (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         timestamp TEXT,
@@ -29,55 +208,208 @@ def init_db():
         final_prob REAL,
         rationale TEXT
     )''')
-    
-    conn.commit()
+
+
+def _epoch_timestamps(c):
+    # SQLite cannot retype a column: rebuild the table, keeping ids
+    c.execute(_signals_ddl("signals_v2"))
+    c.execute(f'''INSERT INTO signals_v2 ({SIGNAL_COLUMNS})
+        SELECT id,
+               CASE WHEN typeof(timestamp) IN ('integer', 'real') THEN CAST(timestamp AS INTEGER)
+                    ELSE COALESCE(CAST(strftime('%s', timestamp) AS INTEGER), 0) END,
+               ticker, signal, price_close, sentiment_score, raw_ml_prob, final_prob, rationale
+        FROM signals''')
+    c.execute("DROP TABLE signals")
+    c.execute("ALTER TABLE signals_v2 RENAME TO signals")
+
+
+def _add_indexes(c):
+    # get_history: WHERE ticker=? ORDER BY id DESC
+    c.execute("CREATE INDEX IF NOT EXISTS idx_signals_ticker_id ON signals (ticker, id)")
+    # calibrator: per-signal scans; final_prob makes the index covering
+    c.execute("CREATE INDEX IF NOT EXISTS idx_signals_signal_ts ON signals (signal, timestamp, final_prob)")
+
+
+def _calibration_summary(c):
+    # Running per-signal aggregates, folded in from rows past last_id
+    c.execute('''CREATE TABLE IF NOT EXISTS calibration_summary (
+        signal TEXT PRIMARY KEY,
+        count INTEGER NOT NULL,
+        prob_sum REAL NOT NULL
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS calibration_meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )''')
+    c.execute("INSERT OR IGNORE INTO calibration_meta (key, value) VALUES ('last_id', 0)")
+
+
+def _signal_outcomes(c):
+    # Realized forward returns per decision and horizon, plus running sums by bin
+    c.execute('''CREATE TABLE IF NOT EXISTS signal_outcomes (
+        signal_id INTEGER NOT NULL,
+        horizon TEXT NOT NULL,
+        ticker TEXT,
+        signal TEXT,
+        prob REAL,
+        forward_return REAL,
+        up INTEGER,
+        PRIMARY KEY (signal_id, horizon)
+    ) WITHOUT ROWID''')
+    c.execute('''CREATE TABLE IF NOT EXISTS outcome_stats (
+        horizon TEXT NOT NULL,
+        scope TEXT NOT NULL,
+        key TEXT NOT NULL,
+        bin INTEGER NOT NULL,
+        n INTEGER NOT NULL,
+        prob_sum REAL NOT NULL,
+        up_sum REAL NOT NULL,
+        brier_sum REAL NOT NULL,
+        calls INTEGER NOT NULL,
+        hits INTEGER NOT NULL,
+        PRIMARY KEY (horizon, scope, key, bin)
+    ) WITHOUT ROWID''')
+
+
+# Schema migrations, applied in order; PRAGMA user_version records how many ran
+MIGRATIONS = [
+    _create_legacy_signals,
+    _epoch_timestamps,
+    _add_indexes,
+    _calibration_summary,
+    _signal_outcomes,
+]
+
+
+def migrate(conn):
+    """
+    Brings the vault schema up to date, one transaction per migration. The
+    version is re-read under the write lock, so concurrent callers (agent and
+    calibrator containers) never apply the same migration twice.
+    """
+    isolation = conn.isolation_level
+    conn.isolation_level = None  # explicit transactions, DDL included
+    try:
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= len(MIGRATIONS):
+                conn.execute("COMMIT")
+                break
+            migration = MIGRATIONS[version]
+            try:
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {version + 1}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            print(f"   🗄️ [Vault] Applied migration {version + 1}: {migration.__name__}")
+    finally:
+        conn.isolation_level = isolation
+    return len(MIGRATIONS)
+
+
+def init_db():
+    """Creates or migrates the vault, in WAL mode."""
+    conn = _open()
+    migrate(conn)
     conn.close()
     print(f"   🗄️ [Vault] Database initialized at {DB_FILE}")
 
 def log_decision(ticker, signal, price, sentiment, raw_prob, final_prob, rationale):
-    """Saves a decision to the vault."""
-    attempts = 0
-    while attempts < 3:
-        try:
-            conn = sqlite3.connect(DB_FILE, timeout=30)
-            c = conn.cursor()
-            
-            timestamp = datetime.datetime.now().isoformat()
-            
-            c.execute('''INSERT INTO signals 
-                         (timestamp, ticker, signal, price_close, sentiment_score, raw_ml_prob, final_prob, rationale)
-                         VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-                      (timestamp, ticker, signal, price, sentiment, raw_prob, final_prob, rationale))
-            
-            conn.commit()
-            conn.close()
-            print(f"   🔐 [Vault] Saved {ticker} decision to history.")
-            return
-        except sqlite3.OperationalError:
-            attempts += 1
-            time.sleep(1)
-            print(f"   ⚠️ [Vault] DB Locked, retrying ({attempts}/3)...")
-        except Exception as e:
-            print(f"   ❌ [Vault] Write Error: {e}")
-            return
+    """Queues a decision for the vault writer; returns without waiting on the disk."""
+    timestamp = int(time.time())
+    writer().submit(
+        '''INSERT INTO signals
+           (timestamp, ticker, signal, price_close, sentiment_score, raw_ml_prob, final_prob, rationale)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+        (timestamp, ticker, signal, price, sentiment, raw_prob, final_prob, rationale),
+        note=f"   🔐 [Vault] Saved {ticker} decision to history.",
+    )
+
+def _month_bounds(epoch):
+    day = datetime.datetime.utcfromtimestamp(epoch)
+    start = datetime.datetime(day.year, day.month, 1, tzinfo=datetime.timezone.utc)
+    end = datetime.datetime(day.year + day.month // 12, day.month % 12 + 1, 1, tzinfo=datetime.timezone.utc)
+    return start.strftime("%Y%m"), int(start.timestamp()), int(end.timestamp())
+
+
+def _archive_rows(conn, cutoff):
+    """Moves decisions older than `cutoff` into archive.signals_YYYYMM, oldest first."""
+    moved = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, timestamp FROM signals WHERE timestamp < ? ORDER BY id LIMIT ?",
+            (cutoff, ARCHIVE_CHUNK),
+        ).fetchall()
+        if not rows:
+            break
+        lo, hi = rows[0][0], rows[-1][0]
+        for month in sorted({_month_bounds(ts) for _, ts in rows}):
+            name, start, end = month
+            table = f"signals_{name}"
+            conn.execute(_signals_ddl(f"archive.{table}", autoincrement=False))
+            conn.execute(f"CREATE INDEX IF NOT EXISTS archive.idx_{table}_ticker_id ON {table} (ticker, id)")
+            conn.execute(
+                f'''INSERT OR REPLACE INTO archive.{table} ({SIGNAL_COLUMNS})
+                    SELECT {SIGNAL_COLUMNS} FROM main.signals
+                    WHERE id BETWEEN ? AND ? AND timestamp >= ? AND timestamp < ? AND timestamp < ?''',
+                (lo, hi, start, end, cutoff),
+            )
+        moved += conn.execute(
+            "DELETE FROM main.signals WHERE id BETWEEN ? AND ? AND timestamp < ?", (lo, hi, cutoff)
+        ).rowcount
+        conn.commit()
+    if moved:
+        print(f"   🗄️ [Vault] Archived {moved} decisions older than {ARCHIVE_AFTER_DAYS} days.")
+
+
+def archive_old(retention_days=None):
+    """
+    Queues a move of decisions older than `retention_days` (default
+    ARCOS_ARCHIVE_AFTER_DAYS) from the live table into monthly tables in the
+    attached archive database, so live queries stay flat as history grows.
+    """
+    days = ARCHIVE_AFTER_DAYS if retention_days is None else retention_days
+    cutoff = int(time.time()) - days * 86400
+    writer().submit(lambda conn: _archive_rows(conn, cutoff))
+
+
+def archived_months():
+    """YYYYMM of every archive table, oldest first."""
+    if not os.path.exists(ARCHIVE_FILE):
+        return []
+    conn = sqlite3.connect(ARCHIVE_FILE, timeout=30)
+    try:
+        names = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'signals_%' ORDER BY name"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [name[len("signals_"):] for (name,) in names]
+
+
+def flush(timeout=None):
+    """Waits for queued decisions to be committed."""
+    if _writer is None:
+        return True
+    return _writer.flush(timeout)
 
 def get_history(ticker=None, limit=50):
     """Retrieves past data for the dashboard."""
     if not os.path.exists(DB_FILE):
         return []
-        
+
     try:
-        conn = sqlite3.connect(DB_FILE, timeout=30)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-        
+        c = reader().cursor()
+
         if ticker:
             c.execute("SELECT * FROM signals WHERE ticker=? ORDER BY id DESC LIMIT ?", (ticker, limit))
         else:
             c.execute("SELECT * FROM signals ORDER BY id DESC LIMIT ?", (limit,))
-        
+
         rows = c.fetchall()
-        conn.close()
         return [dict(row) for row in rows]
     except Exception:
         return []
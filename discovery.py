@@ -1,4 +1,4 @@
-import requests
+import http_pool
 import re
 
 def get_trending_tickers():
@@ -13,7 +13,7 @@ def get_trending_tickers():
     try:
         url = "https://query2.finance.yahoo.com/v1/finance/trending/US"
         headers = {'User-Agent': 'Mozilla/5.0'}
-        resp = requests.get(url, headers=headers, timeout=5)
+        resp = http_pool.get(url, headers=headers, timeout=5)
         data = resp.json()
         
         quotes = data['finance']['result'][0]['quotes']
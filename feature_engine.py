@@ -1,37 +1,246 @@
 import datetime
-from typing import Dict
+import json
+import math
+import os
+import threading
+from typing import Dict, Optional
+
+import numpy as np
 import pandas as pd
 
+import feature_graph
 from artifacts import write_artifact
 
+WORKSPACE_ROOT = os.environ.get("ARCOS_WORKSPACE", "workspace")
+STATE_DIR = os.path.join(WORKSPACE_ROOT, "state", "features")
 
-def compute_features(ticker: str, df: pd.DataFrame) -> Dict:
-    df = df.copy()
-    df['return'] = df['Close'].pct_change()
-    df['sma_20'] = df['Close'].rolling(20).mean()
-    df['sma_50'] = df['Close'].rolling(50).mean()
-    df['volatility_20'] = df['return'].rolling(20).std()
-    df.dropna(inplace=True)
-
-    if df.empty:
-        features = {}
-    else:
-        latest = df.iloc[-1]
-        features = {
-            "momentum": float(latest['return']),
-            "trend_alignment": float((latest['sma_20'] - latest['sma_50']) / latest['sma_50']),
-            "volatility_regime": float(latest['volatility_20']),
+SMA_SHORT = 20
+SMA_LONG = 50
+VOL_WINDOW = 20
+RESYNC_EVERY = 1000  # Pushes between exact recomputes, to bound float drift
+
+_states: Dict[str, "FeatureState"] = {}
+_lock = threading.Lock()
+
+
+class RollingWindow:
+    """
+    Fixed-size ring buffer with a running mean and a sliding Welford M2,
+    so mean and sample variance (ddof=1) update in O(1) per value.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = np.zeros(size)
+        self.count = 0   # values held, up to size
+        self.head = 0    # slot the next value goes into
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.pushes = 0
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.size
+
+    def push(self, x: float) -> None:
+        if self.full:
+            self._swap(self.head, x)
+        else:
+            self.values[self.head] = x
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (x - self.mean)
+        self.head = (self.head + 1) % self.size
+        self.pushes += 1
+        if self.pushes % RESYNC_EVERY == 0:
+            self.resync()
+
+    def replace_last(self, x: float) -> None:
+        """Overwrites the newest value (a revised, still-forming bar)."""
+        if self.count:
+            self._swap((self.head - 1) % self.size, x)
+
+    def _swap(self, slot: int, x: float) -> None:
+        old = self.values[slot]
+        self.values[slot] = x
+        old_mean = self.mean
+        self.mean += (x - old) / self.count
+        self.m2 += (x - old) * (x - self.mean + old - old_mean)
+
+    def resync(self) -> None:
+        held = self.values if self.full else self.values[:self.count]
+        self.mean = float(held.mean()) if self.count else 0.0
+        self.m2 = float(((held - self.mean) ** 2).sum()) if self.count else 0.0
+
+    def std(self) -> float:
+        if self.count < 2:
+            return math.nan
+        return math.sqrt(max(self.m2, 0.0) / (self.count - 1))
+
+    def to_dict(self) -> Dict:
+        return {"size": self.size, "values": self.values.tolist(), "count": self.count,
+                "head": self.head, "mean": self.mean, "m2": self.m2, "pushes": self.pushes}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "RollingWindow":
+        window = cls(data["size"])
+        window.values = np.asarray(data["values"], dtype=np.float64)
+        window.count = data["count"]
+        window.head = data["head"]
+        window.mean = data["mean"]
+        window.m2 = data["m2"]
+        window.pushes = data["pushes"]
+        return window
+
+
+class FeatureState:
+    """Per-ticker rolling state: the last bar seen and the three windows."""
+
+    def __init__(self):
+        self.last_ts: Optional[int] = None
+        self.last_close: Optional[float] = None
+        self.prev_close: Optional[float] = None
+        self.sma_short = RollingWindow(SMA_SHORT)
+        self.sma_long = RollingWindow(SMA_LONG)
+        self.returns = RollingWindow(VOL_WINDOW)
+
+    def push(self, ts: int, close: float) -> None:
+        if self.last_close is not None:
+            self.returns.push(close / self.last_close - 1)
+        self.sma_short.push(close)
+        self.sma_long.push(close)
+        self.prev_close, self.last_close, self.last_ts = self.last_close, close, ts
+
+    def revise(self, close: float) -> None:
+        if self.prev_close is not None:
+            self.returns.replace_last(close / self.prev_close - 1)
+        self.sma_short.replace_last(close)
+        self.sma_long.replace_last(close)
+        self.last_close = close
+
+    def features(self) -> Dict:
+        if not (self.sma_long.full and self.returns.full):
+            return {}
+        return {
+            "momentum": float(self.last_close / self.prev_close - 1),
+            "trend_alignment": float((self.sma_short.mean - self.sma_long.mean) / self.sma_long.mean),
+            "volatility_regime": float(self.returns.std()),
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "last_ts": self.last_ts, "last_close": self.last_close, "prev_close": self.prev_close,
+            "sma_short": self.sma_short.to_dict(), "sma_long": self.sma_long.to_dict(),
+            "returns": self.returns.to_dict(),
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> "FeatureState":
+        state = cls()
+        state.last_ts = data["last_ts"]
+        state.last_close = data["last_close"]
+        state.prev_close = data["prev_close"]
+        state.sma_short = RollingWindow.from_dict(data["sma_short"])
+        state.sma_long = RollingWindow.from_dict(data["sma_long"])
+        state.returns = RollingWindow.from_dict(data["returns"])
+        return state
+
+
+def _state_path(ticker: str) -> str:
+    return os.path.join(STATE_DIR, f"{ticker.replace('/', '_')}.json")
+
+
+def load_state(ticker: str) -> Optional[FeatureState]:
+    try:
+        with open(_state_path(ticker), "r", encoding="utf-8") as f:
+            return FeatureState.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_state(ticker: str, state: FeatureState) -> None:
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = _state_path(ticker)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state.to_dict(), f)
+    os.replace(tmp, path)
+
+
+def _seed(stamps: np.ndarray, closes: np.ndarray) -> FeatureState:
+    # Only the last SMA_LONG + 1 closes reach any window
+    state = FeatureState()
+    start = max(0, len(closes) - (max(SMA_LONG, VOL_WINDOW) + 1))
+    for ts, close in zip(stamps[start:], closes[start:]):
+        state.push(int(ts), float(close))
+    return state
+
+
+def update_state(ticker: str, df: pd.DataFrame) -> FeatureState:
+    """
+    Advances the ticker's state to the last bar of `df`: new bars are pushed,
+    a revised last bar is overwritten. If `df` does not contain the bar the
+    state stopped at (gap, interval change, history rewritten), the state is
+    reseeded from the tail of `df`.
+    """
+    close = df['Close'].dropna()
+    stamps = close.index.asi8
+    closes = close.to_numpy(dtype=np.float64)
+
+    with _lock:
+        state = _states.get(ticker)
+    if state is None:
+        state = load_state(ticker)
+
+    resume = None
+    if state is not None and state.last_ts is not None:
+        pos = int(np.searchsorted(stamps, state.last_ts))
+        if pos < len(stamps) and stamps[pos] == state.last_ts:
+            resume = pos
+
+    changed = True
+    if resume is None:
+        state = _seed(stamps, closes)
+    else:
+        changed = closes[resume] != state.last_close or resume + 1 < len(closes)
+        if closes[resume] != state.last_close:
+            state.revise(float(closes[resume]))
+        for ts, value in zip(stamps[resume + 1:], closes[resume + 1:]):
+            state.push(int(ts), float(value))
+
+    with _lock:
+        _states[ticker] = state
+    if changed:
+        save_state(ticker, state)
+    return state
+
+
+def bulk_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Backtest mode: momentum, trend_alignment and volatility_regime for every
+    bar in one vectorized pass (NaN until the windows fill).
+    """
+    graph = feature_graph.features_for(df)
+    return pd.DataFrame({
+        "momentum": graph.column("return"),
+        "trend_alignment": graph.column("trend_alignment"),
+        "volatility_regime": graph.column("volatility_20"),
+    }, index=graph.index)
+
+
+def compute_features(ticker: str, df: pd.DataFrame) -> Dict:
+    features = update_state(ticker, df).features()
+
     payload = {
         "type": "FeatureStore",
         "ticker": ticker,
         "generated_at": datetime.datetime.utcnow().isoformat(),
         "features": features,
         "window": {
-            "sma_short": 20,
-            "sma_long": 50,
-            "vol_window": 20,
+            "sma_short": SMA_SHORT,
+            "sma_long": SMA_LONG,
+            "vol_window": VOL_WINDOW,
         },
     }
     path = write_artifact("features", payload, f"features_{ticker}")
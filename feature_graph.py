@@ -0,0 +1,171 @@
+"""
+Declarative derived columns shared by feature_engine, lstm_brain and the
+backtesting strategies. Each feature is declared once with the columns it
+reads; a FeatureFrame computes it at most once per bar set, on demand, as a
+vectorized pass over numpy arrays. The source DataFrame is never copied.
+
+Adding a feature:
+
+    @feature("sma_10", "Close")
+    def _sma_10(close):
+        return _rolling_mean(close, 10)
+"""
+import threading
+import weakref
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+_registry: Dict[str, Tuple[Tuple[str, ...], Callable]] = {}
+
+
+def feature(name: str, *inputs: str):
+    """Registers `fn(*input_arrays) -> array` as the derived column `name`."""
+    def register(fn):
+        _registry[name] = (inputs, fn)
+        return fn
+    return register
+
+
+def declared() -> List[str]:
+    return sorted(_registry)
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    return pd.Series(values, copy=False).rolling(window).mean().to_numpy()
+
+
+def _rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    return pd.Series(values, copy=False).rolling(window).std().to_numpy()
+
+
+# --- Declarations ---
+
+@feature("return", "Close")
+def _return(close):
+    return pd.Series(close, copy=False).pct_change().to_numpy()
+
+
+@feature("range", "High", "Low")
+def _range(high, low):
+    return high - low
+
+
+@feature("body", "Close", "Open")
+def _body(close, open_):
+    return close - open_
+
+
+@feature("sma_5", "Close")
+def _sma_5(close):
+    return _rolling_mean(close, 5)
+
+
+@feature("sma_20", "Close")
+def _sma_20(close):
+    return _rolling_mean(close, 20)
+
+
+@feature("sma_50", "Close")
+def _sma_50(close):
+    return _rolling_mean(close, 50)
+
+
+@feature("volatility_5", "return")
+def _volatility_5(returns):
+    return _rolling_std(returns, 5)
+
+
+@feature("volatility_20", "return")
+def _volatility_20(returns):
+    return _rolling_std(returns, 20)
+
+
+@feature("trend", "sma_5", "sma_20")
+def _trend(sma_5, sma_20):
+    # 1 while the short SMA is above the long one; 0 otherwise (and during warm-up)
+    return np.where(sma_5 > sma_20, 1.0, 0.0)
+
+
+@feature("trend_alignment", "sma_20", "sma_50")
+def _trend_alignment(sma_20, sma_50):
+    return (sma_20 - sma_50) / sma_50
+
+
+class FeatureFrame:
+    """
+    Lazily computed feature columns over one bar set. Base OHLCV columns are
+    read straight from the DataFrame; derived columns are memoized arrays.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = weakref.ref(df)  # the cache must not keep the bars alive
+        self.index = df.index
+        self._columns: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def column(self, name: str) -> np.ndarray:
+        cached = self._columns.get(name)
+        if cached is not None:
+            return cached
+        if name in _registry:
+            inputs, fn = _registry[name]
+            values = np.asarray(fn(*(self.column(i) for i in inputs)), dtype=np.float64)
+        else:
+            series = self._df()[name]
+            if isinstance(series, pd.DataFrame):  # yfinance MultiIndex columns
+                series = series.iloc[:, 0]
+            values = series.to_numpy(dtype=np.float64)
+        with self._lock:
+            self._columns.setdefault(name, values)
+        return self._columns[name]
+
+    def matrix(self, names: Sequence[str]) -> np.ndarray:
+        """(bars, len(names)) float64 array, one column per feature."""
+        return np.column_stack([self.column(name) for name in names])
+
+    def valid(self, names: Sequence[str]) -> np.ndarray:
+        """Rows where every named column is defined (past every warm-up)."""
+        mask = np.ones(len(self), dtype=bool)
+        for name in names:
+            mask &= ~np.isnan(self.column(name))
+        return mask
+
+    def frame(self, names: Sequence[str]) -> pd.DataFrame:
+        return pd.DataFrame({name: self.column(name) for name in names}, index=self.index)
+
+
+# One FeatureFrame per live DataFrame, dropped when the DataFrame is collected
+_frames: Dict[int, Tuple[Tuple, FeatureFrame]] = {}
+_frames_lock = threading.Lock()
+
+
+def _shape_key(df: pd.DataFrame) -> Tuple:
+    return (len(df), df.index[-1] if len(df) else None, tuple(map(str, df.columns)))
+
+
+def _forget(key: int) -> None:
+    with _frames_lock:
+        _frames.pop(key, None)
+
+
+def features_for(df: pd.DataFrame) -> FeatureFrame:
+    """
+    The shared FeatureFrame for `df`: every consumer handed the same
+    DataFrame during a visit reuses the columns already computed.
+    """
+    key = id(df)
+    shape = _shape_key(df)
+    with _frames_lock:
+        cached = _frames.get(key)
+        if cached is not None and cached[0] == shape and cached[1]._df() is df:
+            return cached[1]
+        frame = FeatureFrame(df)
+        if cached is None:
+            weakref.finalize(df, _forget, key)
+        _frames[key] = (shape, frame)
+    return frame
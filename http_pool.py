@@ -0,0 +1,162 @@
+"""
+Shared HTTP plumbing for the fetch stage: one keep-alive requests.Session per
+process, a concurrency limit per remote host, a thread pool that runs one
+ticker's independent fetches side by side, and circuit breakers for
+dependencies that are often down.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# --- CONFIGURATION ---
+FETCH_WORKERS = int(os.environ.get("ARCOS_FETCH_WORKERS", 16))
+DEFAULT_HOST_LIMIT = int(os.environ.get("ARCOS_HOST_LIMIT", 4))
+# Longest a fan-out waits for its slowest call before using that call's default
+FETCH_TIMEOUT = float(os.environ.get("ARCOS_FETCH_TIMEOUT", 45))
+# In-flight requests per host (matched by domain suffix); everything else gets DEFAULT_HOST_LIMIT
+HOST_LIMITS = {
+    "reddit.com": 2,              # rate-limits unauthenticated clients hard
+    "finance.yahoo.com": 4,       # query1/query2, shared with yfinance
+    "host.docker.internal": 2,    # Ollama on the GPU host
+}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_slots: Dict[str, threading.BoundedSemaphore] = {}
+_slots_lock = threading.Lock()
+_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="arcos-fetch")
+
+
+def session() -> requests.Session:
+    """The process-wide session; its connection pools keep sockets alive between cycles."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=FETCH_WORKERS)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _host_key(url_or_host: str) -> str:
+    host = urlsplit(url_or_host).hostname if "//" in url_or_host else url_or_host
+    host = (host or "").lower()
+    for suffix in HOST_LIMITS:
+        if host == suffix or host.endswith("." + suffix):
+            return suffix
+    return host
+
+
+@contextmanager
+def host_slot(url_or_host: str):
+    """Holds one of the host's concurrency slots for the duration of a request."""
+    key = _host_key(url_or_host)
+    with _slots_lock:
+        slot = _slots.get(key)
+        if slot is None:
+            slot = _slots[key] = threading.BoundedSemaphore(HOST_LIMITS.get(key, DEFAULT_HOST_LIMIT))
+    with slot:
+        yield
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    with host_slot(url):
+        return session().get(url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    with host_slot(url):
+        return session().post(url, **kwargs)
+
+
+class CircuitBreaker:
+    """
+    Fails fast on a dependency that keeps failing. After `failures`
+    consecutive failures the circuit opens and allow() is False for
+    `reset_after` seconds; then a single probe is let through (half-open).
+    A successful probe closes the circuit, a failed one reopens it with the
+    wait doubled, up to `max_reset_after`.
+    """
+
+    def __init__(self, name: str, failures: int = 3, reset_after: float = 30.0, max_reset_after: float = 600.0):
+        self.name = name
+        self.failures = failures
+        self.base_reset_after = reset_after
+        self.reset_after = reset_after
+        self.max_reset_after = max_reset_after
+        self.state = "closed"
+        self.consecutive = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_after:
+                self.state = "half_open"  # this caller is the probe
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                print(f"   ✅ [Breaker] {self.name} recovered, circuit closed")
+            self.state = "closed"
+            self.consecutive = 0
+            self.reset_after = self.base_reset_after
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive += 1
+            if self.state == "half_open":
+                self.reset_after = min(self.reset_after * 2, self.max_reset_after)
+            elif self.state != "closed" or self.consecutive < self.failures:
+                return
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            print(f"   ⚠️ [Breaker] {self.name} unavailable, failing fast for {self.reset_after:.0f}s")
+
+
+def fan_out(
+    calls: Dict[str, Callable[[], Any]],
+    defaults: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = FETCH_TIMEOUT,
+) -> Dict[str, Any]:
+    """
+    Runs every call concurrently on the shared fetch pool and returns their
+    results by name, so the caller waits for the slowest call rather than
+    the sum. A call that raises, or is still running after `timeout`
+    seconds, yields its entry in `defaults` (or None).
+
+    The calls must not fan out themselves: a call that blocks on more work
+    for this pool can deadlock it once every worker is waiting.
+    """
+    defaults = defaults or {}
+    futures = {name: _pool.submit(fn) for name, fn in calls.items()}
+    wait(futures.values(), timeout=timeout)
+    results = {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            print(f"   ⚠️ [Fetch] {name} timed out after {timeout:.0f}s")
+            metrics.incr("fetch_fallbacks_total", call=name)
+            results[name] = defaults.get(name)
+            continue
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            print(f"   ⚠️ [Fetch] {name} failed: {e}")
+            metrics.incr("fetch_fallbacks_total", call=name)
+            results[name] = defaults.get(name)
+    return results
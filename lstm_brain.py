@@ -1,8 +1,21 @@
+import time
+
 import torch
 import torch.nn as nn
 import numpy as np
+import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 
+import feature_graph
+import metrics
+from model_registry import ModelEntry, registry
+from sequence_windows import build_sequences, last_window
+
+FEATURE_COLUMNS = ['Close', 'Volume', 'range', 'body', 'sma_5']  # feature_graph names
+EPOCHS = 50           # Cold start: full training from random weights
+FINETUNE_EPOCHS = 10  # Warm start: only the windows that end on new candles
+FINETUNE_LR = 0.001
+
 class LSTMModel(nn.Module):
     def __init__(self, input_size=5, hidden_size=64, num_layers=2, output_size=1):
         super(LSTMModel, self).__init__()
@@ -28,63 +41,257 @@ class LSTMModel(nn.Module):
         out = self.fc(out[:, -1, :])
         return self.sigmoid(out)
 
-def train_and_predict(df, window_size=60):
+class MultiTickerLSTM(nn.Module):
     """
-    Trains a fresh LSTM on the fly using recent 15m candles.
-    Returns: Probability (0.0 - 1.0)
+    One LSTM shared by many tickers. A learned per-ticker embedding is fed
+    alongside every time step so the shared weights can still specialise.
     """
-    # 1. Prepare Data
-    # We use 5 features: Close, Volume, High-Low, Close-Open, SMA_5
-    df = df.copy()
-    df['Range'] = df['High'] - df['Low']
-    df['Body'] = df['Close'] - df['Open']
-    df['SMA_5'] = df['Close'].rolling(window=5).mean()
-    df.dropna(inplace=True)
-    
-    features = df[['Close', 'Volume', 'Range', 'Body', 'SMA_5']].values
-    
-    # Normalize (Crucial for Neural Nets)
-    scaler = MinMaxScaler()
-    features_scaled = scaler.fit_transform(features)
-    
-    # 2. Create Sequences (Sliding Window)
-    X, y = [], []
-    for i in range(window_size, len(features_scaled)-1):
-        X.append(features_scaled[i-window_size:i])
-        # Target: 1 if next Close is higher, else 0
-        is_higher = 1 if features_scaled[i+1][0] > features_scaled[i][0] else 0
-        y.append(is_higher)
-        
-    if len(X) < 10: return 0.5 # Not enough data
-    
-    X_train = torch.tensor(np.array(X), dtype=torch.float32)
-    y_train = torch.tensor(np.array(y), dtype=torch.float32).unsqueeze(1)
-    
-    # 3. Setup GPU (The 3090 Flex)
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model = LSTMModel(input_size=5).to(device)
+    def __init__(self, num_tickers, input_size=5, hidden_size=64, num_layers=2, embedding_dim=8):
+        super(MultiTickerLSTM, self).__init__()
+        self.hidden_size = hidden_size
+        self.num_layers = num_layers
+
+        self.embedding = nn.Embedding(num_tickers, embedding_dim)
+        self.lstm = nn.LSTM(input_size + embedding_dim, hidden_size, num_layers, batch_first=True)
+        self.fc = nn.Linear(hidden_size, 1)
+        self.sigmoid = nn.Sigmoid()
+
+    def forward(self, x, ticker_ids):
+        h0 = torch.zeros(self.num_layers, x.size(0), self.hidden_size).to(x.device)
+        c0 = torch.zeros(self.num_layers, x.size(0), self.hidden_size).to(x.device)
+
+        # Same embedding at every step of a ticker's window
+        emb = self.embedding(ticker_ids).unsqueeze(1).expand(-1, x.size(1), -1)
+        out, _ = self.lstm(torch.cat([x, emb], dim=2), (h0, c0))
+
+        out = self.fc(out[:, -1, :])
+        return self.sigmoid(out)
+
+def prepare_features(df):
+    """
+    The 5 LSTM inputs (Close, Volume, High-Low, Close-Open, SMA_5) from the
+    shared feature graph, past the SMA warm-up. Returns (features, index).
+    """
+    graph = feature_graph.features_for(df)
+    valid = graph.valid(FEATURE_COLUMNS)
+    return graph.matrix(FEATURE_COLUMNS)[valid], graph.index[valid]
+
+def _device():
+    # Setup GPU (The 3090 Flex)
+    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+def _fit(model, X_train, y_train, epochs, lr, ticker_ids=None):
+    device = _device()
+    model.to(device)
     X_train = X_train.to(device)
     y_train = y_train.to(device)
-    
-    # 4. Train (Fast Loop)
+    inputs = (X_train,) if ticker_ids is None else (X_train, ticker_ids.to(device))
+
     criterion = nn.BCELoss()
-    optimizer = torch.optim.Adam(model.parameters(), lr=0.01)
-    
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+
     model.train()
-    epochs = 50 # Fast training for real-time
-    for _ in range(epochs):
-        optimizer.zero_grad()
-        outputs = model(X_train)
-        loss = criterion(outputs, y_train)
-        loss.backward()
-        optimizer.step()
-        
-    # 5. Predict Next Candle
+    with metrics.span("lstm_train", batched=ticker_ids is not None):
+        for _ in range(epochs):
+            optimizer.zero_grad()
+            outputs = model(*inputs)
+            loss = criterion(outputs, y_train)
+            loss.backward()
+            optimizer.step()
+
+def _predict(model, features_scaled, window_size):
+    device = _device()
+    model.to(device)
     model.eval()
-    last_sequence = features_scaled[-window_size:]
-    last_tensor = torch.tensor(np.array([last_sequence]), dtype=torch.float32).to(device)
-    
+    last_tensor = last_window(features_scaled, window_size).to(device)
+
     with torch.no_grad():
-        prediction = model(last_tensor).item()
-        
-    return prediction
\ No newline at end of file
+        return model(last_tensor).item()
+
+def _bar_epochs(index):
+    return pd.DatetimeIndex(index).asi8 // 10**9
+
+def _fingerprint(df):
+    """Cheap identity for a bar set: newest bar time, row count and its OHLCV values."""
+    last = df[['Open', 'High', 'Low', 'Close', 'Volume']].iloc[-1].to_numpy(dtype=np.float64)
+    return f"{int(_bar_epochs(df.index[-1:])[0])}:{len(df)}:{last.tobytes().hex()}"
+
+def train_and_predict(df, window_size=60, ticker=None):
+    """
+    Predicts the next candle with an LSTM trained on recent 15m candles.
+    Without a ticker, trains a fresh model on the fly.
+    With a ticker, goes through the model registry:
+      - same bars as last time -> cached prediction, no torch work
+      - newest bar re-stated   -> forward pass only
+      - new bars arrived       -> fine-tune on the windows ending on them
+      - no usable model        -> full training, then checkpoint
+    Returns: Probability (0.0 - 1.0)
+    """
+    entry = registry.get(ticker, lambda: LSTMModel(input_size=5)) if ticker else None
+    fingerprint = _fingerprint(df) if ticker else None
+    if entry is not None and entry.fingerprint == fingerprint:
+        return entry.prediction
+
+    # 1. Prepare Data
+    features, index = prepare_features(df)
+    epochs = _bar_epochs(index)
+    if len(features) <= window_size: return 0.5 # Not enough data
+
+    warm = entry is not None and entry.last_bar in set(epochs.tolist())
+    if warm:
+        model, scaler = entry.model, entry.scaler
+        new_rows = int((epochs > entry.last_bar).sum())
+        if new_rows:
+            # Widen the learned min/max with the new candles only
+            scaler.partial_fit(features[-new_rows:])
+    else:
+        model = LSTMModel(input_size=5)
+        # Normalize (Crucial for Neural Nets)
+        scaler = MinMaxScaler()
+        scaler.fit(features)
+        new_rows = None
+    features_scaled = scaler.transform(features)
+
+    # 2. Create Sequences (Sliding Window)
+    X_train, y_train = build_sequences(features_scaled, window_size)
+    if len(X_train) < 10: return 0.5 # Not enough data
+
+    # 3. Train (Fast Loop)
+    trained = True
+    if not warm:
+        _fit(model, X_train, y_train, EPOCHS, lr=0.01)
+    elif new_rows:
+        # A window's label needs the candle after it, so each new bar
+        # completes exactly one more training pair.
+        recent = slice(-min(new_rows, len(X_train)), None)
+        _fit(model, X_train[recent], y_train[recent], FINETUNE_EPOCHS, lr=FINETUNE_LR)
+    else:
+        trained = False
+
+    # 4. Predict Next Candle
+    prediction = _predict(model, features_scaled, window_size)
+
+    if ticker:
+        # Every training run refreshes the frozen copy that score_latest() serves
+        registry.put(ticker, ModelEntry(
+            model=model,
+            scaler=scaler,
+            last_bar=int(epochs[-1]),
+            fingerprint=fingerprint,
+            prediction=prediction,
+            trained_at=time.time() if trained else entry.trained_at,
+        ), export=trained)
+
+    return prediction
+
+def score_latest(df, ticker, window_size=60):
+    """
+    Inference-only: runs the last `window_size` bars through the ticker's
+    exported TorchScript model. No gradients, no optimizer.
+    Returns None when there is no exported model yet or a retrain is due
+    (see model_registry.RETRAIN_EVERY_BARS / RETRAIN_INTERVAL), in which
+    case the caller should go through train_and_predict().
+    """
+    frozen = registry.frozen(ticker)
+    if frozen is None:
+        return None
+
+    features, index = prepare_features(df)
+    if len(features) < window_size:
+        return None
+    if frozen.retrain_due(_bar_epochs(index)):
+        return None
+
+    # Scaler fitted at training time; new extremes just land outside [0, 1]
+    features_scaled = frozen.scaler.transform(features[-window_size:])
+
+    with torch.inference_mode(), metrics.span("lstm_inference"):
+        return frozen.module(last_window(features_scaled, window_size)).item()
+
+
+# Shared model for batched scans; reused while the watchlist stays within its vocabulary.
+_batch_state = {"model": None, "vocab": {}, "fingerprints": {}, "last_bars": {}, "predictions": {}}
+
+def train_and_predict_batch(frames, window_size=60):
+    """
+    Trains one MultiTickerLSTM over every ticker's windows at once, so each
+    epoch is a single forward/backward pass over the whole watchlist, then
+    scores every ticker's latest window in one more pass.
+    Returns: {ticker: probability (0.0 - 1.0)}
+    """
+    predictions = {ticker: 0.5 for ticker in frames}  # Not enough data -> neutral
+
+    fingerprints = {ticker: _fingerprint(df) for ticker, df in frames.items() if not df.empty}
+    state = _batch_state
+    if state["model"] is not None and fingerprints and all(
+        state["fingerprints"].get(ticker) == fp for ticker, fp in fingerprints.items()
+    ):
+        predictions.update({t: state["predictions"][t] for t in fingerprints if t in state["predictions"]})
+        return predictions
+
+    # 1. Per-ticker features, scaling and windows
+    scaled, windows, last_bars = {}, {}, {}
+    for ticker, df in frames.items():
+        if df.empty:
+            continue
+        features, index = prepare_features(df)
+        if len(features) <= window_size:
+            continue
+        features_scaled = MinMaxScaler().fit_transform(features)
+        X, y = build_sequences(features_scaled, window_size)
+        if len(X) < 10:
+            continue
+        scaled[ticker] = features_scaled
+        windows[ticker] = (X, y, _bar_epochs(index))
+        last_bars[ticker] = int(windows[ticker][2][-1])
+
+    tickers = list(scaled)
+    if not tickers:
+        return predictions
+
+    # 2. Reuse the shared model if it already knows every ticker
+    warm = state["model"] is not None and all(t in state["vocab"] for t in tickers)
+    if warm:
+        model, vocab = state["model"], state["vocab"]
+    else:
+        vocab = {ticker: i for i, ticker in enumerate(sorted(tickers))}
+        model = MultiTickerLSTM(num_tickers=len(vocab), input_size=5)
+
+    # Warm: only the windows completed by candles the model hasn't seen yet
+    X_parts, y_parts, id_parts = [], [], []
+    for ticker in tickers:
+        X, y, epochs = windows[ticker]
+        if warm:
+            previous = state["last_bars"].get(ticker)
+            new_rows = int((epochs > previous).sum()) if previous in set(epochs.tolist()) else len(X)
+            X, y = X[len(X) - min(new_rows, len(X)):], y[len(y) - min(new_rows, len(y)):]
+        if len(X):
+            X_parts.append(X)
+            y_parts.append(y)
+            id_parts.append(torch.full((len(X),), vocab[ticker], dtype=torch.long))
+
+    # 3. Train every ticker together
+    if X_parts:
+        X_train, y_train, ticker_ids = torch.cat(X_parts), torch.cat(y_parts), torch.cat(id_parts)
+        if warm:
+            _fit(model, X_train, y_train, FINETUNE_EPOCHS, lr=FINETUNE_LR, ticker_ids=ticker_ids)
+        else:
+            _fit(model, X_train, y_train, EPOCHS, lr=0.01, ticker_ids=ticker_ids)
+
+    # 4. Predict every ticker's next candle in one pass
+    device = _device()
+    model.eval()
+    last = torch.cat([last_window(scaled[t], window_size) for t in tickers]).to(device)
+    ids = torch.tensor([vocab[t] for t in tickers], dtype=torch.long, device=device)
+    with torch.no_grad():
+        probs = model(last, ids).squeeze(1).tolist()
+    predictions.update(dict(zip(tickers, probs)))
+
+    state.update(
+        model=model,
+        vocab=vocab,
+        fingerprints=fingerprints,
+        last_bars=last_bars,
+        predictions={t: predictions[t] for t in tickers},
+    )
+    return predictions
@@ -0,0 +1,143 @@
+"""
+Process-wide stage timings and counters, served in the Prometheus text format
+by the agent's health-check server (GET /metrics).
+
+    with metrics.span("ollama"):
+        ...
+    metrics.incr("vault_writes_total", len(batch))
+
+A span is two perf_counter() calls plus one locked bucket increment, well
+under the cost of anything worth timing. Modules that already keep their own
+counters expose them with register(collector) instead of double counting.
+"""
+import bisect
+import functools
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+PREFIX = "arcos_"
+# Upper bounds in seconds, from SQLite commits to LSTM training
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_lock = threading.Lock()
+_histograms: Dict[Key, List] = {}   # key -> [bucket counts..., +Inf count, sum]
+_counters: Dict[Key, float] = {}
+_collectors: List[Callable[[], Iterable[Tuple[str, Dict, float]]]] = []
+
+
+def _key(name: str, labels: Dict) -> Key:
+    return (name, tuple(sorted((k, str(v)) for k, v in labels.items())) if labels else ())
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    _observe(_key(name, labels), seconds)
+
+
+def _observe(key: Key, seconds: float) -> None:
+    slot = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        hist[slot] += 1
+        hist[-1] += seconds
+
+
+def incr(name: str, n: float = 1, **labels) -> None:
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + n
+
+
+class span:
+    """Times a block into the stage_seconds histogram; an exception also counts a stage error."""
+    __slots__ = ("key", "start")
+
+    def __init__(self, stage: str, **labels):
+        labels["stage"] = stage
+        self.key = _key("stage_seconds", labels)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _observe(self.key, time.perf_counter() - self.start)
+        if exc_type is not None:
+            incr("stage_errors_total", stage=dict(self.key[1])["stage"])
+        return False
+
+
+def timed(stage: str):
+    """Decorator form of span()."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def register(collector: Callable[[], Iterable[Tuple[str, Dict, float]]]) -> None:
+    """
+    Adds a callable yielding (name, labels, value) at scrape time. Names
+    ending in _total are exposed as counters, the rest as gauges.
+    """
+    _collectors.append(collector)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _series(name: str, labels: Tuple, extra: Tuple = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return PREFIX + name
+    return PREFIX + name + "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        histograms = {key: list(values) for key, values in _histograms.items()}
+        counters = dict(_counters)
+    gauges: Dict[Key, float] = {}
+    for collector in list(_collectors):
+        try:
+            for name, labels, value in collector():
+                if name.endswith("_total"):
+                    counters[_key(name, labels)] = value
+                else:
+                    gauges[_key(name, labels)] = value
+        except Exception as e:
+            print(f"   ⚠️ [Metrics] Collector failed: {e}")
+
+    lines = []
+    typed = set()
+
+    def declare(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+    for (name, labels), values in sorted(histograms.items()):
+        declare(name, "histogram")
+        cumulative = 0
+        for bound, count in zip(BUCKETS + (float("inf"),), values[:-1]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{_series(name + '_bucket', labels, (('le', le),))} {cumulative}")
+        lines.append(f"{_series(name + '_sum', labels)} {values[-1]:.6f}")
+        lines.append(f"{_series(name + '_count', labels)} {cumulative}")
+    for (name, labels), value in sorted(counters.items()):
+        declare(name, "counter")
+        lines.append(f"{_series(name, labels)} {value:g}")
+    for (name, labels), value in sorted(gauges.items()):
+        declare(name, "gauge")
+        lines.append(f"{_series(name, labels)} {value:g}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,201 @@
+import copy
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import torch
+from sklearn.preprocessing import MinMaxScaler
+
+WORKSPACE_ROOT = os.environ.get("ARCOS_WORKSPACE", "workspace")
+MODEL_DIR = os.path.join(WORKSPACE_ROOT, "models")
+MAX_RESIDENT_MODELS = int(os.environ.get("ARCOS_MAX_RESIDENT_MODELS", 32))
+RETRAIN_EVERY_BARS = int(os.environ.get("ARCOS_RETRAIN_EVERY_BARS", 16))   # 16 x 15m = 4 hours
+RETRAIN_INTERVAL = float(os.environ.get("ARCOS_RETRAIN_INTERVAL", 86400))  # Nightly at the latest
+
+
+class ModelEntry:
+    """One ticker's trained LSTM, its fitted scaler, and what it last saw."""
+
+    def __init__(self, model, scaler, last_bar, fingerprint, prediction, trained_at=None):
+        self.model = model
+        self.scaler = scaler
+        self.last_bar = last_bar          # epoch seconds of the newest bar trained on
+        self.fingerprint = fingerprint    # identifies the exact bar set behind `prediction`
+        self.prediction = prediction
+        self.trained_at = trained_at if trained_at is not None else time.time()
+
+
+class FrozenModel:
+    """An exported, inference-only TorchScript model plus what it needs to score."""
+
+    def __init__(self, module, scaler, last_bar, trained_at):
+        self.module = module
+        self.scaler = scaler
+        self.last_bar = last_bar
+        self.trained_at = trained_at
+
+    def retrain_due(self, bar_epochs) -> bool:
+        """True after RETRAIN_EVERY_BARS new bars, RETRAIN_INTERVAL seconds, or a gap in the bars."""
+        if time.time() - self.trained_at > RETRAIN_INTERVAL:
+            return True
+        if self.last_bar not in set(bar_epochs.tolist()):
+            return True
+        return int((bar_epochs > self.last_bar).sum()) >= RETRAIN_EVERY_BARS
+
+
+def _safe_name(ticker: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", ticker)
+
+
+def _scaler_state(scaler: MinMaxScaler) -> dict:
+    return {
+        "data_min": scaler.data_min_.tolist(),
+        "data_max": scaler.data_max_.tolist(),
+    }
+
+
+def _restore_scaler(state: dict) -> MinMaxScaler:
+    # Fitting on the two bounding rows reproduces min_/scale_ exactly and
+    # keeps partial_fit working for later updates.
+    scaler = MinMaxScaler()
+    scaler.fit(np.array([state["data_min"], state["data_max"]]))
+    return scaler
+
+
+class ModelRegistry:
+    """
+    Keeps per-ticker models warm.
+    The most recently used models stay in memory (LRU, bounded); every model
+    is also checkpointed to MODEL_DIR so an evicted or restarted ticker picks
+    up its weights and scaler instead of training from scratch.
+    """
+
+    def __init__(self, model_dir: str = MODEL_DIR, capacity: int = MAX_RESIDENT_MODELS):
+        self.model_dir = model_dir
+        self.capacity = capacity
+        self._entries: "OrderedDict[str, ModelEntry]" = OrderedDict()
+        self._frozen: "OrderedDict[str, FrozenModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.model_dir, f"{_safe_name(ticker)}.pt")
+
+    def _export_path(self, ticker: str) -> str:
+        return os.path.join(self.model_dir, f"{_safe_name(ticker)}.ts")
+
+    def get(self, ticker: str, build_model) -> Optional[ModelEntry]:
+        """Returns the ticker's entry from memory or disk; `build_model()` makes an empty model to load into."""
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is not None:
+                self._entries.move_to_end(ticker)
+                return entry
+
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        try:
+            checkpoint = torch.load(path, map_location="cpu")
+            model = build_model()
+            model.load_state_dict(checkpoint["state_dict"])
+            entry = ModelEntry(
+                model=model,
+                scaler=_restore_scaler(checkpoint["scaler"]),
+                last_bar=checkpoint["last_bar"],
+                fingerprint=checkpoint["fingerprint"],
+                prediction=checkpoint["prediction"],
+                trained_at=checkpoint.get("trained_at", 0.0),
+            )
+        except Exception as e:
+            print(f"   ⚠️ [Registry] Could not load model for {ticker}: {e}")
+            return None
+
+        self._remember(ticker, entry)
+        return entry
+
+    def put(self, ticker: str, entry: ModelEntry, export: bool = False) -> None:
+        """Checkpoints the entry; with export=True also writes the frozen inference model."""
+        os.makedirs(self.model_dir, exist_ok=True)
+        checkpoint = {
+            "state_dict": {k: v.detach().cpu() for k, v in entry.model.state_dict().items()},
+            "scaler": _scaler_state(entry.scaler),
+            "last_bar": entry.last_bar,
+            "fingerprint": entry.fingerprint,
+            "prediction": entry.prediction,
+            "trained_at": entry.trained_at,
+        }
+        path = self._path(ticker)
+        tmp_path = f"{path}.tmp"
+        torch.save(checkpoint, tmp_path)
+        os.replace(tmp_path, path)
+        self._remember(ticker, entry)
+        if export:
+            self._export(ticker, entry)
+
+    def _export(self, ticker: str, entry: ModelEntry) -> None:
+        meta = {
+            "scaler": _scaler_state(entry.scaler),
+            "last_bar": entry.last_bar,
+            "trained_at": entry.trained_at,
+        }
+        # Script a copy: freezing inlines the weights, and the live model keeps fine-tuning.
+        model = copy.deepcopy(entry.model).cpu().eval()
+        module = torch.jit.freeze(torch.jit.script(model))
+        path = self._export_path(ticker)
+        tmp_path = f"{path}.tmp"
+        torch.jit.save(module, tmp_path, _extra_files={"meta.json": json.dumps(meta)})
+        os.replace(tmp_path, path)
+        self._remember_frozen(ticker, FrozenModel(
+            module, _restore_scaler(meta["scaler"]), meta["last_bar"], meta["trained_at"]
+        ))
+
+    def frozen(self, ticker: str) -> Optional[FrozenModel]:
+        """The ticker's exported inference model, from memory or disk; None if never exported."""
+        with self._lock:
+            frozen = self._frozen.get(ticker)
+            if frozen is not None:
+                self._frozen.move_to_end(ticker)
+                return frozen
+
+        path = self._export_path(ticker)
+        if not os.path.exists(path):
+            return None
+        try:
+            extra = {"meta.json": ""}
+            module = torch.jit.load(path, map_location="cpu", _extra_files=extra)
+            meta = json.loads(extra["meta.json"])
+            frozen = FrozenModel(
+                module, _restore_scaler(meta["scaler"]), meta["last_bar"], meta["trained_at"]
+            )
+        except Exception as e:
+            print(f"   ⚠️ [Registry] Could not load exported model for {ticker}: {e}")
+            return None
+
+        self._remember_frozen(ticker, frozen)
+        return frozen
+
+    def _remember_frozen(self, ticker: str, frozen: FrozenModel) -> None:
+        with self._lock:
+            self._frozen[ticker] = frozen
+            self._frozen.move_to_end(ticker)
+            while len(self._frozen) > self.capacity:
+                self._frozen.popitem(last=False)
+
+    def _remember(self, ticker: str, entry: ModelEntry) -> None:
+        with self._lock:
+            self._entries[ticker] = entry
+            self._entries.move_to_end(ticker)
+            while len(self._entries) > self.capacity:
+                # Already checkpointed in put(), so dropping it only costs a reload.
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+registry = ModelRegistry()
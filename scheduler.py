@@ -0,0 +1,184 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import metrics
+
+# --- CONFIGURATION ---
+DEFAULT_IO_WORKERS = 8        # yfinance / Reddit / Ollama calls spend their time waiting
+DEFAULT_CPU_WORKERS = 1       # LSTM training already saturates the cores through torch
+DEFAULT_REVISIT_DEADLINE = 300.0
+
+
+class ScanScheduler:
+    """
+    Covers the whole watchlist on every cycle.
+    I/O-bound stages fan out over one bounded pool, CPU-bound stages run on a
+    separate pool so a slow network call never holds up the model and vice versa.
+    Tickers are visited most-overdue first, so anything missed by one cycle is
+    at the front of the queue for the next.
+    """
+
+    def __init__(
+        self,
+        io_stage: Callable[[str], Optional[Any]],
+        cpu_stage: Callable[[str, Any], Any],
+        io_workers: int = DEFAULT_IO_WORKERS,
+        cpu_workers: int = DEFAULT_CPU_WORKERS,
+        revisit_deadline: float = DEFAULT_REVISIT_DEADLINE,
+    ):
+        self.io_stage = io_stage
+        self.cpu_stage = cpu_stage
+        self.revisit_deadline = revisit_deadline
+        self.io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="arcos-io")
+        self.cpu_pool = ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix="arcos-cpu")
+        self.last_visit: Dict[str, float] = {}
+        # Stages still running when a cycle's deadline hit: future -> (ticker, "io" | "cpu").
+        # The next cycle waits on them instead of starting a second pipeline for the ticker.
+        self.in_flight: Dict[Future, Tuple[str, str]] = {}
+        self._started: Dict[str, float] = {}
+
+    def order(self, tickers: List[str]) -> List[str]:
+        """Never-visited tickers first, then oldest visit first."""
+        unique = list(dict.fromkeys(tickers))
+        return sorted(unique, key=lambda t: self.last_visit.get(t, 0.0))
+
+    def overdue(self, tickers: List[str], now: Optional[float] = None) -> List[str]:
+        now = time.monotonic() if now is None else now
+        return [
+            t for t in tickers
+            if t in self.last_visit and now - self.last_visit[t] > self.revisit_deadline
+        ]
+
+    def run_cycle(
+        self,
+        tickers: List[str],
+        on_result: Optional[Callable[[str, Any], None]] = None,
+    ) -> Dict:
+        """
+        Runs one pipeline per ticker and blocks until all of them finish or the
+        revisit deadline expires. `on_result` is called on the calling thread
+        as each ticker completes, so callers can keep their state unlocked.
+        A ticker whose pipeline from an earlier cycle is still running is not
+        started again; that pipeline is finished in this cycle instead.
+        Returns a coverage/latency report for the cycle.
+        """
+        ordered = self.order(tickers)
+        cycle_start = time.monotonic()
+        deadline = cycle_start + self.revisit_deadline
+
+        started = self._started
+        latencies: Dict[str, float] = {}
+        skipped: List[str] = []
+        failed: List[str] = []
+
+        def timed_io(ticker):
+            started[ticker] = time.monotonic()
+            return self.io_stage(ticker)
+
+        carried, self.in_flight = self.in_flight, {}
+        io_futures = {f: t for f, (t, stage) in carried.items() if stage == "io"}
+        cpu_futures = {f: t for f, (t, stage) in carried.items() if stage == "cpu"}
+        busy = {t for t, _ in carried.values()}
+        for t in ordered:
+            if t not in busy:
+                io_futures[self.io_pool.submit(timed_io, t)] = t
+        pending = set(io_futures) | set(cpu_futures)
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                ticker = io_futures.get(future) or cpu_futures.get(future)
+                handed_off = False
+                try:
+                    if future in io_futures:
+                        inputs = future.result()
+                        if inputs is None:
+                            skipped.append(ticker)
+                            self._mark_visited(ticker, started, latencies)
+                            continue
+                        cpu_future = self.cpu_pool.submit(self.cpu_stage, ticker, inputs)
+                        cpu_futures[cpu_future] = ticker
+                        pending.add(cpu_future)
+                        handed_off = True
+                    else:
+                        outcome = future.result()
+                        self._mark_visited(ticker, started, latencies)
+                        if on_result is not None:
+                            try:
+                                on_result(ticker, outcome)
+                            except Exception as e:
+                                print(f"   ❌ [Scheduler] Result handler failed for {ticker}: {e}")
+                except Exception as e:
+                    stage = "fetch" if future in io_futures else "analysis"
+                    print(f"   ⚠️ [Scheduler] {ticker} {stage} stage failed: {e}")
+                    failed.append(ticker)
+                finally:
+                    # Whatever happened, this ticker's pipeline is over unless it
+                    # moved on to the CPU stage (carried-over stages included)
+                    if not handed_off:
+                        started.pop(ticker, None)
+
+        # Anything still queued is dropped; it will be first in line next cycle.
+        # A stage already running cannot be stopped: it carries over, and its
+        # ticker is not started again until it finishes.
+        missed, running = [], []
+        for future in pending:
+            ticker = io_futures.get(future) or cpu_futures.get(future)
+            if future.cancel():
+                missed.append(ticker)
+                started.pop(ticker, None)
+            else:
+                self.in_flight[future] = (ticker, "io" if future in io_futures else "cpu")
+                running.append(ticker)
+
+        for outcome, tickers in (("skipped", skipped), ("failed", failed), ("missed", missed),
+                                 ("carried_over", running)):
+            if tickers:
+                metrics.incr("visits_total", len(tickers), outcome=outcome)
+        metrics.incr("visits_total", len(latencies) - len(skipped), outcome="analyzed")
+        return self._report(ordered, cycle_start, latencies, skipped, failed, missed, running)
+
+    def shutdown(self) -> None:
+        self.io_pool.shutdown(wait=False, cancel_futures=True)
+        self.cpu_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _mark_visited(self, ticker, started, latencies) -> None:
+        now = time.monotonic()
+        self.last_visit[ticker] = now
+        latencies[ticker] = now - started.pop(ticker, now)
+        metrics.observe("visit_seconds", latencies[ticker])
+
+    def _report(self, ordered, cycle_start, latencies, skipped, failed, missed, running) -> Dict:
+        duration = time.monotonic() - cycle_start
+        values = sorted(latencies.values())
+        total = len(ordered)
+        return {
+            "tickers": total,
+            "visited": len(latencies),
+            "skipped": len(skipped),
+            "failed": sorted(failed),
+            "missed": sorted(missed),
+            "running": sorted(running),
+            "coverage": (len(latencies) / total) if total else 1.0,
+            "duration": duration,
+            "latency_p50": values[len(values) // 2] if values else 0.0,
+            "latency_p95": values[min(len(values) - 1, int(len(values) * 0.95))] if values else 0.0,
+            "latency_max": values[-1] if values else 0.0,
+            "overdue": self.overdue(ordered),
+        }
+
+
+def format_cycle_report(report: Dict) -> str:
+    return (
+        f"   ⏱️ [Scheduler] Cycle: {report['visited']}/{report['tickers']} covered "
+        f"({report['coverage']:.0%}) in {report['duration']:.1f}s | "
+        f"p50 {report['latency_p50']:.1f}s | p95 {report['latency_p95']:.1f}s | "
+        f"max {report['latency_max']:.1f}s | "
+        f"{len(report['missed'])} missed | {len(report['running'])} still running | "
+        f"{len(report['overdue'])} overdue"
+    )
@@ -0,0 +1,85 @@
+import time
+
+import numpy as np
+import torch
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def sliding_windows(features, window_size):
+    """
+    All `window_size`-bar windows of a (bars, features) array as one strided view:
+    shape (bars - window_size + 1, window_size, features), no data copied.
+    """
+    features = np.ascontiguousarray(features, dtype=np.float32)
+    # writeable=True only so torch.from_numpy accepts the view; nothing writes to it.
+    windows = sliding_window_view(features, window_size, axis=0, writeable=True)
+    return windows.transpose(0, 2, 1)
+
+
+def next_close_labels(features, window_size, column=0):
+    """
+    Label for window i (bars [i, i+window_size)): 1.0 where bar i+window_size+1
+    closes above bar i+window_size. The bar right after the window is the
+    reference, as in the original per-window loop the LSTM was trained with.
+    """
+    close = np.asarray(features)[:, column]
+    return (close[window_size + 1:] > close[window_size:-1]).astype(np.float32)
+
+
+def build_sequences(features_scaled, window_size):
+    """
+    Training pairs for the sequence models: window i covers bars [i, i+window_size)
+    and is labelled by whether bar i+window_size+1 closes above bar i+window_size.
+    Returns (X, y) tensors that share memory with the numpy windows.
+    """
+    n_pairs = max(0, len(features_scaled) - window_size - 1)
+    if n_pairs == 0:
+        n_features = np.shape(features_scaled)[1] if np.ndim(features_scaled) == 2 else 0
+        return torch.empty((0, window_size, n_features)), torch.empty((0, 1))
+
+    X = sliding_windows(features_scaled, window_size)[:n_pairs]
+    y = next_close_labels(features_scaled, window_size)
+    return torch.from_numpy(X), torch.from_numpy(y).unsqueeze(1)
+
+
+def last_window(features_scaled, window_size):
+    """The most recent window as a (1, window_size, features) tensor, ready for inference."""
+    window = np.ascontiguousarray(features_scaled[-window_size:], dtype=np.float32)
+    return torch.from_numpy(window).unsqueeze(0)
+
+
+def _build_sequences_loop(features_scaled, window_size):
+    """The original list-append builder, kept for the benchmark below."""
+    X, y = [], []
+    for i in range(window_size, len(features_scaled)-1):
+        X.append(features_scaled[i-window_size:i])
+        is_higher = 1 if features_scaled[i+1][0] > features_scaled[i][0] else 0
+        y.append(is_higher)
+    X_train = torch.tensor(np.array(X), dtype=torch.float32)
+    y_train = torch.tensor(np.array(y), dtype=torch.float32).unsqueeze(1)
+    return X_train, y_train
+
+
+def _best_of(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    print("Sequence builder benchmark (window=60, 5 features)")
+    print(f"{'bars':>8} {'loop':>12} {'strided':>12} {'speedup':>9}")
+    rng = np.random.default_rng(0)
+    for bars in (200, 2_000, 20_000):
+        data = rng.random((bars, 5))
+        X_loop, y_loop = _build_sequences_loop(data, 60)
+        X_fast, y_fast = build_sequences(data, 60)
+        assert torch.equal(X_loop, X_fast) and torch.equal(y_loop, y_fast)
+
+        repeats = 20 if bars < 20_000 else 5
+        loop_time = _best_of(lambda: _build_sequences_loop(data, 60), repeats)
+        fast_time = _best_of(lambda: build_sequences(data, 60), repeats)
+        print(f"{bars:>8} {loop_time * 1000:>10.2f}ms {fast_time * 1000:>10.3f}ms {loop_time / fast_time:>8.0f}x")
@@ -1,29 +1,42 @@
-from functools import lru_cache
-
 import pandas as pd
-import yfinance as yf
 
+import calibrator
+import data_fetcher
 import lstm_brain  # <--- NEW IMPORT
 
+# Cutoffs on the fused LSTM + sentiment probability. The backtesting sweeps
+# score LogisticTrendStrategy, not this fusion, so they cannot tune these.
+BUY_THRESHOLD = 0.70
+SELL_THRESHOLD = 0.30
+
 
-@lru_cache(maxsize=128)
-def get_asset_name(ticker):
+def score_price(ticker, df):
+    """
+    Scoring entry point: the LSTM's probability from the ticker's exported
+    model, without any training. None if no model is exported or a retrain is due.
+    """
     try:
-        return yf.Ticker(ticker).info.get("longName", ticker)
-    except Exception:
-        return ticker
+        return lstm_brain.score_latest(df, ticker)
+    except Exception as e:
+        print(f"   ⚠️ [Brain] Inference Error: {e}")
+        return None
 
 
-def run_simulation(ticker, df, sentiment_score):
+def run_simulation(ticker, df, sentiment_score, price_prob=None):
     """
     Hybrid Decision Engine: LSTM (Price Patterns) + LLM (Sentiment)
+    `price_prob` can be passed in when a batched scan already scored the ticker.
     """
     # 1. Ask the LSTM Brain (0.0 to 1.0)
-    try:
-        price_prob = lstm_brain.train_and_predict(df)
-    except Exception as e:
-        print(f"   ⚠️ [Brain] LSTM Error: {e}")
-        price_prob = 0.5
+    # Cheap frozen-model inference on every visit; training only when it is due.
+    if price_prob is None:
+        price_prob = score_price(ticker, df)
+    if price_prob is None:
+        try:
+            price_prob = lstm_brain.train_and_predict(df, ticker=ticker)
+        except Exception as e:
+            print(f"   ⚠️ [Brain] LSTM Error: {e}")
+            price_prob = 0.5
 
     # 2. Fuse with Sentiment
     # Sentiment (-1 to 1) shifts probability by up to 20%
@@ -37,18 +50,21 @@ def run_simulation(ticker, df, sentiment_score):
         f"adjusted it to {final_prob:.2f} (clamped)."
     )
 
-    if final_prob > 0.70:  # Higher threshold for LSTM
+    if final_prob > BUY_THRESHOLD:  # Higher threshold for LSTM
         signal = "BUY_CANDIDATE"
-    elif final_prob < 0.30:
+    elif final_prob < SELL_THRESHOLD:
         signal = "SELL_AVOID"
 
+    # Realized hit rate of past matured decisions, for the Maestro's validity gate
+    win_rate, sample_size = calibrator.track_record(ticker, signal)
+
     return {
         "ticker": ticker,
         "signal": signal,
-        "asset_name": get_asset_name(ticker),
+        "asset_name": data_fetcher.get_asset_name(ticker),
         "prob": final_prob,
-        "win_rate": max(0.0, min(1.0, final_prob)),
+        "win_rate": win_rate,
         "uncertainty": 0.0,
-        "sample_size": len(df),
+        "sample_size": sample_size,
         "rationale": rationale,
     }
@@ -0,0 +1,200 @@
+"""
+Signal transport between the agent and the Maestro: a Redis Stream read
+through a consumer group. Every entry stays pending until a consumer XACKs
+it, so a Maestro that dies mid-signal has it redelivered instead of lost,
+and several Maestros can share one group.
+
+The Maestro (src/main.rs) is the production consumer; read_group / ack /
+claim_stale mirror it for tooling and for tests against fakeredis.
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+STREAM = os.environ.get("ARCOS_SIGNAL_STREAM", "arcos:signals")
+GROUP = os.environ.get("ARCOS_SIGNAL_GROUP", "maestro")
+STREAM_MAXLEN = int(os.environ.get("ARCOS_SIGNAL_STREAM_MAXLEN", 100000))  # approximate trim
+CLAIM_IDLE_MS = 60000  # pending this long: its consumer is presumed dead
+BUFFER_MAX_SIZE = int(os.environ.get("ARCOS_SIGNAL_BATCH_MAX", 50))
+BUFFER_MAX_DELAY = float(os.environ.get("ARCOS_SIGNAL_BATCH_WINDOW", 2.0))  # seconds a signal may wait
+
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_ulid_lock = threading.Lock()
+_ulid_last = (0, 0)  # (milliseconds, randomness) of the previous id
+
+
+def ulid() -> str:
+    """
+    26-character ULID: 48-bit millisecond timestamp plus 80 random bits.
+    Ids from one process sort in creation order; within a millisecond the
+    random part is incremented, so they never repeat.
+    """
+    global _ulid_last
+    with _ulid_lock:
+        ms = int(time.time() * 1000)
+        last_ms, last_rand = _ulid_last
+        if ms <= last_ms:
+            ms, rand = last_ms, last_rand + 1
+            if rand >> 80:  # randomness exhausted: borrow the next millisecond
+                ms, rand = ms + 1, int.from_bytes(os.urandom(10), "big")
+        else:
+            rand = int.from_bytes(os.urandom(10), "big")
+        _ulid_last = (ms, rand)
+    value = (ms << 80) | rand
+    return "".join(_CROCKFORD[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+
+def ensure_group(client) -> None:
+    """Creates the consumer group (at the start of the stream) if it is missing."""
+    try:
+        client.xgroup_create(STREAM, GROUP, id="0", mkstream=True)
+    except Exception as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def publish(client, payloads: List[Dict]) -> List[str]:
+    """XADDs every payload in one pipelined round trip; returns the entry ids."""
+    if not payloads:
+        return []
+    pipe = client.pipeline(transaction=False)
+    for payload in payloads:
+        pipe.xadd(STREAM, {"payload": json.dumps(payload)}, maxlen=STREAM_MAXLEN, approximate=True)
+    return pipe.execute()
+
+
+class SignalBuffer:
+    """
+    Outbound signals held briefly and published in one pipelined round trip.
+    A newer signal of the same type for the same ticker replaces the pending
+    one. The buffer flushes when it holds `max_size` signals, when its oldest
+    signal has waited `max_delay` seconds (background thread), or on flush().
+    A batch that fails to publish goes back into the buffer, behind any newer
+    signal for the same key, and is retried by the timer.
+    """
+
+    def __init__(self, client, max_size: int = BUFFER_MAX_SIZE, max_delay: float = BUFFER_MAX_DELAY):
+        self.client = client
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._pending: Dict[Tuple[str, str], Dict] = {}
+        self._oldest: Optional[float] = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self.counts = {"added": 0, "coalesced": 0, "published": 0, "round_trips": 0, "errors": 0,
+                       "requeued": 0}
+        threading.Thread(target=self._run, name="arcos-signal-flush", daemon=True).start()
+
+    @staticmethod
+    def _key(payload: Dict) -> Tuple[str, str]:
+        body = payload.get("body", {})
+        return body.get("ticker"), body.get("signal")
+
+    def add(self, payload: Dict) -> None:
+        key = self._key(payload)
+        with self._cond:
+            self.counts["added"] += 1
+            if key in self._pending:
+                self.counts["coalesced"] += 1
+            self._pending[key] = payload
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            full = len(self._pending) >= self.max_size
+            self._cond.notify()
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Publishes everything pending; returns how many signals went out."""
+        with self._flush_lock:
+            with self._cond:
+                batch = list(self._pending.values())
+                self._pending.clear()
+                self._oldest = None
+            if not batch:
+                return 0
+            try:
+                entry_ids = publish(self.client, batch)
+            except Exception as e:
+                with self._cond:
+                    self.counts["errors"] += 1
+                    self._requeue(batch)
+                print(f"   ❌ [Redis] Publish of {len(batch)} signals failed, will retry: {e}")
+                return 0
+            with self._cond:
+                self.counts["published"] += len(entry_ids)
+                self.counts["round_trips"] += 1
+        for payload in batch:
+            body = payload["body"]
+            print(f"   🚀 [Redis] Published {body['signal']} for {body['ticker']} ({payload['header']['message_id']})")
+        return len(batch)
+
+    def _requeue(self, batch: List[Dict]) -> None:
+        # Called with _cond held. Signals added during the failed publish are newer and win.
+        for payload in batch:
+            if self._pending.setdefault(self._key(payload), payload) is payload:
+                self.counts["requeued"] += 1
+        # The retry waits a full max_delay rather than spinning against a dead Redis
+        self._oldest = time.monotonic()
+        self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._oldest is None:
+                    self._cond.wait()
+                remaining = self._oldest + self.max_delay - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+            self.flush()
+
+
+def read_group(client, consumer: str, count: int = 16, block_ms: Optional[int] = None,
+               pending: bool = False) -> List[Tuple[str, Dict]]:
+    """
+    New entries for `consumer` (or, with pending=True, the ones already
+    delivered to it and not acknowledged), decoded to (id, payload).
+    """
+    reply = client.xreadgroup(GROUP, consumer, {STREAM: "0" if pending else ">"},
+                              count=count, block=block_ms)
+    entries = []
+    for _stream, items in reply or []:
+        for entry_id, fields in items:
+            if fields and "payload" in fields:
+                entries.append((entry_id, json.loads(fields["payload"])))
+    return entries
+
+
+def ack(client, entry_ids: List[str]) -> int:
+    return client.xack(STREAM, GROUP, *entry_ids) if entry_ids else 0
+
+
+def claim_stale(client, consumer: str, count: int = 100) -> List[Tuple[str, Dict]]:
+    """Takes over entries another consumer left pending for CLAIM_IDLE_MS."""
+    pending = client.xpending_range(STREAM, GROUP, "-", "+", count)
+    stale = [p["message_id"] for p in pending if p["time_since_delivered"] >= CLAIM_IDLE_MS]
+    if not stale:
+        return []
+    claimed = client.xclaim(STREAM, GROUP, consumer, CLAIM_IDLE_MS, stale)
+    return [(entry_id, json.loads(fields["payload"])) for entry_id, fields in claimed
+            if fields and "payload" in fields]
+
+
+def stream_stats(client) -> Dict:
+    """Stream length plus the group's pending count and lag (entries not yet delivered)."""
+    stats = {"length": client.xlen(STREAM), "pending": 0, "lag": None, "consumers": 0}
+    for group in client.xinfo_groups(STREAM):
+        if group["name"] == GROUP:
+            stats.update(pending=group["pending"], lag=group.get("lag"), consumers=group["consumers"])
+    return stats
+
+
+if __name__ == "__main__":
+    import redis
+
+    client = redis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379"), decode_responses=True)
+    ensure_group(client)
+    print(f"   📊 [Stream] {STREAM}/{GROUP}: {stream_stats(client)}")
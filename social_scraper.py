@@ -1,11 +1,38 @@
-import requests
+import hashlib
+import http_pool
+import metrics
 import random
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
+from ttl_cache import TTLCache
+
 # --- CONFIGURATION ---
 OLLAMA_URL = "http://host.docker.internal:11434/api/generate"
 OLLAMA_MODEL = "llama3.2"
+OLLAMA_TIMEOUT = 5
+OLLAMA_BATCH_TIMEOUT = 15  # One prompt scores every unseen title of a visit
+# Consecutive failures before Ollama calls fail fast / seconds before the first probe
+OLLAMA_BREAKER_FAILURES = 3
+OLLAMA_BREAKER_RESET = 30
+
+_OLLAMA = http_pool.CircuitBreaker("Ollama", OLLAMA_BREAKER_FAILURES, OLLAMA_BREAKER_RESET)
+_VADER = SentimentIntensityAnalyzer()
+# Single-headline fallback requests. Not http_pool's fetch pool: score_titles
+# already runs on a fetch worker, and waiting on that pool from it can deadlock.
+_LLM_POOL = ThreadPoolExecutor(max_workers=http_pool.HOST_LIMITS["host.docker.internal"],
+                               thread_name_prefix="arcos-llm")
+
+# How each headline got its score: cache, llm, vader (with the breaker open or not)
+PATH_COUNTS = {"cache": 0, "llm": 0, "vader": 0, "vader_breaker_open": 0}
+_counts_lock = threading.Lock()
+
+# A headline's LLM score never changes: keep it for a month (memory LRU + disk)
+_HEADLINE_SCORES = TTLCache("headline_sentiment", ttl=30 * 86400, stale_for=0, max_entries=4096)
 
 SUBREDDITS = {
     "AAPL": "https://www.reddit.com/r/stocks/search.json?q=AAPL&sort=new&restrict_sr=1",
@@ -21,17 +48,13 @@ USER_AGENTS = [
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15"
 ]
 
-def analyze_with_llm(text):
-    """
-    Sends text to your local RTX 3090 (Ollama) for deep analysis.
-    Returns a score from -1.0 to 1.0.
+def _generate(prompt, timeout):
     """
-    prompt = f"""
-    Analyze the sentiment of this stock market headline: "{text}"
-    Reply with ONLY a number between -1.0 (Bearish/Negative) and 1.0 (Bullish/Positive).
-    0.0 is neutral. Do not write any words, just the number.
+    Ollama's reply text, or None if Ollama is down or the breaker is open.
+    Only transport errors and non-200 replies count against the breaker.
     """
-    
+    if not _OLLAMA.allow():
+        return None
     try:
         payload = {
             "model": OLLAMA_MODEL,
@@ -39,21 +62,156 @@ def analyze_with_llm(text):
             "stream": False
         }
         # Send to the Windows Host
-        response = requests.post(OLLAMA_URL, json=payload, timeout=5)
-        
-        if response.status_code == 200:
-            result_text = response.json().get("response", "").strip()
-            # Try to parse the number
-            try:
-                score = float(result_text)
-                return max(-1.0, min(1.0, score)) # Clamp between -1 and 1
-            except ValueError:
-                return 0.0 # LLM talked too much, treat as neutral
-        else:
+        with metrics.span("ollama"):
+            response = http_pool.post(OLLAMA_URL, json=payload, timeout=timeout)
+        if response.status_code != 200:
+            _OLLAMA.record_failure()
             return None # LLM Failed
-            
+        text = response.json().get("response", "").strip()
     except Exception:
+        _OLLAMA.record_failure()
         return None # Connection Failed (Ollama likely off)
+    _OLLAMA.record_success()
+    return text
+
+def analyze_with_llm(text):
+    """
+    Sends text to your local RTX 3090 (Ollama) for deep analysis.
+    Returns a score from -1.0 to 1.0.
+    """
+    return _single_score(text)[0]
+
+def _single_score(text) -> Tuple[Optional[float], bool]:
+    """analyze_with_llm, plus whether the reply parsed (only those scores are cached)."""
+    prompt = f"""
+    Analyze the sentiment of this stock market headline: "{text}"
+    Reply with ONLY a number between -1.0 (Bearish/Negative) and 1.0 (Bullish/Positive).
+    0.0 is neutral. Do not write any words, just the number.
+    """
+
+    result_text = _generate(prompt, OLLAMA_TIMEOUT)
+    if result_text is None:
+        return None, False
+    # Try to parse the number
+    try:
+        score = float(result_text)
+        return max(-1.0, min(1.0, score)), True # Clamp between -1 and 1
+    except ValueError:
+        return 0.0, False # LLM talked too much, treat as neutral
+
+def _headline_key(text):
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def _parse_scores(text, count) -> Optional[List[float]]:
+    """One clamped score per headline, or None if the reply does not line up."""
+    lines = [line for line in text.splitlines() if line.strip()]
+    if len(lines) == count:
+        # Last number on each line, so "1. 0.4" style numbering still parses
+        numbers = [(_NUMBER.findall(line) or [None])[-1] for line in lines]
+    else:
+        numbers = _NUMBER.findall(text)
+    if len(numbers) != count or None in numbers:
+        return None
+    return [max(-1.0, min(1.0, float(n))) for n in numbers]
+
+
+def analyze_batch_with_llm(texts):
+    """
+    Scores several headlines with one Ollama request. Returns one score per
+    text (all None if Ollama is unavailable), or None if Ollama answered
+    but not with one number per headline.
+    """
+    listing = "\n".join(f"{i + 1}. {text}" for i, text in enumerate(texts))
+    prompt = f"""
+    Analyze the sentiment of each of these {len(texts)} stock market headlines:
+    {listing}
+    For each headline, in order, reply with ONLY a number between -1.0 (Bearish/Negative) and 1.0 (Bullish/Positive),
+    one per line. 0.0 is neutral. Do not write any words, just the numbers.
+    """
+    result_text = _generate(prompt, OLLAMA_BATCH_TIMEOUT)
+    if result_text is None:
+        return [None] * len(texts)
+    return _parse_scores(result_text, len(texts))
+
+
+def score_titles(titles):
+    """
+    LLM scores for `titles` (None where the LLM was unavailable). Cached
+    headlines cost nothing; the unseen ones go to Ollama once per distinct
+    normalized title in one batched prompt, falling back to concurrent
+    single-headline requests on a dedicated pool.
+    """
+    keys = [_headline_key(title) for title in titles]
+    scores = [_HEADLINE_SCORES.peek(key) for key in keys]
+    # Distinct unseen headlines -> every position they appear at
+    unseen: Dict[str, List[int]] = {}
+    for i, score in enumerate(scores):
+        if score is None:
+            unseen.setdefault(keys[i], []).append(i)
+    if not unseen:
+        _count("cache", len(titles))
+        return scores
+
+    asked = [titles[positions[0]] for positions in unseen.values()]
+    if len(asked) == 1:
+        fresh = [_single_score(asked[0])]
+    else:
+        batch = analyze_batch_with_llm(asked)
+        fresh = None if batch is None else [(score, score is not None) for score in batch]
+    if fresh is None:
+        # Ollama answered the batch but not one score per headline: ask one by one
+        futures = [_LLM_POOL.submit(_single_score, title) for title in asked]
+        wait(futures, timeout=OLLAMA_BATCH_TIMEOUT)
+        fresh = [f.result() if f.done() else (None, False) for f in futures]
+
+    misses = scored = 0
+    for (key, positions), (score, parsed) in zip(unseen.items(), fresh):
+        for i in positions:
+            scores[i] = score
+        misses += len(positions)
+        if score is not None:
+            scored += len(positions)
+        if parsed:
+            _HEADLINE_SCORES.put(key, score)
+    _count("cache", len(titles) - misses)
+    _count("llm", scored)
+    return scores
+
+
+def vader_score(text):
+    """Fallback Brain: VADER compound score, noting whether the breaker forced it."""
+    _count("vader" if _OLLAMA.state == "closed" else "vader_breaker_open")
+    return _VADER.polarity_scores(text)['compound']
+
+
+def _count(path, n=1):
+    with _counts_lock:
+        PATH_COUNTS[path] += n
+
+
+def path_stats():
+    """Headlines scored per path since start, plus the Ollama breaker state."""
+    with _counts_lock:
+        stats = dict(PATH_COUNTS)
+    stats["ollama_breaker"] = _OLLAMA.state
+    return stats
+
+
+def _collect_metrics():
+    with _counts_lock:
+        counts = dict(PATH_COUNTS)
+    for path, count in counts.items():
+        yield "sentiment_headlines_total", {"path": path}, count
+    yield "ollama_breaker_open", {}, 0 if _OLLAMA.state == "closed" else 1
+
+
+metrics.register(_collect_metrics)
+
 
 def get_reddit_sentiment(ticker):
     """
@@ -73,7 +231,8 @@ def get_reddit_sentiment(ticker):
     }
     
     try:
-        response = requests.get(url, headers=headers, timeout=5)
+        with metrics.span("reddit"):
+            response = http_pool.get(url, headers=headers, timeout=5)
         if response.status_code != 200:
             return 0.0, 0
 
@@ -83,26 +242,22 @@ def get_reddit_sentiment(ticker):
         if not posts:
             return 0.0, 0
 
-        # Fallback Brain
-        vader = SentimentIntensityAnalyzer()
-        
         scores = []
         llm_used = False
         
         # Analyze top 5 posts (LLM is heavy, don't do 20)
-        for post in posts[:5]:
-            title = post["data"].get("title", "")
-            if title:
-                # 1. Try RTX 3090 Analysis
-                score = analyze_with_llm(title)
-                
-                # 2. Fallback to VADER if Ollama fails
-                if score is None:
-                    score = vader.polarity_scores(title)['compound']
-                else:
-                    llm_used = True
-                    
-                scores.append(score)
+        titles = [post["data"].get("title", "") for post in posts[:5]]
+        titles = [title for title in titles if title]
+
+        # 1. RTX 3090 Analysis (cached per headline, unseen ones batched)
+        for title, score in zip(titles, score_titles(titles)):
+            # 2. Fallback to VADER if Ollama fails
+            if score is None:
+                score = vader_score(title)
+            else:
+                llm_used = True
+
+            scores.append(score)
         
         avg_sentiment = sum(scores) / len(scores) if scores else 0.0
         volume = len(scores)
@@ -3,13 +3,15 @@ use std::env;
 use std::fs;
 use std::path::PathBuf;
 use std::thread;
-use std::time::Duration;
+use std::time::{Duration, Instant};
 use lettre::transport::smtp::authentication::Credentials;
 use lettre::{Message, SmtpTransport, Transport};
-use redis::Commands;
 use warp::Filter;
 use sha2::{Digest, Sha256};
 
+mod stream;
+use stream::{Entry, PendingEntry, Reply, StreamOps};
+
 #[derive(Clone)]
 struct Config {
     smtp_user: String,
@@ -21,8 +23,13 @@ struct Config {
     max_position_cap: f64,
     max_gross_exposure: f64,
     execution_mode: String,
+    signal_stream: String,
+    consumer_group: String,
+    consumer_name: String,
 }
 
+const STREAM_REPORT_EVERY: Duration = Duration::from_secs(60);
+
 #[derive(Debug, Deserialize)]
 struct ArcosMessage {
     header: Header,
@@ -49,7 +56,7 @@ struct Body {
     tags: Vec<String>,
 }
 
-fn send_email_alert(msg: &ArcosMessage, config: &Config) {
+fn send_email_alert(msg: &ArcosMessage, config: &Config) -> Result<(), String> {
     println!("   📧 [Alert] Sending email for {}...", msg.body.ticker);
     
     let subject_line = if msg.body.signal == "INFO" {
@@ -61,19 +68,25 @@ fn send_email_alert(msg: &ArcosMessage, config: &Config) {
     };
 
     let email = Message::builder()
-        .from(config.smtp_user.parse().unwrap())
-        .to(config.alert_recipient.parse().unwrap())
+        .from(config.smtp_user.parse().map_err(|e| format!("bad SMTP_USER: {}", e))?)
+        .to(config.alert_recipient.parse().map_err(|e| format!("bad ALERT_RECIPIENT: {}", e))?)
         .subject(subject_line)
         .body(format!("Ticker: {}\nSignal: {}\nConfidence: {:.2}%\n\nREPORT:\n{}", 
             msg.body.ticker, msg.body.signal, msg.body.probability * 100.0, msg.body.rationale))
-        .unwrap();
+        .map_err(|e| e.to_string())?;
 
     let creds = Credentials::new(config.smtp_user.to_string(), config.smtp_pass.to_string());
-    let mailer = SmtpTransport::relay("smtp.gmail.com").unwrap().credentials(creds).build();
+    let mailer = SmtpTransport::relay("smtp.gmail.com").map_err(|e| e.to_string())?.credentials(creds).build();
 
     match mailer.send(&email) {
-        Ok(_) => println!("   ✅ [Alert] Email Sent!"),
-        Err(e) => println!("   ❌ [Alert] Error: {:?}", e),
+        Ok(_) => {
+            println!("   ✅ [Alert] Email Sent!");
+            Ok(())
+        }
+        Err(e) => {
+            println!("   ❌ [Alert] Error: {:?}", e);
+            Err(format!("email alert failed: {}", e))
+        }
     }
 }
 
@@ -100,6 +113,11 @@ fn load_config() -> Config {
             .and_then(|v| v.parse().ok())
             .unwrap_or(1.0),
         execution_mode: env::var("ARCOS_EXECUTION_MODE").unwrap_or_else(|_| "advisory".to_string()),
+        signal_stream: env::var("ARCOS_SIGNAL_STREAM").unwrap_or_else(|_| "arcos:signals".to_string()),
+        consumer_group: env::var("ARCOS_SIGNAL_GROUP").unwrap_or_else(|_| "maestro".to_string()),
+        consumer_name: env::var("ARCOS_MAESTRO_CONSUMER")
+            .or_else(|_| env::var("HOSTNAME"))
+            .unwrap_or_else(|_| "maestro".to_string()),
     }
 }
 
@@ -133,6 +151,71 @@ fn latest_artifact(workspace_root: &str, category: &str) -> Option<PathBuf> {
     files.pop()
 }
 
+// The blob path and the SHA256 of the blob file as stored, from a pointer file
+// or an index record. Records from before content_sha256 existed carry the hash
+// of the uncompressed JSON in sha256, which sha256sum on the blob never matches:
+// those blobs are hashed here instead.
+fn blob_record(workspace_root: &str, record: &serde_json::Value) -> Option<(String, String)> {
+    let blob = record.get("blob")?.as_str()?;
+    let blob_path = PathBuf::from(workspace_root).join(blob);
+    let sha = match record.get("content_sha256") {
+        Some(_) => record.get("sha256")?.as_str()?.to_string(),
+        None => compute_sha256(&blob_path).ok()?,
+    };
+    Some((blob_path.display().to_string(), sha))
+}
+
+// Pointer files written by artifacts.write_artifact carry the blob path and its
+// SHA256 computed once at write time; legacy plain artifacts are hashed here.
+fn artifact_record(workspace_root: &str, path: &PathBuf) -> Option<(String, String)> {
+    let pointer: Option<serde_json::Value> = fs::read_to_string(path)
+        .ok()
+        .and_then(|content| serde_json::from_str(&content).ok());
+    if let Some(record) = pointer.as_ref().and_then(|pointer| blob_record(workspace_root, pointer)) {
+        return Some(record);
+    }
+    compute_sha256(path).ok().map(|hash| (path.display().to_string(), hash))
+}
+
+// The artifact index (artifacts._index) keeps one "latest" file per category and
+// ticker, holding the newest record per artifact type: one read, no directory scan.
+fn indexed_artifacts(workspace_root: &str, category: &str, key: &str) -> Option<Vec<(String, String)>> {
+    let mut path = PathBuf::from(workspace_root);
+    path.push("index");
+    path.push("latest");
+    path.push(category);
+    path.push(format!("{}.json", key.replace('/', "_")));
+    let latest: serde_json::Value = serde_json::from_str(&fs::read_to_string(&path).ok()?).ok()?;
+    let records = latest.get("by_type")?.as_object()?;
+    Some(
+        records
+            .values()
+            .filter_map(|record| blob_record(workspace_root, record))
+            .collect(),
+    )
+}
+
+fn collect_artifacts(workspace_root: &str, ticker: &str) -> Vec<(String, String)> {
+    let mut artifacts = Vec::new();
+    let indexed = PathBuf::from(workspace_root).join("index").join("latest").is_dir();
+    for category in ["raw", "features", "signals", "news", "calibration"] {
+        if indexed {
+            // The audited ticker's own artifacts plus ticker-less ones (macro, calibration)
+            for key in [ticker, "_global"] {
+                if let Some(records) = indexed_artifacts(workspace_root, category, key) {
+                    artifacts.extend(records);
+                }
+            }
+        } else if let Some(path) = latest_artifact(workspace_root, category) {
+            // Workspaces written before the index existed
+            if let Some(record) = artifact_record(workspace_root, &path) {
+                artifacts.push(record);
+            }
+        }
+    }
+    artifacts
+}
+
 fn apply_validity_gate(msg: &ArcosMessage, config: &Config) -> Vec<String> {
     let mut failures = Vec::new();
     if msg.body.sample_size < config.min_sample_size {
@@ -246,9 +329,10 @@ fn write_official_output(
     Ok(())
 }
 
-fn append_paper_trade(config: &Config, msg: &ArcosMessage) {
+// Idempotent per message id, since a signal whose processing failed is redelivered.
+fn append_paper_trade(config: &Config, msg: &ArcosMessage) -> Result<(), String> {
     if config.execution_mode != "paper" {
-        return;
+        return Ok(());
     }
     let ledger_path = PathBuf::from(&config.workspace_root).join("paper_ledger.json");
     let mut ledger: serde_json::Value = fs::read_to_string(&ledger_path)
@@ -257,6 +341,10 @@ fn append_paper_trade(config: &Config, msg: &ArcosMessage) {
         .unwrap_or_else(|| serde_json::json!({ "type": "PaperLedger", "trades": [] }));
 
     if let Some(trades) = ledger.get_mut("trades").and_then(|v| v.as_array_mut()) {
+        let id = msg.header.message_id.as_str();
+        if trades.iter().any(|trade| trade.get("timestamp").and_then(|v| v.as_str()) == Some(id)) {
+            return Ok(());
+        }
         trades.push(serde_json::json!({
             "ticker": msg.body.ticker,
             "signal": msg.body.signal,
@@ -265,8 +353,152 @@ fn append_paper_trade(config: &Config, msg: &ArcosMessage) {
         }));
     }
 
-    if let Ok(content) = serde_json::to_string_pretty(&ledger) {
-        let _ = fs::write(&ledger_path, content);
+    let content = serde_json::to_string_pretty(&ledger).map_err(|e| e.to_string())?;
+    fs::write(&ledger_path, content).map_err(|e| format!("paper ledger write failed: {}", e))
+}
+
+// Ok once the signal is handled or rejected for good (unparseable, invalid);
+// Err for failures worth a redelivery, which leaves the stream entry pending.
+// Every step is safe to repeat for the same message id.
+fn process_signal(json_str: &str, config: &Config) -> Result<(), String> {
+    let message = match serde_json::from_str::<ArcosMessage>(json_str) {
+        Ok(message) => message,
+        Err(e) => {
+            println!("   ❌ [Error] Parser failed: {:?} | Content: {}", e, json_str);
+            return Ok(());
+        }
+    };
+    if let Err(err) = validate_message(&message) {
+        println!("   ❌ [Validation] {} | {}", err, json_str);
+        return Ok(());
+    }
+
+    println!("\n🔔 NEW SIGNAL: {} ({})", message.body.ticker, message.body.signal);
+
+    let artifacts = collect_artifacts(&config.workspace_root, &message.body.ticker);
+
+    let portfolio_path = PathBuf::from(&config.workspace_root).join("portfolio_state.json");
+    let portfolio_state: serde_json::Value = fs::read_to_string(&portfolio_path)
+        .ok()
+        .and_then(|content| serde_json::from_str(&content).ok())
+        .unwrap_or_else(|| serde_json::json!({ "positions": [], "exposure": { "gross": 0.0 } }));
+
+    let validity_failures = apply_validity_gate(&message, config);
+    let risk_failures = apply_risk_engine(config, portfolio_state);
+
+    if let Err(err) = write_official_output(config, &message, &validity_failures, &risk_failures, artifacts) {
+        println!("   ❌ [Audit] Failed to write official output: {}", err);
+        return Err(format!("official output: {}", err));
+    }
+    if validity_failures.is_empty() && risk_failures.is_empty() {
+        append_paper_trade(config, &message)?;
+    }
+
+    let sig = message.body.signal.as_str();
+    if (sig == "BUY_CANDIDATE" || sig == "INFO" || sig.starts_with("URGENT")) && message.body.probability > 0.60 {
+        if !config.smtp_user.is_empty() && !config.smtp_pass.is_empty() && !config.alert_recipient.is_empty() {
+            // Sent inline: a failed alert must keep the entry pending so it is retried
+            send_email_alert(&message, config)?;
+        }
+    }
+    Ok(())
+}
+
+// --- Signal transport: Redis Stream + consumer group (see stream.rs) ---
+
+struct RedisStream {
+    con: redis::Connection,
+    stream: String,
+    group: String,
+    consumer: String,
+}
+
+fn to_reply(value: redis::Value) -> Reply {
+    match value {
+        redis::Value::Nil => Reply::Nil,
+        redis::Value::Int(n) => Reply::Int(n),
+        redis::Value::Data(bytes) => Reply::Data(bytes),
+        redis::Value::Bulk(items) => Reply::Bulk(items.into_iter().map(to_reply).collect()),
+        redis::Value::Status(status) => Reply::Status(status),
+        redis::Value::Okay => Reply::Status("OK".to_string()),
+    }
+}
+
+fn reply_error(err: String) -> redis::RedisError {
+    redis::RedisError::from((redis::ErrorKind::TypeError, "unexpected stream reply", err))
+}
+
+impl RedisStream {
+    fn query(&mut self, cmd: &redis::Cmd) -> redis::RedisResult<Reply> {
+        cmd.query::<redis::Value>(&mut self.con).map(to_reply)
+    }
+
+    fn ensure_group(&mut self) {
+        // Created at "0" so entries published before the first Maestro start are read too
+        let mut cmd = redis::cmd("XGROUP");
+        cmd.arg("CREATE").arg(&self.stream).arg(&self.group).arg("0").arg("MKSTREAM");
+        match self.query(&cmd) {
+            Ok(_) => println!("   🧩 [Stream] Created group {} on {}", self.group, self.stream),
+            Err(e) if e.to_string().contains("BUSYGROUP") => {}
+            Err(e) => println!("   ⚠️ [Stream] Could not create group {}: {}", self.group, e),
+        }
+    }
+
+    // Pending = delivered but unacknowledged; lag = not yet delivered to the group (Redis 7+).
+    fn report_lag(&mut self) {
+        let length = self.query(redis::cmd("XLEN").arg(&self.stream)).ok().and_then(|r| r.as_int()).unwrap_or(0);
+        let groups = self
+            .query(redis::cmd("XINFO").arg("GROUPS").arg(&self.stream))
+            .and_then(|reply| stream::parse_groups(&reply).map_err(reply_error));
+        let groups = match groups {
+            Ok(groups) => groups,
+            Err(e) => {
+                println!("   ⚠️ [Stream] XINFO failed: {}", e);
+                return;
+            }
+        };
+        for group in groups {
+            if group.get("name").and_then(|v| v.as_text()).as_deref() != Some(self.group.as_str()) {
+                continue;
+            }
+            let field = |key: &str| -> Option<i64> { group.get(key).and_then(|v| v.as_int()) };
+            let lag = field("lag").map(|lag| lag.to_string()).unwrap_or_else(|| "n/a".to_string());
+            println!(
+                "   📊 [Stream] {} | length {} | pending {} | lag {} | consumers {}",
+                self.stream, length, field("pending").unwrap_or(0), lag, field("consumers").unwrap_or(0)
+            );
+        }
+    }
+}
+
+impl StreamOps for RedisStream {
+    type Error = redis::RedisError;
+
+    fn read(&mut self, id: &str, block: bool) -> redis::RedisResult<Vec<Entry>> {
+        let mut cmd = redis::cmd("XREADGROUP");
+        cmd.arg("GROUP").arg(&self.group).arg(&self.consumer).arg("COUNT").arg(stream::STREAM_BATCH);
+        if block {
+            cmd.arg("BLOCK").arg(stream::STREAM_BLOCK_MS);
+        }
+        cmd.arg("STREAMS").arg(&self.stream).arg(id);
+        let reply = self.query(&cmd)?;
+        stream::parse_read_reply(&reply).map_err(reply_error)
+    }
+
+    fn ack(&mut self, id: &str) -> redis::RedisResult<()> {
+        self.query(redis::cmd("XACK").arg(&self.stream).arg(&self.group).arg(id)).map(|_| ())
+    }
+
+    fn pending(&mut self, count: usize) -> redis::RedisResult<Vec<PendingEntry>> {
+        let reply = self.query(redis::cmd("XPENDING").arg(&self.stream).arg(&self.group).arg("-").arg("+").arg(count))?;
+        stream::parse_pending(&reply).map_err(reply_error)
+    }
+
+    fn claim(&mut self, min_idle_ms: u64, ids: &[String]) -> redis::RedisResult<Vec<Entry>> {
+        let mut cmd = redis::cmd("XCLAIM");
+        cmd.arg(&self.stream).arg(&self.group).arg(&self.consumer).arg(min_idle_ms).arg(ids);
+        let reply = self.query(&cmd)?;
+        stream::parse_entries(&reply).map_err(reply_error)
     }
 }
 
@@ -306,82 +538,55 @@ async fn main() {
         }
     };
 
-    let mut con = match client.get_connection() {
+    let con = match client.get_connection() {
         Ok(c) => c,
         Err(e) => {
             println!("   ❌ [System] Could not get Redis connection: {}", e);
             return;
         }
     };
+    let mut signals = RedisStream {
+        con,
+        stream: config.signal_stream.clone(),
+        group: config.consumer_group.clone(),
+        consumer: config.consumer_name.clone(),
+    };
+    let mut process = |json_str: &str| process_signal(json_str, &config);
 
-    println!("   👂 [System] Listening for signals...");
+    signals.ensure_group();
+    stream::recover_own_pending(&mut signals, &mut process);
+    println!(
+        "   👂 [System] Listening on stream {} as {}/{}...",
+        config.signal_stream, config.consumer_group, config.consumer_name
+    );
 
+    let mut last_report = Instant::now();
     loop {
-        // BLPOP blocks until an item is available. Timeout 0 = wait forever.
-        // Returns tuple: (key, value)
-        let result: redis::RedisResult<(String, String)> = con.blpop("arcos_signals", 0);
-
-        match result {
-            Ok((_key, json_str)) => {
-                match serde_json::from_str::<ArcosMessage>(&json_str) {
-                    Ok(message) => {
-                        if let Err(err) = validate_message(&message) {
-                            println!("   ❌ [Validation] {} | {}", err, json_str);
-                            continue;
-                        }
-
-                        println!("\n🔔 NEW SIGNAL: {} ({})", message.body.ticker, message.body.signal);
-
-                        let mut artifacts = Vec::new();
-                        if let Some(path) = latest_artifact(&config.workspace_root, "raw") {
-                            if let Ok(hash) = compute_sha256(&path) {
-                                artifacts.push((path.display().to_string(), hash));
-                            }
-                        }
-                        for category in ["features", "signals", "news", "calibration"] {
-                            if let Some(path) = latest_artifact(&config.workspace_root, category) {
-                                if let Ok(hash) = compute_sha256(&path) {
-                                    artifacts.push((path.display().to_string(), hash));
-                                }
-                            }
-                        }
-
-                        let portfolio_path = PathBuf::from(&config.workspace_root).join("portfolio_state.json");
-                        let portfolio_state: serde_json::Value = fs::read_to_string(&portfolio_path)
-                            .ok()
-                            .and_then(|content| serde_json::from_str(&content).ok())
-                            .unwrap_or_else(|| serde_json::json!({ "positions": [], "exposure": { "gross": 0.0 } }));
-
-                        let validity_failures = apply_validity_gate(&message, &config);
-                        let risk_failures = apply_risk_engine(&config, portfolio_state);
-
-                        if let Err(err) = write_official_output(&config, &message, &validity_failures, &risk_failures, artifacts) {
-                            println!("   ❌ [Audit] Failed to write official output: {}", err);
-                        } else if validity_failures.is_empty() && risk_failures.is_empty() {
-                            append_paper_trade(&config, &message);
-                        }
-
-                        let sig = message.body.signal.as_str();
-                        if (sig == "BUY_CANDIDATE" || sig == "INFO" || sig.starts_with("URGENT")) && message.body.probability > 0.60 {
-                            if !config.smtp_user.is_empty() && !config.smtp_pass.is_empty() && !config.alert_recipient.is_empty() {
-                                let mail_config = config.clone();
-                                tokio::task::spawn_blocking(move || {
-                                    send_email_alert(&message, &mail_config);
-                                });
-                            }
-                        }
-                    },
-                    Err(e) => {
-                         println!("   ❌ [Error] Parser failed: {:?} | Content: {}", e, json_str);
-                    }
+        if last_report.elapsed() >= STREAM_REPORT_EVERY {
+            match stream::claim_stale(&mut signals) {
+                Ok(entries) if !entries.is_empty() => {
+                    println!("   ♻️ [Stream] Claimed {} stale signals", entries.len());
+                    stream::handle_entries(&mut signals, entries, &mut process);
                 }
-            },
+                Ok(_) => {}
+                Err(e) => println!("   ⚠️ [Stream] Claim failed: {}", e),
+            }
+            signals.report_lag();
+            last_report = Instant::now();
+        }
+
+        // XREADGROUP blocks up to STREAM_BLOCK_MS for entries never delivered to the group
+        match signals.read(">", true) {
+            Ok(entries) => {
+                stream::handle_entries(&mut signals, entries, &mut process);
+            }
             Err(e) => {
-                println!("   ⚠️ [Redis] Error during pop: {}. Reconnecting...", e);
+                println!("   ⚠️ [Redis] Error during read: {}. Reconnecting...", e);
                 thread::sleep(Duration::from_secs(5));
-                // Basic reconnect attempt
+                // Basic reconnect attempt; a restarted Redis may have lost the group
                 if let Ok(new_con) = client.get_connection() {
-                    con = new_con;
+                    signals.con = new_con;
+                    signals.ensure_group();
                 }
             }
         }
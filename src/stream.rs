@@ -0,0 +1,452 @@
+// Consumer-group handling for the signal stream, kept free of the Redis client
+// so it can be tested on its own (`cargo test`). main.rs implements StreamOps
+// for a redis::Connection and converts its replies to `Reply`.
+//
+// Entries stay pending until XACKed, so a signal in flight when the Maestro
+// dies is redelivered (to this consumer on restart, or claimed by another).
+
+use std::collections::HashMap;
+use std::fmt::Display;
+
+// Consumer-group tuning: entries per read, how long a read blocks, how long an
+// entry may sit unacknowledged before another consumer claims it, and how
+// often a failing entry is redelivered before it is dropped.
+pub const STREAM_BATCH: usize = 16;
+pub const STREAM_BLOCK_MS: usize = 5000;
+pub const CLAIM_IDLE_MS: u64 = 60_000;
+pub const MAX_DELIVERIES: u64 = 5;
+
+/// A RESP reply, shaped like redis::Value.
+#[derive(Clone, Debug, PartialEq)]
+pub enum Reply {
+    Nil,
+    Int(i64),
+    Data(Vec<u8>),
+    Bulk(Vec<Reply>),
+    Status(String),
+}
+
+impl Reply {
+    pub fn as_text(&self) -> Option<String> {
+        match self {
+            Reply::Data(bytes) => String::from_utf8(bytes.clone()).ok(),
+            Reply::Status(text) => Some(text.clone()),
+            _ => None,
+        }
+    }
+
+    pub fn as_int(&self) -> Option<i64> {
+        match self {
+            Reply::Int(n) => Some(*n),
+            other => other.as_text().and_then(|text| text.parse().ok()),
+        }
+    }
+
+    fn items(&self) -> Result<&[Reply], String> {
+        match self {
+            Reply::Bulk(items) => Ok(items),
+            other => Err(format!("expected an array, got {:?}", other)),
+        }
+    }
+
+    fn text(&self) -> Result<String, String> {
+        self.as_text().ok_or_else(|| format!("expected a string, got {:?}", self))
+    }
+}
+
+#[derive(Clone, Debug, PartialEq)]
+pub struct Entry {
+    pub id: String,
+    pub fields: HashMap<String, String>,
+}
+
+impl Entry {
+    pub fn payload(&self) -> Option<&str> {
+        self.fields.get("payload").map(|p| p.as_str())
+    }
+}
+
+#[derive(Clone, Debug, PartialEq)]
+pub struct PendingEntry {
+    pub id: String,
+    pub consumer: String,
+    pub idle_ms: u64,
+    pub deliveries: u64,
+}
+
+// [[id, [field, value, ...]], ...] as returned by XCLAIM and inside XREADGROUP.
+// An entry trimmed from the stream while pending comes back with nil fields.
+pub fn parse_entries(reply: &Reply) -> Result<Vec<Entry>, String> {
+    let mut entries = Vec::new();
+    for item in reply.items()? {
+        let parts = item.items()?;
+        if parts.len() != 2 {
+            return Err(format!("malformed stream entry {:?}", item));
+        }
+        let mut fields = HashMap::new();
+        if parts[1] != Reply::Nil {
+            for pair in parts[1].items()?.chunks(2) {
+                if let [field, value] = pair {
+                    fields.insert(field.text()?, value.text()?);
+                }
+            }
+        }
+        entries.push(Entry { id: parts[0].text()?, fields });
+    }
+    Ok(entries)
+}
+
+// XREADGROUP: nil when the block timed out, else [[stream, entries], ...].
+pub fn parse_read_reply(reply: &Reply) -> Result<Vec<Entry>, String> {
+    if *reply == Reply::Nil {
+        return Ok(Vec::new());
+    }
+    let mut entries = Vec::new();
+    for stream in reply.items()? {
+        match stream.items()? {
+            [_, list] => entries.extend(parse_entries(list)?),
+            _ => return Err(format!("malformed stream reply {:?}", stream)),
+        }
+    }
+    Ok(entries)
+}
+
+// Extended XPENDING: [[id, consumer, idle ms, delivery count], ...].
+pub fn parse_pending(reply: &Reply) -> Result<Vec<PendingEntry>, String> {
+    let mut pending = Vec::new();
+    for item in reply.items()? {
+        match item.items()? {
+            [id, consumer, idle, count] => pending.push(PendingEntry {
+                id: id.text()?,
+                consumer: consumer.text()?,
+                idle_ms: idle.as_int().unwrap_or(0).max(0) as u64,
+                deliveries: count.as_int().unwrap_or(0).max(0) as u64,
+            }),
+            _ => return Err(format!("malformed pending entry {:?}", item)),
+        }
+    }
+    Ok(pending)
+}
+
+// XINFO GROUPS: one flat [key, value, ...] array per group.
+pub fn parse_groups(reply: &Reply) -> Result<Vec<HashMap<String, Reply>>, String> {
+    let mut groups = Vec::new();
+    for item in reply.items()? {
+        let mut group = HashMap::new();
+        for pair in item.items()?.chunks(2) {
+            if let [key, value] = pair {
+                group.insert(key.text()?, value.clone());
+            }
+        }
+        groups.push(group);
+    }
+    Ok(groups)
+}
+
+/// The stream commands the consumer needs, bound to one stream, group and consumer.
+pub trait StreamOps {
+    type Error: Display;
+    /// XREADGROUP from `id`: ">" for new entries, any other id for this
+    /// consumer's pending entries after it ("0": all of them).
+    fn read(&mut self, id: &str, block: bool) -> Result<Vec<Entry>, Self::Error>;
+    fn ack(&mut self, id: &str) -> Result<(), Self::Error>;
+    /// The group's oldest `count` pending entries, across all consumers.
+    fn pending(&mut self, count: usize) -> Result<Vec<PendingEntry>, Self::Error>;
+    fn claim(&mut self, min_idle_ms: u64, ids: &[String]) -> Result<Vec<Entry>, Self::Error>;
+}
+
+// Processes each entry and acknowledges the ones that succeeded. A failed entry
+// stays pending, so claim_stale redelivers it (up to MAX_DELIVERIES times).
+// `process` returns Ok for payloads it rejects: redelivery would not fix them.
+// Returns how many entries were acknowledged.
+pub fn handle_entries<S, F, E>(stream: &mut S, entries: Vec<Entry>, process: &mut F) -> usize
+where
+    S: StreamOps,
+    F: FnMut(&str) -> Result<(), E>,
+    E: Display,
+{
+    let mut acked = 0;
+    for entry in entries {
+        match entry.payload() {
+            Some(json_str) => {
+                if let Err(e) = process(json_str) {
+                    println!("   ⚠️ [Stream] Entry {} failed, left pending for redelivery: {}", entry.id, e);
+                    continue;
+                }
+            }
+            None => println!("   ❌ [Stream] Entry {} has no payload", entry.id),
+        }
+        match stream.ack(&entry.id) {
+            Ok(()) => acked += 1,
+            Err(e) => println!("   ⚠️ [Stream] XACK failed for {}: {}", entry.id, e),
+        }
+    }
+    acked
+}
+
+// Entries this consumer received but never acknowledged (it crashed mid-signal),
+// each tried once. Reading on from the last id seen pages past entries that
+// fail again; they stay pending for claim_stale.
+pub fn recover_own_pending<S, F, E>(stream: &mut S, process: &mut F)
+where
+    S: StreamOps,
+    F: FnMut(&str) -> Result<(), E>,
+    E: Display,
+{
+    let mut after = "0".to_string();
+    loop {
+        match stream.read(&after, false) {
+            Ok(entries) if !entries.is_empty() => {
+                println!("   ♻️ [Stream] Replaying {} unacknowledged signals", entries.len());
+                after = entries[entries.len() - 1].id.clone();
+                handle_entries(stream, entries, process);
+            }
+            Ok(_) => return,
+            Err(e) => {
+                println!("   ⚠️ [Stream] Pending recovery failed: {}", e);
+                return;
+            }
+        }
+    }
+}
+
+// Entries left pending for CLAIM_IDLE_MS: their consumer is presumed dead, or
+// processing them failed. Claiming redelivers them to this consumer.
+// Entries already delivered MAX_DELIVERIES times are acknowledged and dropped.
+pub fn claim_stale<S: StreamOps>(stream: &mut S) -> Result<Vec<Entry>, S::Error> {
+    let mut stale = Vec::new();
+    for entry in stream.pending(STREAM_BATCH)? {
+        if entry.idle_ms < CLAIM_IDLE_MS {
+            continue;
+        }
+        if entry.deliveries >= MAX_DELIVERIES {
+            println!("   ❌ [Stream] Dropping {} after {} deliveries", entry.id, entry.deliveries);
+            if let Err(e) = stream.ack(&entry.id) {
+                println!("   ⚠️ [Stream] XACK failed for {}: {}", entry.id, e);
+            }
+        } else {
+            stale.push(entry.id);
+        }
+    }
+    if stale.is_empty() {
+        return Ok(Vec::new());
+    }
+    stream.claim(CLAIM_IDLE_MS, &stale)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::cell::RefCell;
+    use std::rc::Rc;
+
+    fn data(text: &str) -> Reply {
+        Reply::Data(text.as_bytes().to_vec())
+    }
+
+    fn entry(id: &str, payload: Option<&str>) -> Entry {
+        let mut fields = HashMap::new();
+        if let Some(payload) = payload {
+            fields.insert("payload".to_string(), payload.to_string());
+        }
+        Entry { id: id.to_string(), fields }
+    }
+
+    fn pending(id: &str, idle_ms: u64, deliveries: u64) -> PendingEntry {
+        PendingEntry { id: id.to_string(), consumer: "dead".to_string(), idle_ms, deliveries }
+    }
+
+    // One consumer's view of a stream; every command is appended to `log`.
+    struct FakeStream {
+        unread: Vec<Entry>,
+        delivered: Vec<Entry>,
+        pending: Vec<PendingEntry>,
+        fail_acks: bool,
+        log: Rc<RefCell<Vec<String>>>,
+    }
+
+    impl FakeStream {
+        fn new(log: &Rc<RefCell<Vec<String>>>) -> Self {
+            FakeStream { unread: Vec::new(), delivered: Vec::new(), pending: Vec::new(), fail_acks: false, log: log.clone() }
+        }
+    }
+
+    impl StreamOps for FakeStream {
+        type Error = String;
+
+        fn read(&mut self, id: &str, _block: bool) -> Result<Vec<Entry>, String> {
+            if id != ">" {
+                return Ok(self.delivered.iter().filter(|e| e.id.as_str() > id).cloned().collect());
+            }
+            let batch: Vec<Entry> = self.unread.drain(..).collect();
+            self.delivered.extend(batch.iter().cloned());
+            Ok(batch)
+        }
+
+        fn ack(&mut self, id: &str) -> Result<(), String> {
+            if self.fail_acks {
+                return Err("connection reset".to_string());
+            }
+            self.log.borrow_mut().push(format!("ack {}", id));
+            self.delivered.retain(|e| e.id != id);
+            self.pending.retain(|p| p.id != id);
+            Ok(())
+        }
+
+        fn pending(&mut self, count: usize) -> Result<Vec<PendingEntry>, String> {
+            Ok(self.pending.iter().take(count).cloned().collect())
+        }
+
+        fn claim(&mut self, _min_idle_ms: u64, ids: &[String]) -> Result<Vec<Entry>, String> {
+            self.log.borrow_mut().push(format!("claim {}", ids.join(",")));
+            Ok(ids.iter().map(|id| entry(id, Some("{}"))).collect())
+        }
+    }
+
+    #[test]
+    fn acks_each_entry_after_processing_it() {
+        let log = Rc::new(RefCell::new(Vec::new()));
+        let mut stream = FakeStream::new(&log);
+        stream.unread = vec![entry("1-0", Some("a")), entry("2-0", None), entry("3-0", Some("c"))];
+
+        let entries = stream.read(">", true).unwrap();
+        let acked = handle_entries(&mut stream, entries, &mut |payload: &str| -> Result<(), String> {
+            log.borrow_mut().push(format!("process {}", payload));
+            Ok(())
+        });
+
+        assert_eq!(acked, 3);
+        assert_eq!(*log.borrow(), vec!["process a", "ack 1-0", "ack 2-0", "process c", "ack 3-0"]);
+        assert!(stream.delivered.is_empty());
+    }
+
+    #[test]
+    fn replays_own_pending_entries_then_stops() {
+        let log = Rc::new(RefCell::new(Vec::new()));
+        let mut stream = FakeStream::new(&log);
+        stream.delivered = vec![entry("1-0", Some("a")), entry("2-0", Some("b"))];
+
+        recover_own_pending(&mut stream, &mut |payload: &str| -> Result<(), String> {
+            log.borrow_mut().push(format!("process {}", payload));
+            Ok(())
+        });
+
+        assert_eq!(*log.borrow(), vec!["process a", "ack 1-0", "process b", "ack 2-0"]);
+    }
+
+    #[test]
+    fn failed_entries_are_not_acked() {
+        let log = Rc::new(RefCell::new(Vec::new()));
+        let mut stream = FakeStream::new(&log);
+        stream.unread = vec![entry("1-0", Some("ok")), entry("2-0", Some("smtp down")), entry("3-0", Some("ok"))];
+
+        let entries = stream.read(">", true).unwrap();
+        let acked = handle_entries(&mut stream, entries, &mut |payload: &str| {
+            if payload == "ok" { Ok(()) } else { Err(payload.to_string()) }
+        });
+
+        assert_eq!(acked, 2);
+        assert_eq!(*log.borrow(), vec!["ack 1-0", "ack 3-0"]);
+        // Still pending for this consumer, so claim_stale can redeliver it
+        assert_eq!(stream.delivered.iter().map(|e| e.id.as_str()).collect::<Vec<_>>(), vec!["2-0"]);
+    }
+
+    #[test]
+    fn replay_tries_each_entry_once_and_pages_past_failures() {
+        let log = Rc::new(RefCell::new(Vec::new()));
+        let mut stream = FakeStream::new(&log);
+        stream.delivered = vec![entry("1-0", Some("bad")), entry("2-0", Some("b")), entry("3-0", Some("bad"))];
+
+        let mut attempts = 0;
+        recover_own_pending(&mut stream, &mut |payload: &str| {
+            attempts += 1;
+            if payload == "bad" { Err("workspace unreadable") } else { Ok(()) }
+        });
+
+        assert_eq!(attempts, 3);
+        assert_eq!(*log.borrow(), vec!["ack 2-0"]);
+        assert_eq!(stream.delivered.len(), 2);
+    }
+
+    #[test]
+    fn replay_stops_when_acks_fail() {
+        let log = Rc::new(RefCell::new(Vec::new()));
+        let mut stream = FakeStream::new(&log);
+        stream.delivered = vec![entry("1-0", Some("a"))];
+        stream.fail_acks = true;
+
+        let mut processed = 0;
+        recover_own_pending(&mut stream, &mut |_: &str| -> Result<(), String> {
+            processed += 1;
+            Ok(())
+        });
+
+        assert_eq!(processed, 1);
+        assert_eq!(stream.delivered.len(), 1);
+    }
+
+    #[test]
+    fn drops_entries_at_max_deliveries_and_claims_the_rest() {
+        let log = Rc::new(RefCell::new(Vec::new()));
+        let mut stream = FakeStream::new(&log);
+        stream.pending = vec![
+            pending("1-0", CLAIM_IDLE_MS, MAX_DELIVERIES),
+            pending("2-0", CLAIM_IDLE_MS + 1, MAX_DELIVERIES - 1),
+            pending("3-0", CLAIM_IDLE_MS - 1, MAX_DELIVERIES + 3),
+        ];
+
+        let claimed = claim_stale(&mut stream).unwrap();
+
+        assert_eq!(claimed.iter().map(|e| e.id.as_str()).collect::<Vec<_>>(), vec!["2-0"]);
+        assert_eq!(*log.borrow(), vec!["ack 1-0", "claim 2-0"]);
+        // Not idle long enough: left with its current consumer
+        assert_eq!(stream.pending.iter().map(|p| p.id.as_str()).collect::<Vec<_>>(), vec!["2-0", "3-0"]);
+    }
+
+    #[test]
+    fn claims_nothing_when_no_entry_is_stale() {
+        let log = Rc::new(RefCell::new(Vec::new()));
+        let mut stream = FakeStream::new(&log);
+        stream.pending = vec![pending("1-0", 10, 1)];
+
+        assert!(claim_stale(&mut stream).unwrap().is_empty());
+        assert!(log.borrow().is_empty());
+    }
+
+    #[test]
+    fn parses_xreadgroup_replies() {
+        assert!(parse_read_reply(&Reply::Nil).unwrap().is_empty());
+
+        let reply = Reply::Bulk(vec![Reply::Bulk(vec![
+            data("arcos:signals"),
+            Reply::Bulk(vec![
+                Reply::Bulk(vec![data("1-0"), Reply::Bulk(vec![data("payload"), data("{\"a\":1}")])]),
+                Reply::Bulk(vec![data("2-0"), Reply::Nil]),
+            ]),
+        ])]);
+        let entries = parse_read_reply(&reply).unwrap();
+
+        assert_eq!(entries.len(), 2);
+        assert_eq!(entries[0].id, "1-0");
+        assert_eq!(entries[0].payload(), Some("{\"a\":1}"));
+        assert_eq!(entries[1].payload(), None);
+        assert!(parse_read_reply(&Reply::Int(1)).is_err());
+    }
+
+    #[test]
+    fn parses_pending_and_group_info() {
+        let reply = Reply::Bulk(vec![Reply::Bulk(vec![data("1-0"), data("maestro-a"), Reply::Int(61_000), Reply::Int(2)])]);
+        assert_eq!(
+            parse_pending(&reply).unwrap(),
+            vec![PendingEntry { id: "1-0".to_string(), consumer: "maestro-a".to_string(), idle_ms: 61_000, deliveries: 2 }]
+        );
+
+        let groups = Reply::Bulk(vec![Reply::Bulk(vec![
+            data("name"), data("maestro"), data("pending"), Reply::Int(3), data("lag"), Reply::Nil,
+        ])]);
+        let groups = parse_groups(&groups).unwrap();
+        assert_eq!(groups[0]["name"].as_text().as_deref(), Some("maestro"));
+        assert_eq!(groups[0]["pending"].as_int(), Some(3));
+        assert_eq!(groups[0]["lag"].as_int(), None);
+    }
+}
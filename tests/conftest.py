@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Modules read ARCOS_* settings at import time, so point them at a scratch
+# workspace before any test imports them; never the repo's workspace/.
+_SCRATCH = tempfile.mkdtemp(prefix="arcos-tests-")
+os.environ["ARCOS_WORKSPACE"] = _SCRATCH
+os.environ["ARCOS_DB_PATH"] = os.path.join(_SCRATCH, "arcos_vault.db")
+os.environ["ARCOS_CACHE_DISK"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
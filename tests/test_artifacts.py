@@ -0,0 +1,105 @@
+import gzip
+import hashlib
+import json
+import os
+
+import pytest
+
+import artifacts
+
+
+@pytest.fixture(autouse=True)
+def workspace(tmp_path, monkeypatch):
+    index_dir = tmp_path / "index"
+    monkeypatch.setattr(artifacts, "WORKSPACE_ROOT", str(tmp_path))
+    monkeypatch.setattr(artifacts, "BLOB_DIR", str(tmp_path / "blobs"))
+    monkeypatch.setattr(artifacts, "INDEX_DIR", str(index_dir))
+    monkeypatch.setattr(artifacts, "INDEX_LOG", str(index_dir / "artifacts.log"))
+    monkeypatch.setattr(artifacts, "INDEX_LOCK", str(index_dir / ".lock"))
+    return tmp_path
+
+
+def blobs(workspace):
+    return sorted(name for _, _, files in os.walk(workspace / "blobs") for name in files)
+
+
+def signal(ticker="AAA", prob=0.7, **extra):
+    return {"type": "SignalPayload", "ticker": ticker, "probability": prob, **extra}
+
+
+def test_blob_is_named_by_the_hash_of_its_canonical_json(workspace):
+    payload = {"b": 1, "a": [1, 2]}
+    sha = artifacts.put_blob(payload)
+    assert sha == hashlib.sha256(b'{"a":[1,2],"b":1}').hexdigest()
+    with gzip.open(artifacts.blob_path(sha), "rb") as f:
+        assert json.loads(f.read()) == payload
+    assert artifacts.put_blob({"a": [1, 2], "b": 1}) == sha
+
+
+def test_identical_payloads_share_a_blob(workspace):
+    first = artifacts.write_artifact("signals", signal(), "signal_AAA")
+    second = artifacts.write_artifact("signals", signal(), "signal_AAA")
+    assert first != second
+    assert len(blobs(workspace)) == 1
+    artifacts.write_artifact("signals", signal(prob=0.8), "signal_AAA")
+    assert len(blobs(workspace)) == 2
+
+
+def test_volatile_keys_stay_on_the_pointer(workspace):
+    first = artifacts.write_artifact("signals", signal(as_of="2024-01-01T00:00:00"), "signal_AAA")
+    second = artifacts.write_artifact("signals", signal(as_of="2024-01-02T00:00:00"), "signal_AAA")
+    assert len(blobs(workspace)) == 1
+
+    with open(second, "r", encoding="utf-8") as f:
+        pointer = json.load(f)
+    assert pointer["type"] == "ArtifactPointer"
+    assert pointer["as_of"] == "2024-01-02T00:00:00"
+    assert pointer["content_sha256"] == artifacts.put_blob(signal())
+    assert artifacts.read_artifact(first)["as_of"] == "2024-01-01T00:00:00"
+
+
+def test_pointer_and_index_hash_the_blob_file_as_stored(workspace):
+    artifacts.write_artifact("signals", signal(), "signal_AAA")
+    path = artifacts.write_artifact("signals", signal(), "signal_AAA")  # blob already stored
+    with open(path, "r", encoding="utf-8") as f:
+        pointer = json.load(f)
+    blob = os.path.join(str(workspace), pointer["blob"])
+    assert pointer["sha256"] == artifacts.compute_sha256(blob)
+    assert pointer["sha256"] != pointer["content_sha256"]
+    assert artifacts.latest_artifact("signals", "AAA")["sha256"] == pointer["sha256"]
+
+
+def test_read_artifact_accepts_pointers_without_content_sha256(workspace):
+    path = artifacts.write_artifact("signals", signal(), "signal_AAA")
+    with open(path, "r", encoding="utf-8") as f:
+        pointer = json.load(f)
+    pointer["sha256"] = pointer.pop("content_sha256")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(pointer, f)
+    assert artifacts.read_artifact(path) == signal()
+
+
+def test_read_artifact_round_trips_the_payload(workspace):
+    payload = signal(generated_at="2024-01-01T00:00:00", nested={"x": [1.5, None, "y"]})
+    path = artifacts.write_artifact("signals", payload, "signal_AAA")
+    assert artifacts.read_artifact(path) == payload
+
+
+def test_read_artifact_accepts_legacy_plain_files(workspace):
+    path = workspace / "legacy.json"
+    path.write_text(json.dumps(signal()))
+    assert artifacts.read_artifact(str(path)) == signal()
+
+
+def test_index_tracks_the_latest_artifact_per_ticker_and_type(workspace):
+    artifacts.write_artifact("signals", signal("AAA", 0.6), "signal_AAA")
+    newest = artifacts.write_artifact("signals", signal("AAA", 0.9), "signal_AAA")
+    other = artifacts.write_artifact("signals", {"type": "Other", "ticker": "BBB"}, "other_BBB")
+
+    record = artifacts.latest_artifact("signals", "AAA", "SignalPayload")
+    assert os.path.join(str(workspace), record["path"]) == newest
+    assert artifacts.latest_artifact("signals", "BBB")["artifact_type"] == "Other"
+    assert artifacts.latest_artifact_path("signals") == other
+    assert artifacts.latest_artifact("signals", "ZZZ") is None
+    with open(artifacts.INDEX_LOG, "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 3
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from backtesting import LogisticTrendStrategy, run_backtest
+
+INITIAL_CAPITAL = 10000.0
+
+
+def candles(n=260, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    index = pd.date_range("2024-01-02 09:30", periods=n, freq="15min")
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                         "Volume": np.full(n, 1e6)}, index=index)
+
+
+def baseline_hunter(full_data, training_window, buy_threshold, sell_threshold, min_rows):
+    """The per-bar loop backtester_v3.py ran before the backtesting package."""
+    def prepare_data(df):
+        df = df.copy()
+        df['Returns'] = df['Close'].pct_change()
+        df['SMA_5'] = df['Close'].rolling(window=5).mean()
+        df['SMA_20'] = df['Close'].rolling(window=20).mean()
+        df['Trend'] = np.where(df['SMA_5'] > df['SMA_20'], 1, 0)
+        df['Vol'] = df['Returns'].rolling(window=5).std()
+        df.dropna(inplace=True)
+        return df
+
+    cash, shares, history = INITIAL_CAPITAL, 0, []
+    bh_shares = INITIAL_CAPITAL / float(full_data['Close'].iloc[training_window])
+    for i in range(training_window, len(full_data) - 1):
+        current_price = float(full_data['Close'].iloc[i])
+        processed = prepare_data(full_data.iloc[i - training_window:i + 1])
+        if len(processed) < min_rows:
+            continue
+        X = processed[['Trend', 'Vol']]
+        y = np.where(processed['Returns'].shift(-1) > 0, 1, 0)
+        try:
+            model = LogisticRegression()
+            model.fit(X[:-1], y[:-1])
+            probability = model.predict_proba(X.iloc[[-1]])[0][1]
+        except Exception:
+            continue
+        if probability > buy_threshold and cash > current_price:
+            shares_to_buy = int(cash // current_price)
+            cash -= shares_to_buy * current_price
+            shares += shares_to_buy
+        elif probability < sell_threshold and shares > 0:
+            cash += shares * current_price
+            shares = 0
+        history.append(cash + shares * current_price)
+    return history[-1], bh_shares * float(full_data['Close'].iloc[-1])
+
+
+def test_hunter_run_matches_the_baseline_loop():
+    data = candles()
+    strategy = LogisticTrendStrategy(training_window=100, buy_threshold=0.65, sell_threshold=0.40, min_rows=20)
+    result = run_backtest(data, strategy, start_index=100, initial_capital=INITIAL_CAPITAL, benchmark_end_index=-1)
+
+    final_value, bh_value = baseline_hunter(data, 100, 0.65, 0.40, 20)
+    assert result.final_value == pytest.approx(final_value, rel=1e-9)
+    assert result.benchmark_final_value == pytest.approx(bh_value, rel=1e-12)
+
+
+def test_benchmark_defaults_to_the_last_evaluated_bar():
+    data = candles()
+    result = run_backtest(data, LogisticTrendStrategy(training_window=100, min_rows=20), start_index=100)
+    assert result.benchmark_final_value == result.benchmark.iloc[-1]
+    assert result.benchmark.index[-1] == data.index[-2]
+
+
+def test_failed_fits_skip_their_bars_instead_of_aborting(monkeypatch):
+    data = candles()
+    fit = LogisticRegression.fit
+    calls = []
+
+    def flaky_fit(self, X, y, *args, **kwargs):
+        calls.append(len(calls))
+        if len(calls) % 3 == 0:
+            raise np.linalg.LinAlgError("singular")
+        return fit(self, X, y, *args, **kwargs)
+
+    monkeypatch.setattr(LogisticRegression, "fit", flaky_fit)
+    result = run_backtest(data, LogisticTrendStrategy(training_window=100, min_rows=20), start_index=100)
+
+    assert len(result.equity) == len(calls) - len(calls) // 3
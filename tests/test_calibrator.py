@@ -0,0 +1,84 @@
+import sqlite3
+
+import pytest
+
+import calibrator
+import db_manager
+
+
+class FakeWriter:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, sql, params=(), note=None):
+        self.submitted.append(sql)
+
+
+@pytest.fixture
+def vault(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DB_FILE", str(tmp_path / "arcos_vault.db"))
+    conn = db_manager._open()
+    db_manager.migrate(conn)
+    conn.row_factory = sqlite3.Row
+    conn.execute(
+        "INSERT INTO signals (timestamp, ticker, signal, price_close, sentiment_score, raw_ml_prob, final_prob, rationale)"
+        " VALUES (1, 'AAA', 'BUY_CANDIDATE', 1.0, 0.0, 0.7, 0.7, '')"
+    )
+    conn.commit()
+    writer = FakeWriter()
+    monkeypatch.setattr(db_manager, "reader", lambda: conn)
+    monkeypatch.setattr(db_manager, "writer", lambda: writer)
+    yield conn, writer
+    conn.close()
+
+
+def test_update_summary_queues_the_fold_without_waiting(vault, monkeypatch):
+    conn, writer = vault
+
+    def blocked(timeout=None):
+        raise AssertionError("update_summary must not wait on the writer")
+
+    monkeypatch.setattr(db_manager, "flush", blocked)
+    assert calibrator.update_summary() == {}
+    assert len(writer.submitted) == 1
+
+    # What the writer thread does later; the next call reads it
+    writer.submitted[0](conn)
+    conn.commit()
+    assert calibrator.update_summary() == {"BUY_CANDIDATE": {"count": 1, "avg_confidence": 0.7}}
+    assert len(writer.submitted) == 1
+
+
+@pytest.fixture
+def emitted(monkeypatch, tmp_path):
+    monkeypatch.setattr(calibrator, "DB_FILE", str(tmp_path / "exists.db"))
+    (tmp_path / "exists.db").touch()
+    monkeypatch.setattr(calibrator, "_last_emitted", {"summary": None, "at": 0.0, "payload": None})
+    monkeypatch.setattr(calibrator, "update_outcomes", lambda: {})
+    writes = []
+    monkeypatch.setattr(calibrator, "write_artifact", lambda category, payload, prefix: writes.append(prefix))
+    return writes
+
+
+def stats(count, avg):
+    return {"BUY_CANDIDATE": {"count": count, "avg_confidence": avg}}
+
+
+def test_new_decisions_alone_do_not_re_emit(emitted, monkeypatch):
+    summaries = iter([stats(10, 0.71), stats(11, 0.7101), stats(12, 0.64)])
+    monkeypatch.setattr(calibrator, "update_summary", lambda wait=False: next(summaries))
+
+    calibrator.compute_calibration()
+    assert emitted == ["calibration_state", "drift_alerts"]
+    calibrator.compute_calibration()
+    assert len(emitted) == 2
+    calibrator.compute_calibration()
+    assert len(emitted) == 4
+
+
+def test_unchanged_summary_is_re_emitted_after_the_interval(emitted, monkeypatch):
+    monkeypatch.setattr(calibrator, "update_summary", lambda wait=False: stats(10, 0.71))
+    calibrator.compute_calibration()
+    calibrator._last_emitted["at"] -= calibrator.EMIT_INTERVAL + 1
+    calibrator.compute_calibration()
+    assert len(emitted) == 4
@@ -0,0 +1,144 @@
+import pytest
+import requests
+
+import http_pool
+import social_scraper
+from http_pool import CircuitBreaker
+from ttl_cache import TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(http_pool.time, "monotonic", clock)
+    return clock
+
+
+def fail(breaker, times):
+    for _ in range(times):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("dep", failures=3, reset_after=30)
+    fail(breaker, 2)
+    assert breaker.state == "closed"
+    fail(breaker, 1)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker("dep", failures=3)
+    fail(breaker, 2)
+    breaker.record_success()
+    fail(breaker, 2)
+    assert breaker.state == "closed"
+
+
+def test_lets_one_probe_through_after_the_reset_wait(clock):
+    breaker = CircuitBreaker("dep", failures=1, reset_after=30)
+    fail(breaker, 1)
+    clock.now += 29.9
+    assert not breaker.allow()
+    clock.now += 0.1
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()  # only the probe
+
+
+def test_successful_probe_closes_the_circuit(clock):
+    breaker = CircuitBreaker("dep", failures=1, reset_after=30)
+    fail(breaker, 1)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.reset_after == 30
+    assert breaker.allow()
+
+
+def test_failed_probes_double_the_wait_up_to_the_cap(clock):
+    breaker = CircuitBreaker("dep", failures=1, reset_after=30, max_reset_after=100)
+    fail(breaker, 1)
+    waits = []
+    for _ in range(4):
+        clock.now += breaker.reset_after
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        waits.append(breaker.reset_after)
+    assert waits == [60, 100, 100, 100]
+
+    clock.now += 100
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.reset_after == 30
+
+
+def test_ollama_calls_fail_fast_once_the_breaker_opens(clock, monkeypatch):
+    calls = []
+
+    def down(url, **kwargs):
+        calls.append(url)
+        raise requests.ConnectionError("refused")
+
+    monkeypatch.setattr(social_scraper, "_OLLAMA", CircuitBreaker("Ollama", failures=3, reset_after=30))
+    monkeypatch.setattr(http_pool, "post", down)
+    monkeypatch.setattr(social_scraper, "PATH_COUNTS", dict.fromkeys(social_scraper.PATH_COUNTS, 0))
+
+    for _ in range(5):
+        assert social_scraper._generate("prompt", timeout=1) is None
+    assert len(calls) == 3
+
+    social_scraper.vader_score("Shares soar on record earnings")
+    stats = social_scraper.path_stats()
+    assert stats["ollama_breaker"] == "open"
+    assert stats["vader_breaker_open"] == 1
+
+
+@pytest.fixture
+def scorer(monkeypatch):
+    monkeypatch.setattr(social_scraper, "_HEADLINE_SCORES",
+                        TTLCache("headline_test", ttl=3600, stale_for=0, disk=False))
+    monkeypatch.setattr(social_scraper, "PATH_COUNTS", dict.fromkeys(social_scraper.PATH_COUNTS, 0))
+    prompts = []
+
+    def reply(text):
+        def generate(prompt, timeout):
+            prompts.append(prompt)
+            return text
+        monkeypatch.setattr(social_scraper, "_generate", generate)
+
+    reply.prompts = prompts
+    return reply
+
+
+def test_duplicate_headlines_are_scored_once_and_fanned_out(scorer):
+    scorer("0.5\n-0.25")
+    titles = ["Shares soar", "Guidance cut", "  shares   SOAR ", "Guidance cut"]
+
+    assert social_scraper.score_titles(titles) == [0.5, -0.25, 0.5, -0.25]
+    assert len(scorer.prompts) == 1
+    assert "2 stock market headlines" in scorer.prompts[0]
+    assert social_scraper.path_stats()["llm"] == 4
+
+
+def test_unparsable_replies_score_neutral_but_are_not_cached(scorer):
+    scorer("I think this is bullish")
+    assert social_scraper.score_titles(["Shares soar"]) == [0.0]
+
+    scorer("0.75")
+    assert social_scraper.score_titles(["Shares soar"]) == [0.75]
+    assert social_scraper.score_titles(["Shares soar"]) == [0.75]
+    assert len(scorer.prompts) == 2
+    assert social_scraper.path_stats()["cache"] == 1
@@ -0,0 +1,127 @@
+import calendar
+import sqlite3
+import time
+
+import pytest
+
+import db_manager
+
+
+@pytest.fixture
+def vault(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DB_FILE", str(tmp_path / "arcos_vault.db"))
+    monkeypatch.setattr(db_manager, "ARCHIVE_FILE", str(tmp_path / "arcos_archive.db"))
+    conn = db_manager._open()
+    yield conn
+    conn.close()
+
+
+def epoch(text):
+    return calendar.timegm(time.strptime(text, "%Y-%m-%d %H:%M:%S"))
+
+
+def user_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def index_names(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='signals'")}
+
+
+def insert(conn, timestamp, ticker="AAA", signal="BUY_CANDIDATE", prob=0.7):
+    conn.execute(
+        "INSERT INTO signals (timestamp, ticker, signal, price_close, sentiment_score, raw_ml_prob, final_prob, rationale)"
+        " VALUES (?, ?, ?, 1.0, 0.0, ?, ?, '')",
+        (timestamp, ticker, signal, prob, prob),
+    )
+
+
+def test_fresh_vault_is_created_at_the_latest_version(vault):
+    assert db_manager.migrate(vault) == len(db_manager.MIGRATIONS)
+    assert user_version(vault) == len(db_manager.MIGRATIONS)
+    assert {"idx_signals_ticker_id", "idx_signals_signal_ts"} <= index_names(vault)
+    tables = {row[0] for row in vault.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert {"signals", "calibration_summary", "calibration_meta", "signal_outcomes", "outcome_stats"} <= tables
+
+
+def test_legacy_vault_gets_epoch_timestamps_and_keeps_ids(vault):
+    # A vault from before migrations: text timestamps, user_version 0
+    db_manager._create_legacy_signals(vault)
+    vault.execute("INSERT INTO signals (id, timestamp, ticker, signal) VALUES (7, '2024-03-01 12:00:00', 'AAA', 'WAIT')")
+    vault.execute("INSERT INTO signals (id, timestamp, ticker, signal) VALUES (9, '2024-03-02T08:30:00', 'BBB', 'WAIT')")
+    vault.execute("INSERT INTO signals (id, timestamp, ticker, signal) VALUES (10, 'garbage', 'CCC', 'WAIT')")
+    vault.commit()
+
+    db_manager.migrate(vault)
+
+    rows = vault.execute("SELECT id, timestamp, typeof(timestamp) FROM signals ORDER BY id").fetchall()
+    assert rows == [
+        (7, epoch("2024-03-01 12:00:00"), "integer"),
+        (9, epoch("2024-03-02 08:30:00"), "integer"),
+        (10, 0, "integer"),
+    ]
+    # AUTOINCREMENT continues past the migrated ids
+    insert(vault, 1)
+    assert vault.execute("SELECT max(id) FROM signals").fetchone()[0] == 11
+
+
+def test_migrate_is_idempotent(vault, capsys):
+    db_manager.migrate(vault)
+    capsys.readouterr()
+    db_manager.migrate(vault)
+    assert capsys.readouterr().out == ""
+    assert user_version(vault) == len(db_manager.MIGRATIONS)
+
+
+def test_failed_migration_rolls_back_and_keeps_the_version(vault, monkeypatch):
+    db_manager.migrate(vault)
+
+    def broken(c):
+        c.execute("CREATE TABLE half_done (x INTEGER)")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(db_manager, "MIGRATIONS", db_manager.MIGRATIONS + [broken])
+    with pytest.raises(RuntimeError):
+        db_manager.migrate(vault)
+    assert user_version(vault) == len(db_manager.MIGRATIONS) - 1
+    assert vault.execute("SELECT name FROM sqlite_master WHERE name='half_done'").fetchone() is None
+
+
+def test_old_decisions_move_to_monthly_archive_tables(vault):
+    db_manager.migrate(vault)
+    vault.execute("ATTACH DATABASE ? AS archive", (db_manager.ARCHIVE_FILE,))
+    january, february, recent = epoch("2024-01-15 00:00:00"), epoch("2024-02-20 00:00:00"), epoch("2024-06-01 00:00:00")
+    for ts in (january, january + 60, february, recent):
+        insert(vault, ts)
+    vault.commit()
+
+    db_manager._archive_rows(vault, cutoff=epoch("2024-05-01 00:00:00"))
+
+    assert db_manager.archived_months() == ["202401", "202402"]
+    assert vault.execute("SELECT timestamp FROM main.signals").fetchall() == [(recent,)]
+    assert vault.execute("SELECT count(*) FROM archive.signals_202401").fetchone()[0] == 2
+    assert vault.execute("SELECT id FROM archive.signals_202402").fetchall() == [(3,)]
+
+
+def test_writer_retries_until_the_vault_opens(vault, monkeypatch):
+    db_manager.migrate(vault)
+    vault.commit()
+    monkeypatch.setattr(db_manager, "WRITER_RETRY_FIRST", 0.01)
+    opened = db_manager._open
+    attempts = []
+
+    def flaky_open(query_only=False):
+        attempts.append(query_only)
+        if len(attempts) < 3:
+            raise sqlite3.OperationalError("unable to open database file")
+        return opened(query_only)
+
+    monkeypatch.setattr(db_manager, "_open", flaky_open)
+    before = db_manager.metrics._counters.get(("vault_writer_open_failures_total", ()), 0)
+    writer = db_manager.VaultWriter()
+    writer.submit("INSERT INTO calibration_meta (key, value) VALUES ('probe', 1)")
+
+    assert writer.flush(5)
+    assert len(attempts) == 3
+    assert vault.execute("SELECT value FROM calibration_meta WHERE key = 'probe'").fetchone() == (1,)
+    assert db_manager.metrics._counters[("vault_writer_open_failures_total", ())] == before + 2
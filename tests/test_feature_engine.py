@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import feature_engine
+from feature_engine import RollingWindow
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(feature_engine, "STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setattr(feature_engine, "_states", {})
+
+
+def bars(n, seed=0, start="2024-01-01"):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    index = pd.date_range(start, periods=n, freq="5min")
+    return pd.DataFrame({"Close": close}, index=index)
+
+
+def pandas_features(df):
+    close = df["Close"]
+    sma_short = close.rolling(feature_engine.SMA_SHORT).mean()
+    sma_long = close.rolling(feature_engine.SMA_LONG).mean()
+    return {
+        "momentum": close.pct_change().iloc[-1],
+        "trend_alignment": ((sma_short - sma_long) / sma_long).iloc[-1],
+        "volatility_regime": close.pct_change().rolling(feature_engine.VOL_WINDOW).std().iloc[-1],
+    }
+
+
+def assert_matches_pandas(features, df):
+    expected = pandas_features(df)
+    assert features.keys() == expected.keys()
+    for name, value in expected.items():
+        assert features[name] == pytest.approx(value, rel=1e-9, abs=1e-12), name
+
+
+def test_rolling_window_matches_pandas_rolling():
+    values = np.random.default_rng(1).normal(5, 2, 300)
+    window = RollingWindow(20)
+    means = pd.Series(values).rolling(20).mean()
+    stds = pd.Series(values).rolling(20).std()
+    for i, x in enumerate(values):
+        window.push(x)
+        if i >= 19:
+            assert window.mean == pytest.approx(means[i], rel=1e-12)
+            assert window.std() == pytest.approx(stds[i], rel=1e-9)
+
+
+def test_rolling_window_needs_two_values_for_std():
+    window = RollingWindow(5)
+    window.push(1.0)
+    assert math.isnan(window.std())
+
+
+def test_replace_last_matches_recomputing_the_window():
+    window = RollingWindow(10)
+    for x in range(1, 16):
+        window.push(float(x))
+    window.replace_last(100.0)
+    expected = pd.Series([float(x) for x in range(6, 15)] + [100.0])
+    assert window.mean == pytest.approx(expected.mean())
+    assert window.std() == pytest.approx(expected.std())
+
+
+def test_resync_keeps_long_runs_exact(monkeypatch):
+    monkeypatch.setattr(feature_engine, "RESYNC_EVERY", 50)
+    values = np.random.default_rng(2).normal(1e6, 1, 500)
+    window = RollingWindow(20)
+    for x in values:
+        window.push(x)
+    assert window.std() == pytest.approx(pd.Series(values[-20:]).std(), rel=1e-9)
+
+
+def test_update_state_matches_pandas_bar_by_bar():
+    df = bars(120)
+    for end in range(60, 121, 7):
+        features = feature_engine.update_state("AAA", df.iloc[:end]).features()
+        assert_matches_pandas(features, df.iloc[:end])
+
+
+def test_update_state_needs_full_windows():
+    assert feature_engine.update_state("AAA", bars(30)).features() == {}
+
+
+def test_revised_last_bar_is_overwritten_not_appended():
+    df = bars(80)
+    feature_engine.update_state("AAA", df)
+    revised = df.copy()
+    revised.iloc[-1, 0] *= 1.02
+    features = feature_engine.update_state("AAA", revised).features()
+    assert_matches_pandas(features, revised)
+
+
+def test_state_resumes_from_disk_after_restart(monkeypatch):
+    df = bars(100)
+    feature_engine.update_state("AAA", df.iloc[:90])
+    monkeypatch.setattr(feature_engine, "_states", {})
+
+    loaded = feature_engine.load_state("AAA")
+    assert loaded is not None and loaded.last_ts == df.index[89].value
+
+    features = feature_engine.update_state("AAA", df).features()
+    assert_matches_pandas(features, df)
+
+
+def test_reseeds_when_the_last_seen_bar_is_gone():
+    feature_engine.update_state("AAA", bars(80, seed=3))
+    other = bars(80, seed=4, start="2025-06-01")
+    features = feature_engine.update_state("AAA", other).features()
+    assert_matches_pandas(features, other)
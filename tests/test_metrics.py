@@ -0,0 +1,98 @@
+import pytest
+
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh(monkeypatch):
+    monkeypatch.setattr(metrics, "_histograms", {})
+    monkeypatch.setattr(metrics, "_counters", {})
+    monkeypatch.setattr(metrics, "_collectors", [])
+
+
+def series(text):
+    """{series: value} for every sample line of a render."""
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines() if line and not line.startswith("#")
+    }
+
+
+def test_histogram_buckets_are_cumulative_and_end_at_inf():
+    for seconds in (0.002, 0.002, 0.3, 1000.0):
+        metrics.observe("stage_seconds", seconds, stage="x")
+    samples = series(metrics.render())
+
+    bucket = 'arcos_stage_seconds_bucket{stage="x",le="%s"}'
+    assert samples[bucket % "0.001"] == 0
+    assert samples[bucket % "0.005"] == 2
+    assert samples[bucket % "0.25"] == 2
+    assert samples[bucket % "0.5"] == 3
+    assert samples[bucket % "300.0"] == 3
+    assert samples[bucket % "+Inf"] == 4
+    counts = [samples[bucket % repr(b)] for b in metrics.BUCKETS]
+    assert counts == sorted(counts)
+    assert samples['arcos_stage_seconds_count{stage="x"}'] == 4
+    assert samples['arcos_stage_seconds_sum{stage="x"}'] == pytest.approx(1000.304)
+
+
+def test_a_value_on_a_bound_falls_in_that_bucket():
+    metrics.observe("stage_seconds", 0.1, stage="x")
+    samples = series(metrics.render())
+    assert samples['arcos_stage_seconds_bucket{stage="x",le="0.05"}'] == 0
+    assert samples['arcos_stage_seconds_bucket{stage="x",le="0.1"}'] == 1
+
+
+def test_types_are_declared_once_per_name():
+    metrics.incr("vault_writes_total", 2)
+    metrics.incr("visits_total", outcome="failed")
+    metrics.incr("visits_total", 3, outcome="analyzed")
+    text = metrics.render()
+    assert text.count("# TYPE arcos_visits_total counter") == 1
+    assert "arcos_vault_writes_total 2" in text
+    assert 'arcos_visits_total{outcome="analyzed"} 3' in text
+
+
+def test_label_values_are_escaped():
+    metrics.incr("events_total", path='C:\\tmp\\"quoted"\nnext')
+    assert 'arcos_events_total{path="C:\\\\tmp\\\\\\"quoted\\"\\nnext"} 1' in metrics.render()
+
+
+def test_collectors_feed_counters_and_gauges_and_a_failing_one_is_skipped(capsys):
+    def broken():
+        raise RuntimeError("collector down")
+        yield
+
+    metrics.register(broken)
+    metrics.register(lambda: [("sentiment_headlines_total", {"path": "llm"}, 7), ("ollama_breaker_open", {}, 1)])
+    text = metrics.render()
+
+    assert "# TYPE arcos_sentiment_headlines_total counter" in text
+    assert 'arcos_sentiment_headlines_total{path="llm"} 7' in text
+    assert "# TYPE arcos_ollama_breaker_open gauge" in text
+    assert "arcos_ollama_breaker_open 1" in text
+    assert "Collector failed: collector down" in capsys.readouterr().out
+
+
+def test_span_counts_errors_and_still_times_the_block():
+    with metrics.span("fetch"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.span("fetch"):
+            raise ValueError("boom")
+    samples = series(metrics.render())
+
+    assert samples['arcos_stage_seconds_count{stage="fetch"}'] == 2
+    assert samples['arcos_stage_errors_total{stage="fetch"}'] == 1
+
+
+def test_timed_wraps_a_function_in_a_span():
+    @metrics.timed("work")
+    def work(x):
+        """Doubles x."""
+        return 2 * x
+
+    assert work(21) == 42
+    assert work.__doc__ == "Doubles x."
+    assert series(metrics.render())['arcos_stage_seconds_count{stage="work"}'] == 1
+    assert 'arcos_stage_errors_total{stage="work"}' not in metrics.render()
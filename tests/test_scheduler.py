@@ -0,0 +1,98 @@
+import threading
+
+import pytest
+
+from scheduler import ScanScheduler, format_cycle_report
+
+
+@pytest.fixture
+def gate():
+    event = threading.Event()
+    yield event
+    event.set()  # never leave a pool thread blocked
+
+
+def make_scheduler(io_stage, cpu_stage=lambda ticker, inputs: inputs, deadline=0.3):
+    return ScanScheduler(io_stage, cpu_stage, io_workers=4, cpu_workers=1, revisit_deadline=deadline)
+
+
+def test_a_stage_still_running_carries_over_instead_of_starting_again(gate):
+    calls = []
+
+    def io_stage(ticker):
+        calls.append(ticker)
+        if ticker == "SLOW":
+            gate.wait(5)
+        return ticker.lower()
+
+    results = []
+    scheduler = make_scheduler(io_stage)
+    report = scheduler.run_cycle(["FAST", "SLOW"], on_result=lambda t, out: results.append((t, out)))
+    assert report["running"] == ["SLOW"]
+    assert report["visited"] == 1
+    assert results == [("FAST", "fast")]
+
+    gate.set()
+    report = scheduler.run_cycle(["FAST", "SLOW"], on_result=lambda t, out: results.append((t, out)))
+    assert calls.count("SLOW") == 1
+    assert ("SLOW", "slow") in results
+    assert report["running"] == [] and report["visited"] == 2
+    assert scheduler.in_flight == {} and scheduler._started == {}
+    scheduler.shutdown()
+
+
+def test_failures_are_reported_and_release_their_start_times():
+    def io_stage(ticker):
+        if ticker == "BAD":
+            raise RuntimeError("no data")
+        return ticker
+
+    def cpu_stage(ticker, inputs):
+        if ticker == "WORSE":
+            raise RuntimeError("model blew up")
+        return inputs
+
+    scheduler = make_scheduler(io_stage, cpu_stage)
+    report = scheduler.run_cycle(["OK", "BAD", "WORSE"])
+    assert report["failed"] == ["BAD", "WORSE"]
+    assert report["visited"] == 1
+    assert scheduler._started == {}
+    # Failed tickers were never visited, so they lead the next cycle
+    assert scheduler.order(["OK", "BAD", "WORSE"])[-1] == "OK"
+    scheduler.shutdown()
+
+
+def test_a_carried_over_stage_that_fails_releases_its_start_time(gate):
+    def io_stage(ticker):
+        gate.wait(5)
+        raise RuntimeError("timed out upstream")
+
+    scheduler = make_scheduler(io_stage)
+    assert scheduler.run_cycle(["SLOW"])["running"] == ["SLOW"]
+    assert "SLOW" in scheduler._started
+
+    gate.set()
+    report = scheduler.run_cycle(["SLOW"])
+    assert report["failed"] == ["SLOW"]
+    assert scheduler._started == {} and scheduler.in_flight == {}
+    scheduler.shutdown()
+
+
+def test_cycle_report_and_format(gate):
+    def io_stage(ticker):
+        if ticker == "SLOW":
+            gate.wait(5)
+        return None if ticker == "QUIET" else ticker
+
+    scheduler = make_scheduler(io_stage)
+    report = scheduler.run_cycle(["A", "QUIET", "SLOW"])
+    assert report["tickers"] == 3
+    assert report["visited"] == 2
+    assert report["skipped"] == 1
+    assert report["coverage"] == pytest.approx(2 / 3)
+    assert report["latency_p50"] <= report["latency_p95"] <= report["latency_max"]
+
+    line = format_cycle_report(report)
+    assert "2/3 covered (67%)" in line
+    assert "0 missed | 1 still running" in line
+    scheduler.shutdown()
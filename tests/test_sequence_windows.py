@@ -0,0 +1,28 @@
+import numpy as np
+import torch
+
+from sequence_windows import _build_sequences_loop, build_sequences, next_close_labels
+
+
+def test_labels_compare_the_two_bars_after_each_window():
+    close = np.array([5.0, 1.0, 2.0, 4.0, 3.0, 6.0, 7.0])
+    features = np.column_stack([close, -close])
+    X, y = build_sequences(features, window_size=3)
+
+    assert len(X) == len(y) == len(close) - 3 - 1
+    for i in range(len(X)):
+        assert torch.equal(X[i], torch.tensor(features[i:i + 3], dtype=torch.float32))
+        assert y[i, 0] == float(close[i + 3 + 1] > close[i + 3])
+    assert next_close_labels(features, 3).tolist() == [0.0, 1.0, 1.0]
+
+
+def test_matches_the_original_loop():
+    data = np.random.default_rng(0).random((120, 5))
+    X_loop, y_loop = _build_sequences_loop(data, 60)
+    X, y = build_sequences(data, 60)
+    assert torch.equal(X, X_loop) and torch.equal(y, y_loop)
+
+
+def test_too_few_bars_give_empty_tensors():
+    X, y = build_sequences(np.zeros((61, 5)), 60)
+    assert X.shape == (0, 60, 5) and y.shape == (0, 1)
@@ -0,0 +1,108 @@
+import json
+import time
+
+import pytest
+
+import signal_stream
+from signal_stream import SignalBuffer
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def client():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    signal_stream.ensure_group(client)
+    return client
+
+
+def signal(ticker, kind="BUY_CANDIDATE", prob=0.7):
+    return {"header": {"message_id": signal_stream.ulid()},
+            "body": {"ticker": ticker, "signal": kind, "probability": prob}}
+
+
+def published(client):
+    return [json.loads(fields["payload"])["body"] for _, fields in client.xrange(signal_stream.STREAM)]
+
+
+def test_ulids_are_unique_and_sort_in_creation_order():
+    ids = [signal_stream.ulid() for _ in range(2000)]
+    assert len(set(ids)) == len(ids)
+    assert ids == sorted(ids)
+    assert all(len(i) == 26 and set(i) <= set(signal_stream._CROCKFORD) for i in ids)
+
+
+def test_ulids_within_one_millisecond_still_increase(monkeypatch):
+    monkeypatch.setattr(signal_stream.time, "time", lambda: 1_700_000_000.0)
+    ids = [signal_stream.ulid() for _ in range(100)]
+    assert ids == sorted(set(ids))
+
+
+def test_newer_signal_for_the_same_key_replaces_the_pending_one(client):
+    buffer = SignalBuffer(client, max_size=10, max_delay=3600)
+    buffer.add(signal("AAA", prob=0.6))
+    buffer.add(signal("AAA", prob=0.9))
+    buffer.add(signal("AAA", kind="SELL_AVOID", prob=0.2))
+    buffer.add(signal("BBB"))
+    assert published(client) == []
+
+    assert buffer.flush() == 3
+    bodies = published(client)
+    assert [(b["ticker"], b["signal"], b["probability"]) for b in bodies] == [
+        ("AAA", "BUY_CANDIDATE", 0.9), ("AAA", "SELL_AVOID", 0.2), ("BBB", "BUY_CANDIDATE", 0.7),
+    ]
+    assert buffer.counts["coalesced"] == 1
+    assert buffer.counts["round_trips"] == 1
+
+
+def test_flushes_once_max_size_signals_are_pending(client):
+    buffer = SignalBuffer(client, max_size=3, max_delay=3600)
+    buffer.add(signal("AAA"))
+    buffer.add(signal("BBB"))
+    assert published(client) == []
+    buffer.add(signal("CCC"))
+    assert [b["ticker"] for b in published(client)] == ["AAA", "BBB", "CCC"]
+    assert buffer.flush() == 0
+
+
+def test_flushes_once_the_oldest_signal_has_waited_max_delay(client):
+    buffer = SignalBuffer(client, max_size=10, max_delay=0.05)
+    buffer.add(signal("AAA"))
+    deadline = time.monotonic() + 5
+    while not published(client) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [b["ticker"] for b in published(client)] == ["AAA"]
+
+
+def test_failed_publish_is_requeued_and_newer_signals_win(client, monkeypatch):
+    buffer = SignalBuffer(client, max_size=10, max_delay=3600)
+    real_publish = signal_stream.publish
+
+    def down(client, payloads):
+        # A newer AAA signal arrives while the publish is failing
+        buffer.add(signal("AAA", prob=0.95))
+        raise ConnectionError("redis down")
+
+    buffer.add(signal("AAA", prob=0.6))
+    buffer.add(signal("BBB"))
+    monkeypatch.setattr(signal_stream, "publish", down)
+    assert buffer.flush() == 0
+    assert buffer.counts["errors"] == 1
+    assert buffer.counts["requeued"] == 1
+
+    monkeypatch.setattr(signal_stream, "publish", real_publish)
+    assert buffer.flush() == 2
+    assert sorted((b["ticker"], b["probability"]) for b in published(client)) == [("AAA", 0.95), ("BBB", 0.7)]
+
+
+def test_entries_stay_pending_until_acknowledged(client):
+    signal_stream.publish(client, [signal("AAA"), signal("BBB")])
+
+    entries = signal_stream.read_group(client, "maestro-a")
+    assert [payload["body"]["ticker"] for _, payload in entries] == ["AAA", "BBB"]
+    assert signal_stream.read_group(client, "maestro-a") == []
+
+    signal_stream.ack(client, [entries[0][0]])
+    pending = signal_stream.read_group(client, "maestro-a", pending=True)
+    assert [entry_id for entry_id, _ in pending] == [entries[1][0]]
+    assert signal_stream.stream_stats(client)["pending"] == 1
@@ -0,0 +1,221 @@
+"""
+Time-to-live caches for slow-changing inputs (fundamentals, asset names, news,
+macro). Each cache is a size-bounded LRU in memory backed by a shared SQLite
+file under ARCOS_WORKSPACE, so a restarted agent starts warm.
+
+An entry younger than `ttl` is served as is. Up to `ttl + stale_for` it is
+still served, while one background refresh replaces it (stale-while-
+revalidate), so callers only block when nothing usable is cached.
+Rows older than that are deleted from the disk tier when the file is opened
+and every PRUNE_EVERY writes.
+
+    NEWS = TTLCache("news", ttl=600)
+    items = NEWS.get(ticker, lambda: download_news(ticker))
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import metrics
+
+WORKSPACE_ROOT = os.environ.get("ARCOS_WORKSPACE", "workspace")
+CACHE_FILE = os.path.join(WORKSPACE_ROOT, "ttl_cache.db")
+DISK_TIER = os.environ.get("ARCOS_CACHE_DISK", "1").lower() in ("1", "true", "yes")
+DEFAULT_MAX_ENTRIES = 512
+# Disk writes per cache between deletions of its rows past ttl + stale_for
+PRUNE_EVERY = 256
+
+_caches: Dict[str, "TTLCache"] = {}
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="arcos-refresh")
+
+_conn = None
+_conn_lock = threading.Lock()
+
+
+def _connection() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        cache_dir = os.path.dirname(CACHE_FILE)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        _conn = sqlite3.connect(CACHE_FILE, timeout=30, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute('''CREATE TABLE IF NOT EXISTS entries (
+            cache TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            PRIMARY KEY (cache, key)
+        ) WITHOUT ROWID''')
+        _conn.commit()
+        for cache in list(_caches.values()):
+            if cache.disk:
+                cache._prune(_conn)
+    return _conn
+
+
+class TTLCache:
+    """One named cache; values must be JSON-serializable to reach the disk tier."""
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        stale_for: Optional[float] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        disk: bool = DISK_TIER,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.stale_for = ttl if stale_for is None else stale_for
+        self.max_entries = max_entries
+        self.disk = disk
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._disk_writes = 0
+        self.counts = {"hits": 0, "stale_hits": 0, "misses": 0, "disk_hits": 0,
+                       "refreshes": 0, "errors": 0, "pruned": 0}
+        _caches[name] = self
+
+    def get(self, key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        The cached value for `key`, calling `fetch()` on a miss. Exceptions
+        from a blocking fetch propagate and nothing is cached; a failed
+        background refresh keeps the stale value.
+        """
+        entry = self._lookup(key)
+        now = time.time()
+        if entry is not None:
+            value, fetched_at = entry
+            age = now - fetched_at
+            if age < self.ttl:
+                self._count("hits")
+                return value
+            if age < self.ttl + self.stale_for:
+                self._count("stale_hits")
+                self._refresh_later(key, fetch)
+                return value
+
+        self._count("misses")
+        value = fetch()
+        self.put(key, value)
+        return value
+
+    def peek(self, key: str) -> Optional[Any]:
+        """The usable (fresh or stale) value for `key` without fetching, or None."""
+        entry = self._lookup(key)
+        if entry is None or time.time() - entry[1] >= self.ttl + self.stale_for:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return entry[0]
+
+    def put(self, key: str, value: Any, fetched_at: Optional[float] = None) -> None:
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        self._remember(key, value, fetched_at)
+        if self.disk:
+            try:
+                with _conn_lock:
+                    conn = _connection()
+                    conn.execute(
+                        "INSERT OR REPLACE INTO entries (cache, key, value, fetched_at) VALUES (?, ?, ?, ?)",
+                        (self.name, key, json.dumps(value), fetched_at),
+                    )
+                    conn.commit()
+                    self._disk_writes += 1
+                    if self._disk_writes % PRUNE_EVERY == 0:
+                        self._prune(conn)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                print(f"   ⚠️ [Cache] {self.name} disk write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.counts)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Deletes this cache's rows too old to be served. Called with _conn_lock held."""
+        cursor = conn.execute(
+            "DELETE FROM entries WHERE cache=? AND fetched_at < ?",
+            (self.name, time.time() - self.ttl - self.stale_for),
+        )
+        conn.commit()
+        if cursor.rowcount > 0:
+            with self._lock:
+                self.counts["pruned"] += cursor.rowcount
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def _remember(self, key: str, value: Any, fetched_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, fetched_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if not self.disk:
+            return None
+        try:
+            with _conn_lock:
+                row = _connection().execute(
+                    "SELECT value, fetched_at FROM entries WHERE cache=? AND key=?", (self.name, key)
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        entry = (json.loads(row[0]), row[1])
+        self._count("disk_hits")
+        self._remember(key, *entry)
+        return entry
+
+    def _refresh_later(self, key: str, fetch: Callable[[], Any]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self.put(key, fetch())
+                self._count("refreshes")
+            except Exception as e:
+                self._count("errors")
+                print(f"   ⚠️ [Cache] {self.name} refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        _refresh_pool.submit(refresh)
+
+
+def all_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss counters of every cache in the process, by cache name."""
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+def _collect_metrics():
+    for name, stats in all_stats().items():
+        for event in ("hits", "stale_hits", "misses", "disk_hits", "refreshes", "errors", "pruned"):
+            yield "cache_events_total", {"cache": name, "event": event}, stats[event]
+        yield "cache_entries", {"cache": name}, stats["entries"]
+
+
+metrics.register(_collect_metrics)